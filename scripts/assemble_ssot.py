@@ -1,31 +1,125 @@
 #!/usr/bin/env python3
-import argparse, json, re, sys, unicodedata
+import argparse, json, sys
 from pathlib import Path
 from datetime import datetime
 
-GLOBAL_UNIQUE = [
-  "Query-Pattern Matrix",
-  "Unified Risk & Control Model",
-  "Standard Development Environment",
-  "Agent Query Index",
-]
+from docsyn_lib.assembly import SEPARATORS, Assembled, assemble_streaming, plan_units
+from docsyn_lib.normalize import StreamNormalizer
+from docsyn_lib.clean import CleanIndex
+from docsyn_lib.cache import BuildCache, HashMemo, DEFAULT_MAX_BYTES, load_json, stat_sig, write_json
+from docsyn_lib.loader import DEFAULT_WORKERS, ParallelLoader, decode_text
+from docsyn_lib.record import digest_bytes, write_record
+from docsyn_lib.section_index import index_path_for, write_index
+from docsyn_lib.telemetry import stage
+from docsyn_lib import session
+
+ARTIFACTS = ["PartA_Core.md", "PartB_Blueprints.md", "DocSyn_Compiled.md", "DocSyn_Compiled.index.json"]
+SCRIPTS = Path(__file__).resolve().parent
 
 def read_text(p: Path) -> str:
     return p.read_text(encoding="utf-8", errors="ignore") if p.exists() else ""
 
-def normalize(md: str) -> str:
-    md = re.sub(r"\n{3,}", "\n\n", md)
-    if not md.endswith("\n"):
-        md += "\n"
-    return md
+def assemble_in_memory(core_paths, bp_paths, outdir: Path, loader: ParallelLoader):
+    texts = {p: decode_text(data) for p, data in loader.map(core_paths + bp_paths) if data is not None}
+    partA = SEPARATORS["A"].join(texts[p] for p in core_paths if p in texts)
+    partB = SEPARATORS["B"].join(texts[p] for p in bp_paths if p in texts)
+
+    if not partA.strip() and not partB.strip():
+        return None
+
+    # Collapse blank runs, dedupe consecutive H1s, NFC and collect report stats in one pass,
+    # source by source so the section index can map each source to its SSOT bytes
+    norm = StreamNormalizer()
+    chunks, sources, pos = [], [], 0
+    def emit(text: str) -> None:
+        nonlocal pos
+        data = text.encode("utf-8")
+        chunks.append(data)
+        pos += len(data)
+    for unit in plan_units(core_paths, bp_paths):
+        emit(norm.feed(unit.sep))
+        emit(norm.release() or "")
+        start = pos
+        emit(norm.feed(texts.get(unit.path, "") if unit.path else unit.text))
+        emit(norm.settle())
+        if unit.path:
+            sources.append({"path": unit.path, "part": unit.part, "start": start, "end": pos})
+    emit(norm.close())
+
+    outdir.mkdir(parents=True, exist_ok=True)
+
+    digests = {}
+    for name, data in [("PartA_Core.md", partA.encode("utf-8")), ("PartB_Blueprints.md", partB.encode("utf-8")),
+                       ("DocSyn_Compiled.md", b"".join(chunks))]:
+        (outdir / name).write_bytes(data)
+        digests[name] = digest_bytes(data)
+
+    return Assembled(norm.stats.as_dict(), None, sources, digests)
+
+def load_segment_map(path: Path, outdir: Path):
+    """Previous segment map, if it still describes the artifacts in outdir."""
+    seg_map = load_json(path, None)
+    if not seg_map or seg_map.get("outdir") != str(outdir):
+        return None
+    try:
+        if any(stat_sig(outdir / n) != sig for n, sig in seg_map["outputs"].items()):
+            return None
+    except OSError:
+        return None
+    return seg_map
+
+def save_segment_map(path: Path, outdir: Path, segments) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    write_json(path, {
+        "outdir": str(outdir),
+        "outputs": {n: stat_sig(outdir / n) for n in ARTIFACTS},
+        "segments": segments,
+    })
+
+def code_parts(memo: HashMemo) -> list:
+    """Content hashes of the assembler and docsyn_lib, so a code change invalidates cached results."""
+    code = [SCRIPTS / "assemble_ssot.py"] + sorted((SCRIPTS / "docsyn_lib").glob("*.py"))
+    return [f"code:{p.name}:{memo.sha256(p)}" for p in code]
+
+def assembly_key(memo: HashMemo, manifest_path: Path, core_paths, bp_paths) -> str:
+    """Cache key: manifest bytes, assembler code, and every source's content hash in build order."""
+    parts = ["manifest", memo.sha256(manifest_path)]
+    parts += code_parts(memo)
+    parts += [f"A:{p}:{memo.sha256(p) or 'missing'}" for p in core_paths]
+    parts += [f"B:{p}:{memo.sha256(p) or 'missing'}" for p in bp_paths]
+    return BuildCache.key(parts)
+
+def write_report(outdir: Path, stats: dict) -> None:
+    fence_count = stats["fence_count"]
+    headings = " ".join(f"{h}={c}" for h, c in stats["headings"].items())
+    report = f"""Built {outdir / 'DocSyn_Compiled.md'}
+- code fences: {fence_count} ({'even' if fence_count % 2 == 0 else 'ODD'})
+- globals in SSOT: {stats['unique_counts']}
+- headings: {headings} (duplicate H1s dropped: {stats['h1_deduped']})
+- lines: {stats['lines']}
+"""
+    (outdir / "BUILD_REPORT.txt").write_text(report, encoding="utf-8")
+    print(report)
 
-def main():
+def main(argv=None):
     ap = argparse.ArgumentParser()
     ap.add_argument("--manifest", default="build.manifest.json")
     ap.add_argument("--out", default="dist")
-    args = ap.parse_args()
+    ap.add_argument("--stream", action="store_true", help="Streaming assembly with bounded memory (byte-identical output)")
+    ap.add_argument("--incremental", action="store_true", help="Streaming assembly that recomputes only sources changed since the last --incremental build")
+    ap.add_argument("--no-zero-copy", action="store_true", help="With --stream/--incremental, decode every source instead of splicing clean ones")
+    ap.add_argument("--io-workers", type=int, default=DEFAULT_WORKERS, help="Parallel source reads for the in-memory build")
+    ap.add_argument("--no-cache", action="store_true", help="Always rebuild; do not read or write the build cache")
+    ap.add_argument("--cache-dir", default=None, help="Build cache location (default: <out>/.cache)")
+    ap.add_argument("--cache-max-mb", type=int, default=DEFAULT_MAX_BYTES >> 20, help="Evict least-recently-used entries beyond this size")
+    args = ap.parse_args(argv)
 
     root = Path(".").resolve()
+    with stage("assemble", root / args.out, root) as metrics:
+        return build(args, root, metrics)
+
+def build(args, root: Path, metrics) -> None:
+    metrics.note(mode="incremental" if args.incremental else "stream" if args.stream else "in-memory")
     manifest_path = root / args.manifest
     if not manifest_path.exists():
         print(f"ERROR: manifest not found: {manifest_path}", file=sys.stderr)
@@ -52,47 +146,63 @@ def main():
     core_paths = sorted([root / p for p in sources if is_core(p)])
     bp_paths = sorted([root / p for p in sources if is_bp(p)])
 
-    # Build strings
-    partA = "\n\n".join(read_text(p) for p in core_paths if p.exists())
-    partB = "\n\n---\n\n".join(read_text(p) for p in bp_paths if p.exists())
-
-    if not partA.strip() and not partB.strip():
-        print("ERROR: Sources resolved but files are empty/missing. Check paths in manifest.", file=sys.stderr)
-        sys.exit(4)
-
-    banner = f"# DocSyn Compiled Knowledge\n\n"
-    ssot = normalize(banner + partA + "\n---\n\n" + partB)
-
-    # Deduplicate consecutive identical H1s
-    out_lines, prev_h = [], None
-    for ln in ssot.splitlines():
-        m = re.match(r"^#\s+(.+)$", ln)
-        if m:
-            h = m.group(1).strip().lower()
-            if h == prev_h:
-                continue
-            prev_h = h
-        out_lines.append(ln)
-    ssot = "\n".join(out_lines) + "\n"
-    
-    # Normalize Unicode for cross-platform consistency
-    ssot = unicodedata.normalize("NFC", ssot)
-
     outdir = root / args.out
-    outdir.mkdir(parents=True, exist_ok=True)
-
-    (outdir / "PartA_Core.md").write_text(partA, encoding="utf-8")
-    (outdir / "PartB_Blueprints.md").write_text(partB, encoding="utf-8")
-    (outdir / "DocSyn_Compiled.md").write_text(ssot, encoding="utf-8")
-
-    fence_count = ssot.count("```")
-    unique_counts = {g: len(re.findall(rf"^#.*{re.escape(g)}", ssot, flags=re.M|re.I)) for g in GLOBAL_UNIQUE}
-    report = f"""Built {outdir / 'DocSyn_Compiled.md'}
-- code fences: {fence_count} ({'even' if fence_count % 2 == 0 else 'ODD'})
-- globals in SSOT: {unique_counts}
-"""
-    (outdir / "BUILD_REPORT.txt").write_text(report, encoding="utf-8")
-    print(report)
+    cache_dir = root / args.cache_dir if args.cache_dir else outdir / ".cache"
+    memo = session.hash_memo(cache_dir / "HASHES.json")
+    cache = key = meta = None
+    if not args.no_cache:
+        cache = BuildCache(cache_dir, "assemble", args.cache_max_mb << 20)
+        key = assembly_key(memo, manifest_path, core_paths, bp_paths)
+        meta = cache.restore(key, outdir)
+
+    if meta is not None:
+        stats, digests = meta["stats"], meta["digests"]
+    else:
+        seg_path = cache_dir / "SEGMENTS.json"
+        clean = None
+        if (args.stream or args.incremental) and not args.no_zero_copy:
+            clean = CleanIndex(cache_dir / "CLEAN.json", memo, BuildCache.key(code_parts(memo)))
+        if args.incremental:
+            previous = load_segment_map(seg_path, outdir)
+            result = assemble_streaming(core_paths, bp_paths, outdir, digest=memo.sha256, previous=previous, clean=clean)
+        elif args.stream:
+            result = assemble_streaming(core_paths, bp_paths, outdir, clean=clean)
+        else:
+            loader = ParallelLoader(args.io_workers)
+            result = assemble_in_memory(core_paths, bp_paths, outdir, loader)
+            print(loader.stats.summary())
+            metrics.note(load=loader.stats.as_dict())
+        if result is None:
+            print("ERROR: Sources resolved but files are empty/missing. Check paths in manifest.", file=sys.stderr)
+            sys.exit(4)
+        stats, segments, sources, digests = result
+        ssot_path = outdir / "DocSyn_Compiled.md"
+        digests[index_path_for(ssot_path).name] = write_index(ssot_path, sources, root, digests[ssot_path.name]["sha256"])
+        print(f"[index] {len(sources)} sources -> {index_path_for(ssot_path).name}")
+        if clean:
+            clean.save()
+            print(f"[zero-copy] spliced {clean.spliced}/{len(clean.used)} sources (analyzed {clean.analyzed})")
+            metrics.cache("clean", hits=len(clean.used) - clean.analyzed, misses=clean.analyzed)
+        if segments is not None:
+            save_segment_map(seg_path, outdir, segments)
+            reused = sum(1 for s in segments if s["reused"])
+            print(f"[incremental] reused {reused}/{len(segments)} segments")
+            metrics.cache("segments", hits=reused, misses=len(segments) - reused)
+        if cache:
+            cache.store(key, outdir, ARTIFACTS, {"stats": stats, "digests": digests})
+
+    write_record(outdir, digests)
+    memo.save()
+    if cache:
+        cache.save_stats()
+        st = cache.stats
+        print(f"[cache] {st['last_result']} {key[:8]} (hits={st['hits']} misses={st['misses']} evictions={st['evictions']})")
+        metrics.cache("build", hits=int(meta is not None), misses=int(meta is None))
+
+    write_report(outdir, stats)
+
+def run(argv=None) -> int:
+    return main(argv) or 0
 
 if __name__ == "__main__":
-    sys.exit(main())
\ No newline at end of file
+    sys.exit(run())
\ No newline at end of file
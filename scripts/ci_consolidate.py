@@ -1,10 +1,17 @@
 #!/usr/bin/env python3
-import re, json
+import argparse, re, json, os
 from pathlib import Path
 
+from docsyn_lib import session
+from docsyn_lib.cache import BuildCache, VerdictCache, sha256_file
+from docsyn_lib.fingerprint import FingerprintIndex, norm
+from docsyn_lib.telemetry import stage
+
 PROJ = Path(__file__).resolve().parents[1]
 DIST = PROJ / "dist"
 BPS  = PROJ / "blueprints"
+CACHE = DIST / ".cache" / "consolidate" / "BLUEPRINTS.json"
+DEFAULT_WORKERS = min(8, os.cpu_count() or 1)
 
 GLOBAL_TITLES = [
     "Query-Pattern Matrix",
@@ -15,11 +22,6 @@ GLOBAL_TITLES = [
     "High-Level Risk",
 ]
 
-def norm(txt: str) -> str:
-    t = txt.lower()
-    t = re.sub(r"[\s\|`*_:>\-]+", "", t)
-    return t
-
 def split_sections(text: str):
     # Headings H1-H3 (normal or escaped), allowing blockquotes
     lines = text.splitlines()
@@ -69,23 +71,22 @@ def is_aqi_table_para(para: str) -> bool:
             return True
     return False
 
-def strip_by_fingerprints(md: str, norms: dict):
-    # Remove any paragraph whose normalized text contains a normalized global block substring
+def strip_by_fingerprints(md: str, index: FingerprintIndex):
+    # Remove any paragraph whose normalized text contains a normalized global block substring;
+    # removed entries are (key, sample, span of the block in the paragraph or None)
     paras = re.split(r"\n\s*\n", md.strip())
     kept = []
     removed = []
     for para in paras:
-        pn = norm(para)
-        hit_key = None
+        hit = None
         if is_aqi_table_para(para):
-            hit_key = "Agent Query Index"
+            hit = ("Agent Query Index", None)
         else:
-            for key, nb in norms.items():
-                if nb and nb in pn:
-                    hit_key = key
-                    break
-        if hit_key:
-            removed.append((hit_key, para[:200]))
+            matches = index.find(para)
+            if matches:
+                hit = (matches[0].key, [matches[0].start, matches[0].end])
+        if hit:
+            removed.append((hit[0], para[:200], hit[1]))
         else:
             kept.append(para)
     cleaned = "\n\n".join(kept).strip() + "\n"
@@ -96,31 +97,82 @@ def ensure_h1(name: str, md: str) -> str:
         return f"# {name}\n\n" + md
     return md
 
-def main():
+_index = None   # the worker processes' FingerprintIndex
+
+def _init_worker(blocks):
+    global _index
+    _index = FingerprintIndex(blocks)
+
+def consolidate_blueprint(path, index=None):
+    """Clean one blueprint; None if too little is left, else its Part B text and leakage entry."""
+    p = Path(path)
+    raw = p.read_text(encoding="utf-8")
+    name = p.stem.replace("-", " ").title()
+
+    a = strip_by_headings(raw)
+    b, removed = strip_by_fingerprints(a, index or _index)
+    b = ensure_h1(name, b)
+
+    if len(b.strip()) < 100:
+        return None
+    return {
+        "text": b.strip(),
+        "leakage": {
+            "removed_blocks": [{"key": k, "sample": s, "span": span} for (k, s, span) in removed],
+            "sizes": {"raw": len(raw.encode()), "after_headings": len(a.encode()), "after_fps": len(b.encode())}
+        },
+    }
+
+def consolidate_all(paths, blocks, index, workers):
+    """consolidate_blueprint() for each path, in order; across a process pool when it pays."""
+    if workers <= 1 or len(paths) < 2:
+        return [consolidate_blueprint(p, index) for p in paths]
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=min(workers, len(paths)), initializer=_init_worker, initargs=(blocks,)) as pool:
+        return list(pool.map(consolidate_blueprint, [str(p) for p in paths]))
+
+def cache_config(index):
+    """Cached results are valid for one set of Part A global blocks and one version of this code."""
+    code = [sha256_file(Path(__file__).resolve()), sha256_file(Path(session.__file__).with_name("fingerprint.py"))]
+    return BuildCache.key([index.fingerprint, *code])
+
+def main(argv=None, metrics=None):
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Processes for cleaning changed blueprints (1 = in-process)")
+    ap.add_argument("--no-cache", action="store_true", help="Re-clean every blueprint; do not read or write the result cache")
+    args = ap.parse_args(argv)
+
     DIST.mkdir(parents=True, exist_ok=True)
     partA = (DIST / "PartA_Core.md").read_text(encoding="utf-8") if (DIST / "PartA_Core.md").exists() else ""
     blocks = extract_global_blocks_from_partA(partA)
-    global_norms = {k: norm(v) for k, v in blocks.items() if v}
+    index = FingerprintIndex(blocks)
+
+    paths = sorted(BPS.glob("*.md"))
+    memo = session.hash_memo(DIST / ".cache" / "HASHES.json")
+    cache = None if args.no_cache else VerdictCache(CACHE, cache_config(index))
+    keys = [BuildCache.key([p.name, memo.sha256(p)]) for p in paths]
+    results = [cache.get(k) if cache else None for k in keys]
+    todo = [i for i, r in enumerate(results) if r is None]
+    for i, result in zip(todo, consolidate_all([paths[i] for i in todo], blocks, index, args.workers)):
+        results[i] = {"result": result}
+        if cache:
+            cache.put(keys[i], results[i])
+    if cache:
+        cache.save()
+    memo.save()
+    print(f"[consolidate] {len(paths)} blueprints: {len(paths) - len(todo)} cached, {len(todo)} cleaned"
+          + (f" with {min(args.workers, len(todo))} workers" if args.workers > 1 and len(todo) > 1 else ""))
+    if metrics is not None:
+        metrics.cache("blueprints", hits=len(paths) - len(todo), misses=len(todo))
 
     combined, used = [], []
     leakage = {}
-    for p in sorted(BPS.glob("*.md")):
-        raw = p.read_text(encoding="utf-8")
-        name = p.stem.replace("-", " ").title()
-
-        a = strip_by_headings(raw)
-        b, removed = strip_by_fingerprints(a, global_norms)
-        b = ensure_h1(name, b)
-
-        if len(b.strip()) < 100:
+    for p, r in zip(paths, results):
+        if r["result"] is None:
             continue
-
-        combined.append(b.strip())
+        combined.append(r["result"]["text"])
         used.append(p.name)
-        leakage[p.name] = {
-            "removed_blocks": [{"key": k, "sample": s} for (k, s) in removed],
-            "sizes": {"raw": len(raw.encode()), "after_headings": len(a.encode()), "after_fps": len(b.encode())}
-        }
+        leakage[p.name] = r["result"]["leakage"]
 
     partB = "\n\n---\n\n".join(combined) + ("\n" if combined else "")
     (DIST / "PartB_Blueprints.md").write_text(partB, encoding="utf-8")
@@ -144,4 +196,5 @@ def main():
     val_path.write_text(json.dumps(data, indent=2), encoding="utf-8")
 
 if __name__ == "__main__":
-    main()
+    with stage("consolidate", DIST) as metrics:
+        main(metrics=metrics)
@@ -2,6 +2,12 @@
 import sys, json, re
 from pathlib import Path
 
+from docsyn_lib.cache import write_json
+from docsyn_lib.fingerprint import FingerprintIndex
+from docsyn_lib import heading_index
+from docsyn_lib.heading_index import HeadingIndex
+from docsyn_lib.telemetry import stage
+
 PROJ = Path(__file__).resolve().parents[1]
 DIST = PROJ / "dist"
 SSOT = DIST / "DocSyn_Compiled.md"
@@ -9,6 +15,8 @@ VAL  = DIST / "VALIDATION.json"
 BPS  = PROJ / "blueprints"
 UPD  = PROJ / "merge_pr" / "updated"
 LEAK = DIST / "LEAKAGE_REPORT.json"
+PART_A = DIST / "PartA_Core.md"
+PART_B = DIST / "PartB_Blueprints.md"
 
 def die(msg, code=1):
     print(f"[FAIL] {msg}")
@@ -17,42 +25,34 @@ def die(msg, code=1):
 def ok(msg):
     print(f"[OK] {msg}")
 
-def contains_heading(text: str, label: str) -> int:
-    pattern = r"(?m)^\s*(?:>\s*)*(?:\\)?#{1,6}\s+(?:\d+\.\s*)?.*" + re.escape(label) + r"\s*$"
-    return len(re.findall(pattern, text, flags=re.IGNORECASE))
-
-def norm(txt: str) -> str:
-    t = txt.lower()
-    t = re.sub(r"[\s\|`*_:>\-]+", "", t)
-    return t
-
-def split_sections(text: str):
-    lines = text.splitlines()
-    for i, line in enumerate(lines):
-        if re.match(r"^\s*(?:>\s*)*(?:\\)?#{1,3}\s+", line):
-            title = re.sub(r"^\s*(?:>\s*)*(?:\\)?#{1,3}\s+", "", line).strip()
-            yield (title, i)
-    return
-
-def extract_blocks(partA: str):
-    lines = partA.splitlines()
-    sections = list(split_sections(partA))
+GLOBAL_KEYS = ["Router — Query-Pattern Matrix", "Query-Pattern Matrix", "Unified Risk & Control Model", "Standard Development Environment", "Agent Query Index"]
+
+def extract_blocks(headings: HeadingIndex):
     blocks = {}
-    def block_text(start, end):
-        return "\n".join(lines[start:end])
-    keys = ["Router — Query-Pattern Matrix", "Query-Pattern Matrix", "Unified Risk & Control Model", "Standard Development Environment", "Agent Query Index"]
-    for idx, (title, li) in enumerate(sections):
-        clean = re.sub(r"^\d+\.\s*", "", title).strip()
-        for key in keys:
-            if key.lower() in clean.lower():
-                end = sections[idx+1][1] if idx+1 < len(sections) else len(lines)
-                blocks[key] = block_text(li, end)
+    for key in GLOBAL_KEYS:
+        block = headings.block(key)
+        if block is not None:
+            blocks[key] = block
     return blocks
 
+def index_documents(text: str):
+    """Heading indexes of the compiled SSOT and Parts A/B (those that exist), also written to dist/HEADING_INDEX.json."""
+    indexes = {SSOT: HeadingIndex(text)}
+    for p in (PART_A, PART_B):
+        if p.exists():
+            indexes[p] = HeadingIndex(p.read_text(encoding="utf-8"))
+    write_json(DIST / heading_index.INDEX_NAME, {
+        "version": heading_index.INDEX_VERSION,
+        "documents": {p.relative_to(PROJ).as_posix(): ix.as_dict() for p, ix in indexes.items()},
+    })
+    return indexes
+
 def main():
     if not SSOT.exists():
         die("dist/DocSyn_Compiled.md not found")
     text = SSOT.read_text(encoding="utf-8")
+    indexes = index_documents(text)
+    headings = indexes[SSOT]
     if len(text.encode("utf-8")) < 100_000:
         die(f"SSOT too small: {len(text.encode('utf-8'))} bytes (<100k).")
     ok("SSOT size OK.")
@@ -63,12 +63,12 @@ def main():
         "Standard Development Environment",
     ]
     for label in required_once:
-        c = contains_heading(text, label)
+        c = headings.count(label)
         if c != 1:
             die(f"Heading '{label}' occurrences = {c}, expected 1.")
         ok(f"Heading '{label}' present once.")
 
-    aqi = contains_heading(text, "Agent Query Index")
+    aqi = headings.count("Agent Query Index")
     if aqi not in (0,1):
         die(f"'Agent Query Index' occurrences = {aqi}, expected 0 or 1.")
     ok("'Agent Query Index' count acceptable (0 or 1).")
@@ -93,27 +93,24 @@ def main():
     ok("Promotion checks OK.")
 
     # Part B checks
-    partB_path = DIST / "PartB_Blueprints.md"
-    if not partB_path.exists():
+    if PART_B not in indexes:
         die("dist/PartB_Blueprints.md missing.")
-    partB = partB_path.read_text(encoding="utf-8")
+    partB = indexes[PART_B].text
 
     # a) no global headings in Part B (supports escaped and blockquoted)
     for label in ["Query-Pattern Matrix", "Unified Risk", "Unified Risk & Control Model", "Standard Development Environment", "Agent Query Index"]:
-        c = contains_heading(partB, label)
+        c = indexes[PART_B].count(label)
         if c != 0:
             die(f"Global heading leaked in Part B: '{label}' occurrences = {c}.")
     ok("No global headings in Part B.")
 
     # b) fingerprint match of Part A blocks in Part B
-    partA_path = DIST / "PartA_Core.md"
-    if partA_path.exists():
-        partA = partA_path.read_text(encoding="utf-8")
-        blocks = extract_blocks(partA)
-        nb = {k: norm(v) for k,v in blocks.items() if v}
-        nb_partB = norm(partB)
-        leftover = [k for k, nv in nb.items() if nv and nv in nb_partB]
+    if PART_A in indexes:
+        matches = FingerprintIndex(extract_blocks(indexes[PART_A])).find(partB)
+        leftover = list(dict.fromkeys(m.key for m in matches))
         if leftover:
+            for m in matches:
+                print(f"[LEAK] '{m.key}' at dist/PartB_Blueprints.md lines {m.line}-{m.end_line} (chars {m.start}-{m.end})")
             die(f"Global block(s) from Part A still present in Part B: {leftover}.")
         ok("No Part A global blocks detected in Part B.")
     else:
@@ -123,4 +120,5 @@ def main():
     sys.exit(0)
 
 if __name__ == "__main__":
-    main()
+    with stage("validate", DIST):
+        main()
@@ -15,21 +15,17 @@ Usage:
 """
 from __future__ import annotations
 import argparse
-import hashlib
 import json
 import os
 from pathlib import Path
 import sys
 from typing import Dict, List
 
-CHUNK = 1 << 20  # 1 MiB
+from docsyn_lib import session
+from docsyn_lib.telemetry import stage
+
+ROOT = Path(__file__).resolve().parent.parent
 
-def sha256_file(path: Path) -> str:
-    h = hashlib.sha256()
-    with path.open('rb') as f:
-        for chunk in iter(lambda: f.read(CHUNK), b''):
-            h.update(chunk)
-    return h.hexdigest()
 
 def build_hash_index(roots: List[Path], ignore_hidden: bool = True) -> Dict[str, List[str]]:
     index: Dict[str, List[str]] = {}
@@ -43,7 +39,7 @@ def build_hash_index(roots: List[Path], ignore_hidden: bool = True) -> Dict[str,
             if ignore_hidden and any(part.startswith(".") for part in p.parts):
                 continue
             try:
-                digest = sha256_file(p)
+                digest = session.digest(p)
                 index.setdefault(digest, []).append(str(p))
             except Exception as e:
                 print(f"[WARN] Could not hash {p}: {e}", file=sys.stderr)
@@ -63,7 +59,7 @@ def collect_staging_files(staging: Path, skip_triage: bool = True, ignore_hidden
         files.append(p)
     return files
 
-def main():
+def main(argv=None):
     ap = argparse.ArgumentParser(description="Remove exact duplicate files from staging if they already exist in curated trees.")
     ap.add_argument("--staging", default="merge_pr/updated", help="Staging root folder (default: merge_pr/updated)")
     ap.add_argument("--curated", nargs="+", default=["blueprints", "core"], help="Curated roots to compare against (default: blueprints core)")
@@ -72,7 +68,7 @@ def main():
     ap.add_argument("--include-triage", action="store_true", help="Also clean _triage area (default: skip)")
     ap.add_argument("--no-ignore-hidden", action="store_true", help="Do not ignore hidden files/folders")
     ap.add_argument("--fail-if-leftovers", action="store_true", help="Exit non-zero if any non-duplicate files remain in staging after cleanup (useful in CI)")
-    args = ap.parse_args()
+    args = ap.parse_args(argv)
 
     # Env override: DOCSYN_RETAIN_STAGING=1 forces dry-run
     retain = os.getenv("DOCSYN_RETAIN_STAGING", "0") not in ("0", "", "false", "False", "NO", "no")
@@ -101,7 +97,7 @@ def main():
 
     for src in staging_files:
         try:
-            digest = sha256_file(src)
+            digest = session.digest(src)
             if digest in curated_index:
                 duplicates.append(str(src))
                 if args.delete:
@@ -153,5 +149,10 @@ def main():
     print(f"[INFO] Report written to {report_path}")
     raise SystemExit(exit_code)
 
+def run(argv=None) -> int:
+    with stage("clean-staging", ROOT / "dist"):
+        main(argv)
+    return 0
+
 if __name__ == "__main__":
-    main()
+    sys.exit(run())
@@ -1,121 +1,224 @@
-\
-    #!/usr/bin/env python3
-    import argparse, os, sys, json, re, shutil, subprocess, hashlib, time
-    from pathlib import Path
+#!/usr/bin/env python3
+import argparse, os, sys, json, re, shlex, shutil, subprocess, hashlib, time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+try:
+    import yaml
+except Exception:
+    yaml = None
+REPO = Path(__file__).resolve().parents[1]
+CURATOR = REPO / "curator"
+CONFIG = CURATOR / "config.yaml"
+from curator_lib.norm import paragraph_iter, heading_iter, GLOBAL_TITLES, looks_like_aqi_table
+from curator_lib.extract import VERSION as EXTRACT_VERSION, TIMEOUT_S, MEMORY_MB, extract_all, extractor_for, cache_path, load_plugins, placeholder, text_chunks
+from curator_lib.minhash import MinHashIndex, THRESHOLD as NEAR_DUP_THRESHOLD
+from curator_lib.batching import diff_loc, pack_batches
+from curator_lib.git_ops import ensure_branch, current_branch, checkout, delete_branch, discard, commit_paths, push, open_pr, run as run_cmd
+def load_config():
+    if CONFIG.exists() and yaml:
+        return yaml.safe_load(CONFIG.read_text(encoding="utf-8"))
+    return {"input_dir":"input","staging_dir":"curator/staging","diffs_dir":"curator/diffs","core_dir":"core","blueprints_dir":"blueprints","dist_dir":"dist","branch_prefix":"curator"}
+def ensure_dirs(cfg):
+    for k in ["input_dir","staging_dir","diffs_dir"]:
+        (REPO / cfg[k]).mkdir(parents=True, exist_ok=True)
+def sha256_file(p: Path) -> str:
+    h = hashlib.sha256()
+    with p.open("rb") as f:
+        for chunk in iter(lambda: f.read(8192), b""):
+            h.update(chunk)
+    return h.hexdigest()
+RACY_NS = 2_000_000_000   # an mtime this close to the last manifest write may hide a same-size edit: re-hash
+def extractor_label(p: Path):
+    ex = extractor_for(p)
+    return f"{ex.name}.v{EXTRACT_VERSION}" if ex else None
+def hash_input(p: Path, staging_dir: Path, prev: dict):
+    """(entry, unchanged): unchanged when sha256 and extractor match prev, whose extraction did not fail,
+    and the staged file is still there."""
+    st = p.stat(); sha = sha256_file(p); out_md = staging_dir / f"{p.stem}.md"
+    entry = {"path":str(p),"size":st.st_size,"mtime_ns":st.st_mtime_ns,"sha256":sha,"staged_md":str(out_md),"extractor":extractor_label(p)}
+    if (prev.get("sha256") == sha and prev.get("extractor") == entry["extractor"] and not prev.get("error")
+            and prev.get("staged_md") == str(out_md) and out_md.exists()):
+        return {**prev, **entry}, True
+    return entry, False
+def staged_chunks(p: Path, sha: str, cache_dir: Path, error: str = None):
+    ex = extractor_for(p)
+    if ex is None or error: return [placeholder(p, error)]
+    if not ex.isolated: return ex.fn(p)
+    return text_chunks(cache_path(cache_dir, sha, ex))
+def write_staged(entry: dict, chunks) -> dict:
+    """Stream front matter and extracted text to the staged file (atomically); returns the entry with generated_at."""
+    out_md = Path(entry["staged_md"]); generated_at = time.strftime('%Y-%m-%d %H:%M:%S')
+    front = ["---", "source_files:", f"  - path: {entry['path']}", f"    sha256: {entry['sha256']}", "generated_by: master-curator", f"generated_at: {generated_at}", "---", ""]
+    tmp = out_md.with_name(out_md.name + ".tmp")
+    with tmp.open("w", encoding="utf-8") as f:
+        f.write("\n".join(front))
+        for chunk in chunks:
+            f.write(chunk)
+    os.replace(tmp, out_md)
+    return {**entry, "generated_at": generated_at}
+def analyze(args):
+    cfg = load_config(); ensure_dirs(cfg)
+    input_dir = REPO / cfg["input_dir"]; staging_dir = REPO / cfg["staging_dir"]
+    manifest_path = staging_dir/"ANALYZE_MANIFEST.json"
     try:
-        import yaml
-    except Exception:
-        yaml = None
-    REPO = Path(__file__).resolve().parents[1]
-    CURATOR = REPO / "curator"
-    CONFIG = CURATOR / "config.yaml"
-    from curator_lib.norm import normalize_text, paragraph_iter, heading_iter, GLOBAL_TITLES, looks_like_aqi_table
-    from curator_lib.git_ops import ensure_branch, commit_all, open_pr, run as run_cmd
-    def load_config():
-        if CONFIG.exists() and yaml:
-            return yaml.safe_load(CONFIG.read_text(encoding="utf-8"))
-        return {"input_dir":"input","staging_dir":"curator/staging","diffs_dir":"curator/diffs","core_dir":"core","blueprints_dir":"blueprints","dist_dir":"dist","branch_prefix":"curator"}
-    def ensure_dirs(cfg):
-        for k in ["input_dir","staging_dir","diffs_dir"]:
-            (REPO / cfg[k]).mkdir(parents=True, exist_ok=True)
-    def sha256_file(p: Path) -> str:
-        h = hashlib.sha256()
-        with p.open("rb") as f:
-            for chunk in iter(lambda: f.read(8192), b""):
-                h.update(chunk)
-        return h.hexdigest()
-    def simple_extract_text(p: Path) -> str:
-        if p.suffix.lower() in [".md",".txt"]:
-            return p.read_text(encoding="utf-8", errors="ignore")
-        return f"> [Curator placeholder] Binary {p.suffix} not extracted.\\n> Path: {p}\\n"
-    def analyze(args):
-        cfg = load_config(); ensure_dirs(cfg)
-        input_dir = REPO / cfg["input_dir"]; staging_dir = REPO / cfg["staging_dir"]
-        manifest = {"inputs":[]}
-        for p in sorted(input_dir.glob("*")):
-            if p.is_file():
-                text = simple_extract_text(p); sha = sha256_file(p)
-                out_md = staging_dir / f"{p.stem}.md"
-                front = ["---", "source_files:", f"  - path: {str(p)}", f"    sha256: {sha}", "generated_by: master-curator", f"generated_at: {time.strftime('%Y-%m-%d %H:%M:%S')}", "---", ""]
-                out_md.write_text("\\n".join(front)+text, encoding="utf-8")
-                manifest["inputs"].append({"path":str(p),"sha256":sha,"staged_md":str(out_md)})
-        (staging_dir/"ANALYZE_MANIFEST.json").write_text(json.dumps(manifest, indent=2), encoding="utf-8")
-        print(f"[analyze] staged: {len(manifest['inputs'])}")
-    def plan(args):
-        cfg = load_config(); ensure_dirs(cfg)
-        staging_dir = REPO / cfg["staging_dir"]; diffs_dir = REPO / cfg["diffs_dir"]; dist_dir = REPO / cfg["dist_dir"]; blueprints_dir = REPO / cfg["blueprints_dir"]
-        partA = (dist_dir/"PartA_Core.md").read_text(encoding="utf-8") if (dist_dir/"PartA_Core.md").exists() else ""
-        def extract_blocks(md: str):
-            blocks = {}; lines = md.splitlines(); heads = list(heading_iter(md))
-            def slice_block(i,j):
-                start = heads[i][1]; end = heads[j][1]-1 if j < len(heads) else len(lines)
-                return "\\n".join(lines[start-1:end])
-            for i,(title,ln) in enumerate(heads):
-                t = re.sub(r"^\\d+\\.\\s*","",title).strip()
-                for key in ["Router — Query-Pattern Matrix","Query-Pattern Matrix","Unified Risk & Control Model","Standard Development Environment","Agent Query Index"]:
-                    if key.lower() in t.lower():
-                        blocks[key] = slice_block(i,i+1)
-            return blocks
-        global_blocks = extract_blocks(partA)
-        global_norms = {k: normalize_text(v) for k,v in global_blocks.items() if v}
-        proposals = []
-        for md in sorted(staging_dir.glob("*.md")):
-            raw = md.read_text(encoding="utf-8"); topic = md.stem.lower()
-            target_name = f"{topic}.md"
-            kept_lines=[]; skip=False
-            for line in raw.splitlines():
-                if re.match(r"^\\s*(?:>\\s*)*(?:\\\\)?#{1,3}\\s+", line):
-                    title = re.sub(r"^\\s*(?:>\\s*)*(?:\\\\)?#{1,3}\\s+","",line).strip()
-                    title = re.sub(r"^\\d+\\.\\s*","",title).strip()
-                    if any(t.lower()==title.lower() or t.lower() in title.lower() for t in GLOBAL_TITLES):
-                        skip=True; continue
-                    else:
-                        skip=False
-                if not skip: kept_lines.append(line)
-            body2 = "\\n".join(kept_lines)
-            cleaned_paras=[]; removed=[]
-            for para, ls, le in paragraph_iter(body2):
-                hit=None
-                if looks_like_aqi_table(para): hit="Agent Query Index"
+        old = json.loads(manifest_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        old = {}
+    prev = {e["path"]: e for e in old.get("inputs", []) if "path" in e}
+    trusted_before = old.get("written_ns", 0) - RACY_NS
+    plugins = cfg.get("extractor_plugins") or []; load_plugins(plugins)
+    cache_dir = staging_dir / ".cache" / "extract"
+    # Inputs sharing a stem share a staged file; the last one in path order owns it, as when staging sequentially
+    owners = {}
+    for p in sorted(input_dir.glob("*")):
+        if p.is_file():
+            owners[staging_dir / f"{p.stem}.md"] = p
+    entries, todo = {}, []
+    for out_md, p in owners.items():
+        e = prev.get(str(p), {}); st = p.stat()
+        if (e.get("size") == st.st_size and e.get("mtime_ns") == st.st_mtime_ns and st.st_mtime_ns < trusted_before
+                and e.get("extractor") == extractor_label(p) and not e.get("error")      # failed extractions are retried
+                and e.get("staged_md") == str(out_md) and out_md.exists()):
+            entries[str(p)] = e
+        else:
+            todo.append(p)
+    restaged = 0
+    if todo:
+        with ThreadPoolExecutor(max_workers=max(1, args.workers)) as pool:
+            checked = list(pool.map(lambda p: hash_input(p, staging_dir, prev.get(str(p), {})), todo))
+            entries.update((e["path"], e) for e, unchanged in checked if unchanged)
+            stale = [e for e, unchanged in checked if not unchanged]
+            # Binary formats go through the limited process pool into the sha256-keyed cache first
+            jobs = [(Path(e["path"]), e["sha256"], extractor_for(Path(e["path"]))) for e in stale]
+            errors = extract_all([j for j in jobs if j[2] and j[2].isolated], cache_dir, args.workers,
+                                 args.extract_timeout, args.extract_memory_mb, plugins)
+            def stage(e):
+                err = errors.get(e["path"])
+                return write_staged({**e, **({"error": err} if err else {})}, staged_chunks(Path(e["path"]), e["sha256"], cache_dir, err))
+            for entry in pool.map(stage, stale):
+                entries[entry["path"]] = entry; restaged += 1
+                if "error" in entry: print(f"[analyze] not extracted: {entry['path']}: {entry['error']}")
+    removed = 0
+    for path, e in prev.items():
+        out_md = Path(e.get("staged_md", ""))
+        if path not in entries and e.get("staged_md") and out_md not in owners and out_md.exists():
+            out_md.unlink(); removed += 1
+    manifest = {"written_ns": time.time_ns(), "inputs": [entries[str(p)] for p in sorted(owners.values())]}
+    tmp = manifest_path.with_name(manifest_path.name + ".tmp")
+    tmp.write_text(json.dumps(manifest, indent=2), encoding="utf-8"); os.replace(tmp, manifest_path)
+    print(f"[analyze] staged: {len(manifest['inputs'])} ({restaged} re-staged, {len(manifest['inputs'])-restaged} unchanged, {removed} removed)")
+def plan(args):
+    cfg = load_config(); ensure_dirs(cfg)
+    staging_dir = REPO / cfg["staging_dir"]; diffs_dir = REPO / cfg["diffs_dir"]; dist_dir = REPO / cfg["dist_dir"]; blueprints_dir = REPO / cfg["blueprints_dir"]
+    partA = (dist_dir/"PartA_Core.md").read_text(encoding="utf-8") if (dist_dir/"PartA_Core.md").exists() else ""
+    def extract_blocks(md: str):
+        blocks = {}; lines = md.splitlines(); heads = list(heading_iter(md))
+        def slice_block(i,j):
+            start = heads[i].line; end = heads[j].line-1 if j < len(heads) else len(lines)
+            return "\n".join(lines[start-1:end])
+        for i,h in enumerate(heads):
+            t = re.sub(r"^\d+\.\s*","",h.title).strip()
+            for key in ["Router — Query-Pattern Matrix","Query-Pattern Matrix","Unified Risk & Control Model","Standard Development Environment","Agent Query Index"]:
+                if key.lower() in t.lower():
+                    blocks[key] = slice_block(i,i+1)
+        return blocks
+    global_blocks = extract_blocks(partA)
+    index = MinHashIndex(global_blocks)
+    threshold = args.threshold if args.threshold is not None else float(cfg.get("near_dup_threshold", NEAR_DUP_THRESHOLD))
+    proposals = []
+    for md in sorted(staging_dir.glob("*.md")):
+        raw = md.read_text(encoding="utf-8"); topic = md.stem.lower()
+        target_name = f"{topic}.md"
+        kept_lines=[]; skip=False
+        for line in raw.splitlines():
+            if re.match(r"^\s*(?:>\s*)*(?:\\)?#{1,3}\s+", line):
+                title = re.sub(r"^\s*(?:>\s*)*(?:\\)?#{1,3}\s+","",line).strip()
+                title = re.sub(r"^\d+\.\s*","",title).strip()
+                if any(t.lower()==title.lower() or t.lower() in title.lower() for t in GLOBAL_TITLES):
+                    skip=True; continue
                 else:
-                    pn = normalize_text(para)
-                    for key, nv in global_norms.items():
-                        if nv and nv in pn: hit=key; break
-                if hit: removed.append({"key":hit,"line_start":ls,"line_end":le,"sample":para[:200]})
-                else: cleaned_paras.append(para)
-            cleaned = "\\n\\n".join(cleaned_paras).strip()+"\\n"
-            if not re.match(r"^\\s*(?:\\\\)?#\\s", cleaned):
-                cleaned = f"# {md.stem.title()}\\n\\n" + cleaned
-            outp = diffs_dir / f"{md.stem}.proposal.md"
-            outp.parent.mkdir(parents=True, exist_ok=True)
-            outp.write_text(cleaned, encoding="utf-8")
-            proposals.append({"staged":str(md), "proposal": str(outp), "target_blueprint": str((blueprints_dir/target_name).relative_to(REPO)), "removed_blocks": removed})
-        (diffs_dir/"PLAN.json").write_text(json.dumps({"proposals":proposals}, indent=2), encoding="utf-8")
-        print(f"[plan] proposals: {len(proposals)}")
-    def apply(args):
-        cfg = load_config(); diffs_dir = REPO / cfg["diffs_dir"]; blueprints_dir = REPO / cfg["blueprints_dir"]
-        plan_path = diffs_dir/"PLAN.json"
-        if not plan_path.exists(): print("[apply] no PLAN.json"); sys.exit(1)
-        plan = json.loads(plan_path.read_text(encoding="utf-8"))
-        branch = ensure_branch(REPO, cfg.get("branch_prefix","curator"))
-        changed=[]
-        for p in plan.get("proposals", []):
-            src = REPO / p["proposal"]; dst = REPO / p["target_blueprint"]
-            dst.parent.mkdir(parents=True, exist_ok=True); shutil.copy2(src, dst); changed.append(str(dst))
-        rc,out,err = run_cmd(["make","ci"], REPO)
-        if rc != 0: print(out); print(err, file=sys.stderr); sys.exit(2)
-        commit_all(REPO, f"curator: apply {len(changed)} proposal(s)")
-        pr_body = diffs_dir/"PR_BODY.md"
-        pr_body.write_text("Curator Agent proposals applied. See dist/VALIDATION.json and dist/LEAKAGE_REPORT.json.", encoding="utf-8")
-        title = f"curator: apply {len(changed)} proposal(s)"
-        rc,out,err = open_pr(REPO, title, pr_body, draft=True)
-        print(out or err); print("[apply] done")
-    def main():
-        ap = argparse.ArgumentParser("curator")
-        sp = ap.add_subparsers(dest="cmd", required=True)
-        sp.add_parser("analyze").set_defaults(func=analyze)
-        sp.add_parser("plan").set_defaults(func=plan)
-        sp.add_parser("apply").set_defaults(func=apply)
-        args = ap.parse_args(); args.func(args)
-    if __name__ == "__main__":
-        main()
+                    skip=False
+            if not skip: kept_lines.append(line)
+        body2 = "\n".join(kept_lines)
+        cleaned_paras=[]; removed=[]
+        for para, ls, le in paragraph_iter(body2):
+            hit, score = index.best(para, threshold)
+            if looks_like_aqi_table(para): hit = "Agent Query Index"; score = index.scores(para).get(hit, score)
+            if hit: removed.append({"key":hit,"score":round(score, 3),"line_start":ls,"line_end":le,"sample":para[:200]})
+            else: cleaned_paras.append(para)
+        cleaned = "\n\n".join(cleaned_paras).strip()+"\n"
+        if not re.match(r"^\s*(?:\\)?#\s", cleaned):
+            cleaned = f"# {md.stem.title()}\n\n" + cleaned
+        outp = diffs_dir / f"{md.stem}.proposal.md"
+        outp.parent.mkdir(parents=True, exist_ok=True)
+        outp.write_text(cleaned, encoding="utf-8")
+        proposals.append({"staged":str(md), "proposal": str(outp), "target_blueprint": str((blueprints_dir/target_name).relative_to(REPO)), "removed_blocks": removed})
+    (diffs_dir/"PLAN.json").write_text(json.dumps({"proposals":proposals}, indent=2), encoding="utf-8")
+    print(f"[plan] proposals: {len(proposals)}")
+def apply(args):
+    cfg = load_config(); diffs_dir = REPO / cfg["diffs_dir"]
+    plan_path = diffs_dir/"PLAN.json"
+    if not plan_path.exists(): print("[apply] no PLAN.json"); sys.exit(1)
+    plan = json.loads(plan_path.read_text(encoding="utf-8"))
+    items = []
+    for p in plan.get("proposals", []):
+        src = REPO / p["proposal"]; dst = REPO / p["target_blueprint"]
+        old = dst.read_text(encoding="utf-8") if dst.exists() else ""
+        loc = diff_loc(old, src.read_text(encoding="utf-8"))
+        if loc: items.append({**p, "loc": loc})
+    batches = pack_batches(items, int(cfg.get("max_files_per_pr", 6)), int(cfg.get("max_loc_per_pr", 2000)))
+    if not batches: print("[apply] nothing to apply"); return
+    # Every batch branches off the current branch and is validated on its own; a failure only drops that batch
+    base = current_branch(REPO); validate = shlex.split(cfg.get("validate_cmd", "make ci"))
+    for n, batch in enumerate(batches, 1):
+        props = batch["proposals"]
+        title = f"curator: apply {len(props)} proposal(s) ({batch['loc']} LOC, batch {n}/{len(batches)})"
+        branch = ensure_branch(REPO, cfg.get("branch_prefix","curator"), base=base, suffix=f"-{n}")
+        if branch is None:
+            batch.update(status="failed", branch=None, log="could not create the batch branch")
+            print(f"[apply] batch {n}: could not create a branch off {base}, skipped", file=sys.stderr)
+            continue
+        changed = []
+        for p in props:
+            dst = REPO / p["target_blueprint"]
+            dst.parent.mkdir(parents=True, exist_ok=True); shutil.copy2(REPO / p["proposal"], dst); changed.append(dst)
+        rc,out,err = run_cmd(validate, REPO)
+        reason = "validation failed" if rc != 0 else None
+        if reason is None and not commit_paths(REPO, changed, title):
+            reason, out, err = "commit failed", "", ""
+        if reason:
+            discard(REPO, changed); checkout(REPO, base); delete_branch(REPO, branch)
+            batch.update(status="failed", branch=None, log=(out + err)[-2000:] or reason)
+            print(f"[apply] batch {n}: {reason}, skipped ({', '.join(p['target_blueprint'] for p in props)})", file=sys.stderr)
+            continue
+        pr_body = diffs_dir/f"PR_BODY_{n}.md"
+        pr_body.write_text("Curator Agent proposals applied. See dist/VALIDATION.json and dist/LEAKAGE_REPORT.json.\n\n" +
+                           "".join(f"- `{p['target_blueprint']}`: {p['loc']} LOC, {len(p.get('removed_blocks', []))} global block(s) removed\n" for p in props),
+                           encoding="utf-8")
+        # Committed batches stay on their branch; a push or PR failure is reported, and left for a rerun by hand
+        rc,out,err = push(REPO, branch); status = "applied" if rc == 0 else "unpushed"
+        if rc == 0:
+            rc,out,err = open_pr(REPO, title, pr_body, draft=True, base=base, head=branch)
+            if rc != 0: status = "no-pr"
+        checkout(REPO, base)
+        batch.update(status=status, branch=branch, pr=(out or err).strip())
+        print(f"[apply] batch {n}: {branch} {status}: {(out or err).strip()}", file=sys.stdout if status == "applied" else sys.stderr)
+    for b in batches:
+        b["proposals"] = [{k: p[k] for k in ("target_blueprint", "proposal", "loc")} for p in b["proposals"]]
+    (diffs_dir/"BATCHES.json").write_text(json.dumps({"base": base, "batches": batches}, indent=2), encoding="utf-8")
+    applied = sum(b["status"] == "applied" for b in batches)
+    print(f"[apply] done: {applied}/{len(batches)} batch(es) applied")
+    if applied < len(batches): sys.exit(2)
+def main():
+    ap = argparse.ArgumentParser("curator")
+    sp = ap.add_subparsers(dest="cmd", required=True)
+    an = sp.add_parser("analyze"); an.set_defaults(func=analyze)
+    an.add_argument("--workers", type=int, default=min(8, os.cpu_count() or 1), help="Inputs hashed, extracted and staged in parallel")
+    an.add_argument("--extract-timeout", type=float, default=TIMEOUT_S, help="Seconds allowed per PDF/DOCX/HTML extraction (0: no limit)")
+    an.add_argument("--extract-memory-mb", type=int, default=MEMORY_MB, help="Address-space limit of each extractor worker (0: no limit)")
+    pl = sp.add_parser("plan"); pl.set_defaults(func=plan)
+    pl.add_argument("--threshold", type=float, help="Similarity at which a staged paragraph counts as a copy of a Part A global block (default: near_dup_threshold in config.yaml)")
+    sp.add_parser("apply").set_defaults(func=apply)
+    args = ap.parse_args(); args.func(args)
+if __name__ == "__main__":
+    main()
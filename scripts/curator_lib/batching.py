@@ -0,0 +1,21 @@
+import difflib
+from typing import Dict, List
+def diff_loc(old: str, new: str) -> int:
+    """Added plus removed lines between two texts, as a unified diff counts them."""
+    n = 0
+    for line in difflib.unified_diff(old.splitlines(), new.splitlines(), lineterm="", n=0):
+        if line[:1] in "+-" and not line.startswith(("+++", "---")):
+            n += 1
+    return n
+def pack_batches(items: List[Dict], max_files: int, max_loc: int) -> List[Dict]:
+    """First-fit decreasing over item["loc"]: each batch holds at most max_files items and max_loc lines.
+    An item larger than max_loc alone gets a batch of its own."""
+    batches: List[Dict] = []
+    for it in sorted(items, key=lambda it: (-it["loc"], it["target_blueprint"])):
+        for b in batches:
+            if len(b["proposals"]) < max_files and b["loc"] + it["loc"] <= max_loc:
+                b["proposals"].append(it); b["loc"] += it["loc"]
+                break
+        else:
+            batches.append({"proposals": [it], "loc": it["loc"]})
+    return batches
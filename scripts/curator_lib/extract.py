@@ -0,0 +1,279 @@
+"""
+Curator extractors: input file -> Markdown-ish text, offline and stdlib-only.
+
+An extractor is a generator of text chunks, registered for file suffixes:
+
+    @register("rtf", ".rtf")
+    def rtf_text(path): yield ...
+
+Modules listed under `extractor_plugins` in curator/config.yaml are imported
+(in analyze and in every pool worker) so they can register more. Extractors
+registered with isolated=True run in a process pool, one file per task,
+under a per-file time limit (SIGALRM) and a per-worker address-space limit
+(RLIMIT_AS); both are POSIX-only and skipped where unavailable. A worker
+that dies takes the pool down with it, so the files still pending then are
+retried in a process of their own and only the culprit fails. Their text
+is streamed to <cache_dir>/<sha256>.<name>.v<VERSION>.txt, so an input whose
+content was extracted before, under any name, is never extracted again.
+"""
+from __future__ import annotations
+import glob, html.parser, importlib, mmap, os, re, signal, zipfile, zlib
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+try:
+    import resource
+except ImportError:
+    resource = None
+VERSION = 1            # bump when an extractor's output changes, to invalidate the cache
+TIMEOUT_S = 60
+MEMORY_MB = 1024
+CHUNK = 1 << 16
+class Extractor(NamedTuple):
+    name: str
+    suffixes: Tuple[str, ...]
+    fn: Callable[[Path], Iterator[str]]
+    isolated: bool     # run in the process pool, under the limits, with a cached result
+EXTRACTORS: Dict[str, Extractor] = {}      # name -> extractor
+BY_SUFFIX: Dict[str, Extractor] = {}       # ".pdf" -> extractor; the last registration wins
+class ExtractTimeout(Exception):
+    pass
+def register(name: str, *suffixes: str, isolated: bool = True):
+    def deco(fn):
+        ex = Extractor(name, tuple(s.lower() for s in suffixes), fn, isolated)
+        EXTRACTORS[name] = ex
+        for s in ex.suffixes:
+            BY_SUFFIX[s] = ex
+        return fn
+    return deco
+def load_plugins(modules: Iterable[str]):
+    for m in modules or []:
+        importlib.import_module(m)
+def extractor_for(p: Path) -> Optional[Extractor]:
+    return BY_SUFFIX.get(p.suffix.lower())
+def cache_path(cache_dir: Path, sha: str, ex: Extractor) -> Path:
+    return cache_dir / f"{sha}.{ex.name}.v{VERSION}.txt"
+def placeholder(p: Path, reason: str = None) -> str:
+    out = f"> [Curator placeholder] Binary {p.suffix} not extracted.\n> Path: {p}\n"
+    return out + (f"> Reason: {reason}\n" if reason else "")
+
+# --- extractors -------------------------------------------------------------
+@register("text", ".md", ".txt", isolated=False)
+def text_chunks(p: Path):
+    with p.open(encoding="utf-8", errors="ignore") as f:
+        for chunk in iter(lambda: f.read(CHUNK), ""):
+            yield chunk
+
+class _Blocks:
+    """Text with paragraph breaks that never pile up beyond one blank line."""
+    def __init__(self):
+        self.parts: List[str] = []; self.newlines = 2
+    def text(self, s: str):
+        if s:
+            self.parts.append(s); self.newlines = 0
+    def brk(self, n: int = 2):
+        if n > self.newlines:
+            self.parts.append("\n" * (n - self.newlines)); self.newlines = n
+    def take(self) -> str:
+        out = "".join(self.parts); self.parts = []
+        return out
+
+class _HTMLText(html.parser.HTMLParser):
+    BLOCK = {"p", "div", "section", "article", "table", "tr", "ul", "ol", "blockquote", "pre", "hr", "header", "footer"}
+    SKIP = {"script", "style", "head", "noscript", "template"}
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.out = _Blocks(); self.skip = 0; self.pre = 0
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP: self.skip += 1
+        elif re.fullmatch(r"h[1-6]", tag): self.out.brk(); self.out.text("#" * int(tag[1]) + " ")
+        elif tag == "li": self.out.brk(1); self.out.text("- ")
+        elif tag == "br": self.out.brk(1)
+        elif tag in ("td", "th"): self.out.text(" | ")
+        elif tag in self.BLOCK: self.out.brk()
+        if tag == "pre": self.pre += 1
+    def handle_endtag(self, tag):
+        if tag in self.SKIP: self.skip = max(0, self.skip - 1)
+        elif re.fullmatch(r"h[1-6]", tag) or tag in self.BLOCK: self.out.brk()
+        elif tag == "li": self.out.brk(1)
+        if tag == "pre": self.pre = max(0, self.pre - 1)
+    def handle_data(self, data):
+        if self.skip: return
+        if self.pre:
+            self.out.text(data); return
+        text = re.sub(r"\s+", " ", data)
+        if self.out.newlines: text = text.lstrip()
+        self.out.text(text)
+
+@register("html", ".html", ".htm")
+def html_chunks(p: Path):
+    parser = _HTMLText()
+    with p.open(encoding="utf-8", errors="ignore") as f:
+        for chunk in iter(lambda: f.read(CHUNK), ""):
+            parser.feed(chunk)
+            yield parser.out.take()
+    parser.close(); parser.out.brk(1)
+    yield parser.out.take()
+
+W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+@register("docx", ".docx")
+def docx_chunks(p: Path):
+    # word/document.xml is parsed incrementally; each finished paragraph is emitted and freed
+    with zipfile.ZipFile(p) as z, z.open("word/document.xml") as xml:
+        runs: List[str] = []; level = 0; bullet = False
+        for event, el in ET.iterparse(xml, events=("end",)):
+            tag = el.tag
+            if tag == W + "t": runs.append(el.text or "")
+            elif tag == W + "tab": runs.append("\t")
+            elif tag in (W + "br", W + "cr"): runs.append("\n")
+            elif tag == W + "pStyle":
+                style = el.get(W + "val", "")
+                m = re.fullmatch(r"(?i)heading\s*([1-6])", style)
+                level = int(m.group(1)) if m else 1 if style.lower() == "title" else level
+            elif tag == W + "numPr": bullet = True
+            elif tag == W + "p":
+                text = "".join(runs).strip()
+                if text:
+                    prefix = "#" * level + " " if level else "- " if bullet else ""
+                    yield prefix + text + "\n\n"
+                runs = []; level = 0; bullet = False
+                el.clear()
+            elif tag == W + "tbl": el.clear()
+
+_PDF_STREAM = re.compile(rb"stream\r?\n")
+_PDF_TOKEN = re.compile(rb"\((?:\\.|[^\\()]|\((?:\\.|[^\\()])*\))*\)|<[0-9A-Fa-f\s]*>|\[|\]|-?\d*\.?\d+|/[^\s/\[\]()<>]+|[A-Za-z'\"*]+", re.S)
+_PDF_ESC = {b"n": b"\n", b"r": b"\r", b"t": b"\t", b"b": b"\b", b"f": b"\f"}
+def _pdf_literal(tok: bytes) -> bytes:
+    def esc(m):
+        c = m.group(1)
+        if c[:1].isdigit(): return bytes([int(c, 8) & 0xFF])
+        if c in (b"\n", b"\r\n", b"\r"): return b""
+        return _PDF_ESC.get(c, c)
+    return re.sub(rb"\\([0-7]{1,3}|\r\n|.)", esc, tok[1:-1], flags=re.S)
+def _pdf_string(tok: bytes) -> str:
+    if tok[:1] == b"(":
+        raw = _pdf_literal(tok)
+    else:
+        hexits = re.sub(rb"\s", b"", tok[1:-1]).decode()
+        raw = bytes.fromhex(hexits + "0" * (len(hexits) % 2))
+    if raw[:2] == b"\xfe\xff": return raw[2:].decode("utf-16-be", errors="ignore")
+    return raw.decode("latin-1")
+def _pdf_inflate(data: bytes) -> bytes:
+    # Bounded steps keep the time limit responsive on large or hostile streams
+    d, out = zlib.decompressobj(), []
+    while data:
+        chunk = d.decompress(data, 1 << 20); data = d.unconsumed_tail; out.append(chunk)
+        if not chunk: break
+    out.append(d.flush())
+    return b"".join(out)
+def _pdf_text(content: bytes) -> str:
+    out, operands, line = [], [], []
+    def flush():
+        if line: out.append("".join(line).rstrip()); line.clear()
+    for tok in _PDF_TOKEN.findall(content):
+        if tok[:1] in (b"(", b"<", b"[", b"]", b"/") or tok[:1].isdigit() or tok[:1] in (b"-", b"."):
+            operands.append(tok); continue
+        if tok in (b"Tj", b"'", b'"'):
+            if tok != b"Tj": flush()
+            line.extend(_pdf_string(t) for t in operands[-1:] if t[:1] in (b"(", b"<"))
+        elif tok == b"TJ":
+            for t in operands:
+                if t[:1] in (b"(", b"<"): line.append(_pdf_string(t))
+                elif t[:1] not in (b"[", b"]", b"/") and float(t) < -200: line.append(" ")   # kerning wide enough to be a word gap
+        elif tok in (b"T*", b"ET"): flush()
+        elif tok in (b"Td", b"TD") and len(operands) >= 2 and float(operands[-1]) != 0: flush()
+        operands = []
+    flush()
+    return "\n".join(l for l in out if l.strip())
+@register("pdf", ".pdf")
+def pdf_chunks(p: Path):
+    # Text-showing operators of every uncompressed or Flate content stream, in file order;
+    # fonts without a standard encoding (e.g. Identity-H CID fonts) are not decoded
+    with p.open("rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        for m in _PDF_STREAM.finditer(data):
+            head = data[max(0, m.start() - 1024):m.start()]
+            head = head[head.rfind(b"obj"):]      # this stream's dictionary, nested ones included
+            end = data.find(b"endstream", m.end())
+            if end < 0: break
+            if re.search(rb"/(?:Subtype\s*/Image|Type\s*/(?:XRef|ObjStm)|Length[123])\b", head): continue
+            filters = re.findall(rb"/(\w+Decode)\b", head)
+            if filters not in ([], [b"FlateDecode"]): continue
+            body = data[m.end():end]
+            try:
+                body = _pdf_inflate(body) if filters else body
+            except zlib.error:
+                continue
+            if b"BT" in body:
+                text = _pdf_text(body)
+                if text: yield text + "\n\n"
+
+# --- process pool -----------------------------------------------------------
+def _on_alarm(signum, frame):
+    raise ExtractTimeout()
+def _init_worker(memory_mb: int, plugins: List[str]):
+    load_plugins(plugins)
+    if resource and memory_mb:
+        limit = memory_mb << 20
+        resource.setrlimit(resource.RLIMIT_AS, (limit, resource.getrlimit(resource.RLIMIT_AS)[1]))
+    if hasattr(signal, "setitimer"):
+        signal.signal(signal.SIGALRM, _on_alarm)
+def _extract(name: str, src: str, dst: str, timeout: float) -> Optional[str]:
+    """Stream one extraction to dst (atomically); returns an error message or None."""
+    tmp = Path(dst + f".{os.getpid()}.tmp")
+    timed = timeout and hasattr(signal, "setitimer")
+    try:
+        if timed: signal.setitimer(signal.ITIMER_REAL, timeout)
+        with tmp.open("w", encoding="utf-8") as f:
+            for chunk in EXTRACTORS[name].fn(Path(src)):
+                f.write(chunk)
+        os.replace(tmp, dst)
+        return None
+    except ExtractTimeout:
+        return f"{name} extractor exceeded {timeout:g}s"
+    except MemoryError:
+        return f"{name} extractor exceeded the memory limit"
+    except Exception as e:
+        return f"{name} extractor failed: {type(e).__name__}: {e}"
+    finally:
+        if timed: signal.setitimer(signal.ITIMER_REAL, 0)
+        tmp.unlink(missing_ok=True)
+def extract_all(jobs: List[Tuple[Path, str, Extractor]], cache_dir: Path, workers: int, timeout: float = TIMEOUT_S,
+                memory_mb: int = MEMORY_MB, plugins: List[str] = ()) -> Dict[str, Optional[str]]:
+    """Extract (path, sha256, extractor) jobs missing from the cache; returns path -> error (None when cached)."""
+    results: Dict[str, Optional[str]] = {}; todo = {}
+    for p, sha, ex in jobs:
+        dst = cache_path(cache_dir, sha, ex)
+        if dst.exists(): results[str(p)] = None
+        else: todo.setdefault(str(dst), (p, ex))       # identical content is extracted once
+    if not todo:
+        return results
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    errors: Dict[str, Optional[str]] = {}; retry = []
+    with ProcessPoolExecutor(max_workers=max(1, min(workers, len(todo))), initializer=_init_worker,
+                             initargs=(memory_mb, list(plugins))) as pool:
+        futures = {dst: pool.submit(_extract, ex.name, str(p), dst, timeout) for dst, (p, ex) in todo.items()}
+        for dst, fut in futures.items():
+            try:
+                errors[dst] = fut.result()
+            except BrokenProcessPool:
+                retry.append(dst)
+    if retry:
+        # A worker that dies breaks the shared pool for every pending file: retry those in a process each
+        def alone(dst):
+            p, ex = todo[dst]
+            with ProcessPoolExecutor(max_workers=1, initializer=_init_worker, initargs=(memory_mb, list(plugins))) as solo:
+                try:
+                    return solo.submit(_extract, ex.name, str(p), dst, timeout).result()
+                except BrokenProcessPool:
+                    return f"{ex.name} extractor worker died"
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(retry)))) as threads:
+            errors.update(zip(retry, threads.map(alone, retry)))
+        for dst in retry:      # partial output of the workers that died
+            for tmp in Path(dst).parent.glob(glob.escape(Path(dst).name) + ".*.tmp"):
+                tmp.unlink(missing_ok=True)
+    for p, sha, ex in jobs:
+        dst = str(cache_path(cache_dir, sha, ex))
+        if dst in errors: results[str(p)] = errors[dst]
+    return results
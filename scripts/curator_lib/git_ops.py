@@ -1,19 +1,43 @@
-\
-    import subprocess, time
-    from pathlib import Path
-    def run(cmd, cwd=None):
+import subprocess, time
+from pathlib import Path
+def run(cmd, cwd=None):
+    try:
         p = subprocess.run(cmd, cwd=str(cwd) if cwd else None, text=True, capture_output=True)
-        return p.returncode, p.stdout, p.stderr
-    def ensure_branch(repo_root: Path, name: str):
-        ts = time.strftime("%Y%m%d-%H%M%S")
-        branch = f"{name}-{ts}"
-        run(["git", "checkout", "-b", branch], repo_root)
-        return branch
-    def commit_all(repo_root: Path, msg: str):
-        run(["git", "add", "-A"], repo_root)
-        rc, out, err = run(["git", "commit", "-m", msg], repo_root)
-        return rc == 0
-    def open_pr(repo_root: Path, title: str, body_path: Path, draft: bool = True):
-        draft_flag = ["--draft"] if draft else []
-        cmd = ["gh", "pr", "create", "--title", title, "--body-file", str(body_path)] + draft_flag
-        return run(cmd, repo_root)
+    except FileNotFoundError as e:
+        return 127, "", str(e)
+    return p.returncode, p.stdout, p.stderr
+def current_branch(repo_root: Path) -> str:
+    rc, out, err = run(["git", "rev-parse", "--abbrev-ref", "HEAD"], repo_root)
+    return out.strip()
+def ensure_branch(repo_root: Path, name: str, base: str = None, suffix: str = ""):
+    ts = time.strftime("%Y%m%d-%H%M%S")
+    branch = f"{name}-{ts}{suffix}"
+    rc, out, err = run(["git", "checkout", "-b", branch] + ([base] if base else []), repo_root)
+    return branch if rc == 0 and current_branch(repo_root) == branch else None
+def checkout(repo_root: Path, branch: str):
+    rc, out, err = run(["git", "checkout", branch], repo_root)
+    return rc == 0
+def delete_branch(repo_root: Path, branch: str):
+    run(["git", "branch", "-D", branch], repo_root)
+def discard(repo_root: Path, paths):
+    # Unstaged first; then tracked files go back to HEAD and files HEAD does not have are removed
+    run(["git", "reset", "-q", "--"] + [str(p) for p in paths], repo_root)
+    for p in paths:
+        rc, out, err = run(["git", "checkout", "HEAD", "--", str(p)], repo_root)
+        if rc != 0:
+            Path(p).unlink(missing_ok=True)
+def commit_all(repo_root: Path, msg: str):
+    run(["git", "add", "-A"], repo_root)
+    rc, out, err = run(["git", "commit", "-m", msg], repo_root)
+    return rc == 0
+def commit_paths(repo_root: Path, paths, msg: str):
+    run(["git", "add", "--"] + [str(p) for p in paths], repo_root)
+    rc, out, err = run(["git", "commit", "-m", msg, "--"] + [str(p) for p in paths], repo_root)
+    return rc == 0
+def push(repo_root: Path, branch: str):
+    return run(["git", "push", "-u", "origin", branch], repo_root)
+def open_pr(repo_root: Path, title: str, body_path: Path, draft: bool = True, base: str = None, head: str = None):
+    draft_flag = ["--draft"] if draft else []
+    cmd = ["gh", "pr", "create", "--title", title, "--body-file", str(body_path)] + draft_flag
+    cmd += (["--base", base] if base else []) + (["--head", head] if head else [])
+    return run(cmd, repo_root)
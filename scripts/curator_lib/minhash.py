@@ -0,0 +1,55 @@
+"""
+Near-duplicate lookup of the Part A global blocks in staged paragraphs.
+
+Texts are normalized like normalize_text() and cut into SHINGLE-byte
+shingles. Each block keeps a bottom-k MinHash sketch: the SKETCH smallest
+hashes of its shingles, or all of them when it has fewer. The sketch hashes
+are kept in one inverted index, hash -> blocks.
+
+A paragraph's score for a block estimates how much of the block it
+contains: the share of the block's sketch found among the paragraph's
+shingles. A paragraph that contains a block verbatim, as the old substring
+test required, scores 1.0. A lightly edited copy scores a little less.
+Scoring hashes each paragraph shingle once and looks it up once, so the
+cost is linear in the paragraph's length whatever the number of blocks.
+"""
+from __future__ import annotations
+import heapq, zlib
+from typing import Dict, List, Optional, Set, Tuple
+from curator_lib.norm import normalize_text
+SHINGLE = 8
+SKETCH = 128
+THRESHOLD = 0.7
+def shingles(norm: str, size: int = SHINGLE) -> Set[int]:
+    b = norm.encode("utf-8")
+    if len(b) <= size:
+        return {zlib.crc32(b)} if b else set()
+    return {zlib.crc32(b[i:i+size]) for i in range(len(b) - size + 1)}
+class MinHashIndex:
+    def __init__(self, blocks: Dict[str, str], shingle: int = SHINGLE, sketch: int = SKETCH):
+        """blocks: key -> raw block text; empty blocks are ignored, key order breaks score ties."""
+        self.shingle = shingle
+        self.sketches: Dict[str, List[int]] = {}
+        self.owners: Dict[int, List[str]] = {}
+        for key, text in blocks.items():
+            sk = heapq.nsmallest(sketch, shingles(normalize_text(text or ""), shingle))
+            if sk:
+                self.sketches[key] = sk
+                for h in sk:
+                    self.owners.setdefault(h, []).append(key)
+    def __bool__(self):
+        return bool(self.sketches)
+    def scores(self, text: str) -> Dict[str, float]:
+        """Estimated share of each block contained in text; blocks with no shared shingle are left out."""
+        hits: Dict[str, int] = {}
+        for h in shingles(normalize_text(text), self.shingle):
+            for key in self.owners.get(h, ()):
+                hits[key] = hits.get(key, 0) + 1
+        return {key: n / len(self.sketches[key]) for key, n in hits.items()}
+    def best(self, text: str, threshold: float = THRESHOLD) -> Tuple[Optional[str], float]:
+        """The highest-scoring block at or above threshold (first in block order on ties), or (None, best score)."""
+        scores = self.scores(text)
+        if not scores:
+            return None, 0.0
+        key = max(self.sketches, key=lambda k: scores.get(k, 0.0))
+        return (key if scores[key] >= threshold else None), scores[key]
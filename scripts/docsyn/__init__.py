@@ -0,0 +1,99 @@
+"""
+DocSyn — the build pipeline as one importable package.
+
+`python3 scripts/docsyn ci` runs the stages that `make ci` chains as separate
+interpreters (clean-staging, lift, assemble, router-test, qa) in a single
+process; `docsyn` adds promotion in front, like `make docsyn`. Each stage is
+the script's own `run(argv) -> int` entry point with the arguments the Make
+recipe passes, so output and artifacts are the same as the Make chain, and
+the pipeline stops at the first stage that exits non-zero.
+
+Stage modules are imported only when their stage runs, and the stages share
+a docsyn_lib.session.Session (file bytes, hash memos) so later stages do not
+re-read or re-hash what earlier ones already did. Per-stage import time is
+part of the summary; `--importtime` adds a module-level breakdown in the
+format of `python -X importtime`.
+"""
+from __future__ import annotations
+import importlib
+import sys
+import time
+import traceback
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+ROOT = Path(__file__).resolve().parents[2]
+SCRIPTS = ROOT / "scripts"
+
+
+class Stage(NamedTuple):
+    name: str
+    module: str
+    argv: Tuple[str, ...] = ()
+
+
+STAGES: Dict[str, Stage] = {s.name: s for s in [
+    Stage("promote", "promote_updated"),
+    Stage("clean-staging", "clean_staging_duplicates", ("--delete", "--fail-if-leftovers")),
+    Stage("lift", "lift_code_blocks", ("check",)),
+    Stage("assemble", "assemble_ssot"),
+    Stage("router-test", "router_smoke_test"),
+    Stage("qa", "qa_build"),
+]}
+
+PIPELINES: Dict[str, List[str]] = {
+    "ci": ["clean-staging", "lift", "assemble", "router-test", "qa"],
+    "docsyn": ["promote", "clean-staging", "lift", "assemble", "router-test", "qa"],
+}
+
+
+class StageResult(NamedTuple):
+    name: str
+    exit: int
+    import_s: float
+    run_s: float
+
+
+def _exit_code(code) -> int:
+    if code is None:
+        return 0
+    return code if isinstance(code, int) else 1
+
+
+def run_stage(stage: Stage, extra: Sequence[str] = ()) -> StageResult:
+    t0 = time.perf_counter()
+    module = importlib.import_module(stage.module)
+    t1 = time.perf_counter()
+    try:
+        code = _exit_code(module.run([*stage.argv, *extra]))
+    except SystemExit as e:
+        code = _exit_code(e.code)
+    except Exception:
+        traceback.print_exc()
+        code = 1
+    sys.stdout.flush()
+    return StageResult(stage.name, code, round(t1 - t0, 4), round(time.perf_counter() - t1, 4))
+
+
+def run(names: Sequence[str], extra: Optional[Dict[str, Sequence[str]]] = None) -> List[StageResult]:
+    """Run stages in order inside one Session; stops after the first failing stage.
+
+    Like the Make targets, this expects the project root as working directory.
+    The whole run is recorded as the "docsyn" stage in BUILD_METRICS.json.
+    """
+    if str(SCRIPTS) not in sys.path:
+        sys.path.insert(0, str(SCRIPTS))
+    from docsyn_lib.session import session
+    from docsyn_lib.telemetry import stage
+
+    results: List[StageResult] = []
+    with stage("docsyn", ROOT / "dist") as metrics:
+        with session(ROOT) as shared:
+            for name in names:
+                results.append(run_stage(STAGES[name], (extra or {}).get(name, ())))
+                if results[-1].exit:
+                    break
+        metrics.exit = results[-1].exit if results else 0
+        metrics.note(stages={r.name: {"exit": r.exit, "import_s": r.import_s, "run_s": r.run_s} for r in results},
+                     session=shared.stats())
+    return results
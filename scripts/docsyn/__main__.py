@@ -0,0 +1,111 @@
+"""
+Usage:
+  python3 scripts/docsyn [docsyn|ci|STAGE ...] [--arg STAGE=ARG ...] [--importtime]
+  python3 scripts/docsyn graph [STAGE ...] [-j N] [--force STAGE] [--list]
+  PYTHONPATH=scripts python3 -m docsyn ci
+
+Runs the named pipelines or stages in one process (default: docsyn, i.e.
+promote + ci) and prints a per-stage summary. --arg passes an extra argument
+to one stage (e.g. --arg assemble=--stream, --arg qa=--paranoid).
+--importtime also prints the import cost of the stage modules as a fresh
+interpreter pays it, in `python -X importtime` format (microseconds).
+
+`graph` runs the dependency-aware build instead (docsyn/graph.py): every
+stage including consolidate, validate, metrics, the curation index and the
+manifest guard, skipping the ones whose inputs are unchanged and running
+independent ones in parallel.
+"""
+from __future__ import annotations
+import argparse
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+if __package__ in (None, ""):   # run as `python3 scripts/docsyn`
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from docsyn import PIPELINES, ROOT, SCRIPTS, STAGES, run
+
+IMPORTTIME_TOP = 20
+
+
+def expand(targets):
+    names = []
+    for t in targets:
+        for name in PIPELINES.get(t, [t]):
+            if name not in names:
+                names.append(name)
+    return names
+
+
+def importtime_report(names, top: int = IMPORTTIME_TOP) -> str:
+    """Import the stage modules in a fresh interpreter under -X importtime; the costliest imports."""
+    modules = ", ".join(STAGES[n].module for n in names)
+    code = f"import sys; sys.path.insert(0, {str(SCRIPTS)!r}); import {modules}"
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                          cwd=ROOT, capture_output=True, text=True)
+    rows = []
+    for line in proc.stderr.splitlines():
+        parts = line[len("import time:"):].split("|") if line.startswith("import time:") else []
+        if len(parts) == 3 and parts[0].strip().isdigit():
+            rows.append((int(parts[0]), int(parts[1]), parts[2].rstrip()))
+    total = sum(r[0] for r in rows)
+    lines = ["import time: self [us] | cumulative | imported package"]
+    for self_us, cum_us, name in sorted(rows, key=lambda r: -r[1])[:top]:
+        lines.append(f"import time: {self_us:>9} | {cum_us:>10} | {name}")
+    lines.append(f"[importtime] {len(rows)} modules, {total / 1000:.1f} ms total")
+    return "\n".join(lines)
+
+
+def main(argv=None) -> int:
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if argv[:1] == ["graph"]:
+        from docsyn.graph import main as graph_main
+        return graph_main(argv[1:])
+
+    ap = argparse.ArgumentParser(prog="docsyn", description="Run the DocSyn pipeline in a single process.")
+    ap.add_argument("targets", nargs="*", default=["docsyn"],
+                    help=f"Pipelines ({', '.join(PIPELINES)}) or stages ({', '.join(STAGES)})")
+    ap.add_argument("--arg", action="append", default=[], metavar="STAGE=ARG",
+                    help="Extra argument for one stage (repeatable)")
+    ap.add_argument("--importtime", action="store_true", help="Report per-module import cost of the stages")
+    ap.add_argument("--list", action="store_true", help="List pipelines and stages, then exit")
+    args = ap.parse_args(argv)
+
+    if args.list:
+        for name, stages in PIPELINES.items():
+            print(f"{name}: {' '.join(stages)}")
+        for stage in STAGES.values():
+            print(f"  {stage.name:<14} scripts/{stage.module}.py {' '.join(stage.argv)}".rstrip())
+        return 0
+
+    unknown = [t for t in args.targets if t not in PIPELINES and t not in STAGES]
+    if unknown:
+        ap.error(f"unknown target(s): {', '.join(unknown)}")
+    extra = {}
+    for item in args.arg:
+        name, sep, value = item.partition("=")
+        if not sep or name not in STAGES:
+            ap.error(f"--arg expects STAGE=ARG with a known stage, got {item!r}")
+        extra.setdefault(name, []).append(value)
+
+    names = expand(args.targets)
+    os.chdir(ROOT)
+    results = run(names, extra)
+
+    print()
+    for r in results:
+        print(f"[docsyn] {r.name:<14} exit {r.exit}  run {r.run_s:.3f}s  import {r.import_s * 1000:.1f} ms")
+    skipped = names[len(results):]
+    if skipped:
+        print(f"[docsyn] not run after failure: {', '.join(skipped)}")
+    print(f"[docsyn] {len(results)}/{len(names)} stages in one process: "
+          f"run {sum(r.run_s for r in results):.2f}s, imports {sum(r.import_s for r in results) * 1000:.1f} ms")
+    if args.importtime:
+        print(importtime_report(names))
+    return next((r.exit for r in results if r.exit), 0)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,340 @@
+"""
+DocSyn — the build as a dependency graph of stages.
+
+Every Node declares what it reads and writes, as paths or fnmatch globs
+relative to the project root:
+- inputs: the files whose content the stage depends on,
+- config: code and configuration (docsyn_lib, the manifest); the node's
+  script (argv[0]) and the rest of its argv are part of its configuration too,
+- outputs: the artifacts it writes (a glob for stages that edit sources).
+Edges are inferred: a node depends on every node with an output matching
+one of its inputs or config. `after` adds ordering-only edges for gates,
+e.g. assembly waits for clean-staging and the code-lift check like it does
+in `make ci`.
+
+The executor hashes a node's inputs and config (through a HashMemo, so
+unchanged files are not re-read) once its dependencies have finished, and
+skips it when the key matches its last successful run and the outputs it
+owns are unchanged since then. Files a node writes itself are not part of
+its key. When two nodes write the same artifact (assembly and consolidate
+both write dist/PartB_Blueprints.md) the later one owns it and runs again
+whenever the earlier one does. Ready nodes run in parallel as subprocesses;
+a failing node blocks only its dependents. The summary ends with the
+critical path: the chain of dependencies with the longest run time.
+"""
+from __future__ import annotations
+import argparse
+import fnmatch
+import glob
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+from docsyn import ROOT, SCRIPTS
+
+STATE_VERSION = 1
+LIB = "scripts/docsyn_lib/*.py"
+MANIFEST = "build.manifest.json"
+SOURCES = ("blueprints/*.md", "core/*.md")
+STAGING = "merge_pr/updated/*.md"
+
+
+class Node(NamedTuple):
+    name: str
+    argv: Tuple[str, ...]                # argv[0] is the script, relative to the root
+    inputs: Tuple[str, ...] = ()
+    outputs: Tuple[str, ...] = ()
+    config: Tuple[str, ...] = ()
+    after: Tuple[str, ...] = ()
+    stdout: Optional[str] = None         # file that receives the stage's stdout, like `| tee`
+
+
+NODES: List[Node] = [
+    Node("promote", ("scripts/promote_updated.py",),
+         inputs=(STAGING,), outputs=(*SOURCES, "dist/PROMOTION_REPORT.json"), config=(LIB,)),
+    Node("curation-index", ("scripts/tools/gen_curation_index.py", "--manifest", MANIFEST, "--root", "."),
+         inputs=SOURCES, outputs=("core/95-curation-index.md",), config=(MANIFEST, LIB)),
+    Node("manifest-guard", ("scripts/tools/manifest_guard.py", "--manifest", MANIFEST, "--root", "."),
+         inputs=SOURCES, config=(MANIFEST, LIB)),
+    Node("clean-staging", ("scripts/clean_staging_duplicates.py", "--delete", "--fail-if-leftovers"),
+         inputs=(STAGING, *SOURCES), outputs=("dist/CLEAN_STAGING_REPORT.json",), config=(LIB,)),
+    Node("lift", ("scripts/lift_code_blocks.py", "check"), inputs=SOURCES, config=(LIB,)),
+    Node("assemble", ("scripts/assemble_ssot.py",),
+         inputs=SOURCES,
+         outputs=("dist/DocSyn_Compiled.md", "dist/DocSyn_Compiled.index.json", "dist/PartA_Core.md",
+                  "dist/PartB_Blueprints.md", "dist/BUILD_RECORD.json", "dist/BUILD_REPORT.txt"),
+         config=(MANIFEST, LIB), after=("clean-staging", "lift")),
+    Node("router-test", ("scripts/router_smoke_test.py",), inputs=("core/00-router.md", "blueprints/*.md"), config=(LIB,)),
+    Node("qa", ("scripts/qa_build.py",),
+         inputs=(*SOURCES, "dist/DocSyn_Compiled.md", "dist/BUILD_RECORD.json", "tests/BASELINE_SHA256"),
+         outputs=("dist/QA_SUMMARY.txt", "dist/QA_REPORT.json"), config=(LIB,)),
+    Node("consolidate", ("scripts/ci_consolidate.py",),
+         inputs=("dist/PartA_Core.md", "blueprints/*.md"),
+         outputs=("dist/PartB_Blueprints.md", "dist/SSOT.md", "SSOT.md", "dist/LEAKAGE_REPORT.json",
+                  "dist/VALIDATION.json"),
+         config=(LIB,)),
+    Node("validate", ("scripts/ci_validate.py",),
+         inputs=("dist/DocSyn_Compiled.md", "dist/PartA_Core.md", "dist/PartB_Blueprints.md", "blueprints/*.md", STAGING),
+         outputs=("dist/HEADING_INDEX.json",), config=(LIB,)),
+    Node("metrics", ("scripts/tools/compiled_metrics.py", "--input", "dist/DocSyn_Compiled.md", "--manifest", MANIFEST),
+         inputs=("dist/DocSyn_Compiled.md",), outputs=("dist/METRICS.txt",), config=(MANIFEST,),
+         stdout="dist/METRICS.txt"),
+]
+
+
+class NodeResult(NamedTuple):
+    name: str
+    status: str        # "ran", "up-to-date", "failed" or "blocked"
+    exit: int
+    seconds: float
+
+
+def _overlap(a: str, b: str) -> bool:
+    return a == b or fnmatch.fnmatchcase(a, b) or fnmatch.fnmatchcase(b, a)
+
+
+def dependencies(nodes: Sequence[Node]) -> Dict[str, List[str]]:
+    """Each node's direct dependencies: writers of what it reads, plus its `after` gates."""
+    names = {n.name for n in nodes}
+    deps: Dict[str, List[str]] = {}
+    for node in nodes:
+        reads = (*node.inputs, *node.config)
+        found = [o.name for o in nodes
+                 if o.name != node.name and any(_overlap(w, r) for w in o.outputs for r in reads)]
+        for gate in node.after:
+            if gate not in names:
+                raise ValueError(f"{node.name}: unknown stage in after: {gate}")
+            if gate not in found:
+                found.append(gate)
+        deps[node.name] = found
+    return deps
+
+
+def topo_order(nodes: Sequence[Node], deps: Dict[str, List[str]]) -> List[Node]:
+    """Nodes in dependency order, ties broken by declaration order; ValueError on a cycle."""
+    order: List[Node] = []
+    done: Set[str] = set()
+    remaining = list(nodes)
+    while remaining:
+        ready = [n for n in remaining if all(d in done for d in deps[n.name])]
+        if not ready:
+            raise ValueError(f"dependency cycle among: {', '.join(n.name for n in remaining)}")
+        for n in ready:
+            order.append(n)
+            done.add(n.name)
+            remaining.remove(n)
+    return order
+
+
+def _ancestors(name: str, deps: Dict[str, List[str]]) -> Set[str]:
+    seen: Set[str] = set()
+    stack = [name]
+    while stack:
+        for d in deps[stack.pop()]:
+            if d not in seen:
+                seen.add(d)
+                stack.append(d)
+    return seen
+
+
+def owners(order: Sequence[Node], deps: Dict[str, List[str]]) -> Tuple[Dict[str, str], Dict[str, Set[str]]]:
+    """Concrete output path -> the node that writes it last, and node -> later co-writers.
+
+    Writers of the same path must be ordered by the graph; otherwise which
+    content wins would depend on scheduling.
+    """
+    owner: Dict[str, str] = {}
+    cowriters: Dict[str, Set[str]] = {n.name: set() for n in order}
+    for node in order:
+        for out in node.outputs:
+            if glob.has_magic(out):
+                continue
+            prev = owner.get(out)
+            if prev is not None:
+                if prev not in _ancestors(node.name, deps):
+                    raise ValueError(f"{out} is written by both {prev} and {node.name}, which are not ordered")
+                cowriters[prev].add(node.name)
+            owner[out] = node.name
+    return owner, cowriters
+
+
+def select(nodes: Sequence[Node], deps: Dict[str, List[str]], targets: Sequence[str]) -> List[Node]:
+    """The targets and everything they depend on (all nodes when no targets are given)."""
+    if not targets:
+        return list(nodes)
+    keep = set(targets)
+    for t in targets:
+        keep |= _ancestors(t, deps)
+    return [n for n in nodes if n.name in keep]
+
+
+class Graph:
+    def __init__(self, nodes: Sequence[Node], root: Path = ROOT) -> None:
+        from docsyn_lib.cache import HashMemo, load_json
+        self.root = Path(root).resolve()
+        self.nodes = list(nodes)
+        self.deps = dependencies(self.nodes)
+        self.order = topo_order(self.nodes, self.deps)
+        self.owner, self.cowriters = owners(self.order, self.deps)
+        self.cache_dir = self.root / "dist" / ".cache" / "graph"
+        self.memo = HashMemo(self.cache_dir / "HASHES.json")
+        data = load_json(self.cache_dir / "STATE.json", {})
+        self.state: Dict[str, dict] = data.get("nodes", {}) if data.get("version") == STATE_VERSION else {}
+
+    def _files(self, pattern: str) -> List[Path]:
+        if glob.has_magic(pattern):
+            return sorted(p for p in self.root.glob(pattern) if p.is_file())
+        return [self.root / pattern]
+
+    def _digest(self, p: Path) -> str:
+        return self.memo.sha256(p) or "-"
+
+    def key(self, node: Node) -> str:
+        """Content hash of the node's inputs, config and script, leaving out files it writes itself."""
+        from docsyn_lib.cache import BuildCache
+        parts = [STATE_VERSION, *node.argv, str(node.stdout)]
+        for pattern in sorted({*node.inputs, *node.config, node.argv[0]}):
+            parts.append(pattern)
+            for p in self._files(pattern):
+                rel = p.relative_to(self.root).as_posix()
+                if any(_overlap(out, rel) for out in node.outputs):
+                    continue
+                parts += [rel, self._digest(p)]
+        return BuildCache.key(str(part) for part in parts)
+
+    def owned(self, node: Node) -> List[str]:
+        return [o for o in node.outputs if self.owner.get(o) == node.name]
+
+    def up_to_date(self, node: Node, key: str) -> bool:
+        last = self.state.get(node.name)
+        if last is None or last["key"] != key:
+            return False
+        return all(last["outputs"].get(o) == self._digest(self.root / o) for o in self.owned(node))
+
+    def record(self, node: Node, key: str) -> None:
+        self.state[node.name] = {"key": key, "outputs": {o: self._digest(self.root / o) for o in self.owned(node)}}
+
+    def save(self) -> None:
+        from docsyn_lib.cache import write_json
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        write_json(self.cache_dir / "STATE.json", {"version": STATE_VERSION, "nodes": self.state})
+        self.memo.save()
+
+    def _run(self, node: Node) -> Tuple[int, str, float]:
+        t0 = time.perf_counter()
+        proc = subprocess.run([sys.executable, *node.argv], cwd=self.root, capture_output=True, text=True)
+        if node.stdout and proc.returncode == 0:
+            out = self.root / node.stdout
+            out.parent.mkdir(parents=True, exist_ok=True)
+            out.write_text(proc.stdout, encoding="utf-8")
+        return proc.returncode, proc.stdout + proc.stderr, time.perf_counter() - t0
+
+    def execute(self, jobs: int = 4, force: Sequence[str] = (), log=print) -> List[NodeResult]:
+        """Run every node whose inputs changed, up to `jobs` at a time; results in completion order."""
+        results: Dict[str, NodeResult] = {}
+        pending = list(self.order)
+        forced = set(force)
+        running = {}
+        with ThreadPoolExecutor(max_workers=max(1, jobs), thread_name_prefix="docsyn-graph") as pool:
+            while pending or running:
+                for node in [n for n in pending if all(d in results for d in self.deps[n.name])]:
+                    pending.remove(node)
+                    failed = [d for d in self.deps[node.name] if results[d].status in ("failed", "blocked")]
+                    if failed:
+                        results[node.name] = NodeResult(node.name, "blocked", 0, 0.0)
+                        log(f"[graph] {node.name}: not run, {', '.join(failed)} did not succeed")
+                        continue
+                    key = self.key(node)
+                    if node.name not in forced and self.up_to_date(node, key):
+                        results[node.name] = NodeResult(node.name, "up-to-date", 0, 0.0)
+                        log(f"[graph] {node.name}: up to date")
+                        continue
+                    running[pool.submit(self._run, node)] = (node, key)
+                if not running:
+                    continue
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    node, key = running.pop(future)
+                    code, output, seconds = future.result()
+                    log(f"[graph] {node.name}: exit {code} in {seconds:.2f}s")
+                    if output.strip():
+                        log(output.rstrip("\n"))
+                    if code == 0:
+                        self.record(node, key)
+                        forced |= self.cowriters[node.name]
+                    else:
+                        self.state.pop(node.name, None)
+                    results[node.name] = NodeResult(node.name, "ran" if code == 0 else "failed", code, round(seconds, 4))
+        self.save()
+        return list(results.values())
+
+    def critical_path(self, results: Sequence[NodeResult]) -> Tuple[List[str], float]:
+        """The dependency chain with the largest total run time (up-to-date nodes count as 0)."""
+        seconds = {r.name: r.seconds for r in results}
+        best: Dict[str, Tuple[float, List[str]]] = {}
+        for node in self.order:
+            if node.name not in seconds:
+                continue
+            prev = max((best[d] for d in self.deps[node.name] if d in best), key=lambda b: b[0], default=(0.0, []))
+            best[node.name] = (prev[0] + seconds[node.name], prev[1] + [node.name])
+        if not best:
+            return [], 0.0
+        total, path = max(best.values(), key=lambda b: b[0])
+        return path, total
+
+
+def describe(graph: Graph) -> str:
+    lines = []
+    for node in graph.order:
+        deps = ", ".join(graph.deps[node.name]) or "-"
+        lines.append(f"{node.name:<15} after: {deps}")
+        lines.append(f"{'':<15} run:   {' '.join(node.argv)}" + (f" > {node.stdout}" if node.stdout else ""))
+        if node.outputs:
+            lines.append(f"{'':<15} out:   {' '.join(node.outputs)}")
+    return "\n".join(lines)
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(prog="docsyn graph", description="Run the build graph, skipping up-to-date stages.")
+    ap.add_argument("targets", nargs="*", help=f"Stages to bring up to date with their dependencies (default: all of "
+                                               f"{', '.join(n.name for n in NODES)})")
+    ap.add_argument("-j", "--jobs", type=int, default=4, help="Stages to run in parallel")
+    ap.add_argument("--force", action="append", default=[], metavar="STAGE",
+                    help="Run a stage even if it is up to date (repeatable; 'all' for every stage)")
+    ap.add_argument("--list", action="store_true", help="Print the graph and exit")
+    args = ap.parse_args(argv)
+
+    if str(SCRIPTS) not in sys.path:
+        sys.path.insert(0, str(SCRIPTS))
+    from docsyn_lib.telemetry import stage
+
+    known = {n.name for n in NODES}
+    unknown = [t for t in [*args.targets, *args.force] if t not in known and t != "all"]
+    if unknown:
+        ap.error(f"unknown stage(s): {', '.join(unknown)}")
+    graph = Graph(select(NODES, dependencies(NODES), args.targets))
+    if args.list:
+        print(describe(graph))
+        return 0
+
+    force = known if "all" in args.force else args.force
+    with stage("graph", graph.root / "dist", graph.root) as metrics:
+        t0 = time.perf_counter()
+        results = graph.execute(args.jobs, force)
+        wall = time.perf_counter() - t0
+        path, total = graph.critical_path(results)
+        counts = {s: sum(1 for r in results if r.status == s) for s in ("ran", "up-to-date", "failed", "blocked")}
+        print()
+        print(f"[graph] {len(results)} stages: " + ", ".join(f"{n} {s}" for s, n in counts.items() if n)
+              + f" in {wall:.2f}s with -j {args.jobs}")
+        if path:
+            chain = " -> ".join(f"{name} ({next(r.seconds for r in results if r.name == name):.2f}s)" for name in path)
+            print(f"[graph] critical path: {chain} = {total:.2f}s")
+        metrics.exit = 1 if counts["failed"] or counts["blocked"] else 0
+        metrics.cache("graph", hits=counts["up-to-date"], misses=counts["ran"] + counts["failed"])
+        metrics.note(stages={r.name: {"status": r.status, "exit": r.exit, "run_s": r.seconds} for r in results},
+                     critical_path=path, critical_s=round(total, 4))
+    return metrics.exit
@@ -0,0 +1,265 @@
+"""
+DocSyn — streaming and incremental assembly of the compiled SSOT.
+
+The document is a sequence of units: the banner, each core source (after its
+"\\n\\n" separator), the Part A/B divider, and each blueprint (after its
+"\\n\\n---\\n\\n" separator). Units are fed through StreamNormalizer and the
+three artifacts are written in one pass.
+
+When a digest function is supplied, a segment map is returned that records,
+per unit, the source digest, the normalizer state on entry and exit, the byte
+ranges the unit produced in each artifact and its share of the SSOT
+statistics. Passing that map back as `previous` makes the next build
+incremental: a unit whose digest and entry state are unchanged is copied from
+the previous artifacts instead of being decoded and normalized again.
+Cross-boundary H1 dedup and newline collapsing live in the normalizer state,
+so the neighbours of a changed unit are recomputed only when their entry
+state differs in a way that can change their output (see reuse_exit_state).
+
+With a CleanIndex, sources that normalization would leave unchanged are
+spliced byte-for-byte from the source file without being decoded (see
+docsyn_lib.clean and splice_clean).
+"""
+from __future__ import annotations
+import errno
+import hashlib
+import mmap
+import os
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional
+
+from docsyn_lib.clean import CleanIndex
+from docsyn_lib.normalize import SsotStats, StreamNormalizer
+
+CHUNK = 1 << 20  # characters per read
+COPY_CHUNK = 1 << 20
+# copy_file_range errors that mean "not between these files", not a failed read: fall back to read/write
+NO_KERNEL_COPY = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.ENOTSUP}
+BANNER = "# DocSyn Compiled Knowledge\n\n"
+DIVIDER = "\n---\n\n"
+SEPARATORS = {"A": "\n\n", "B": "\n\n---\n\n"}
+ARTIFACT_NAMES = {"A": "PartA_Core.md", "B": "PartB_Blueprints.md", "SSOT": "DocSyn_Compiled.md"}
+
+
+class Unit(NamedTuple):
+    id: str
+    part: Optional[str]      # "A"/"B" when the unit is also copied verbatim to a Part file
+    sep: str                 # separator emitted before the unit's text
+    path: Optional[Path]     # source file, or None for static text
+    text: str = ""
+
+
+def plan_units(core_paths, bp_paths) -> List[Unit]:
+    units = [Unit("banner", None, "", None, BANNER)]
+    for i, p in enumerate(p for p in core_paths if p.exists()):
+        units.append(Unit(f"A:{p}", "A", SEPARATORS["A"] if i else "", p))
+    units.append(Unit("divider", None, "", None, DIVIDER))
+    for i, p in enumerate(p for p in bp_paths if p.exists()):
+        units.append(Unit(f"B:{p}", "B", SEPARATORS["B"] if i else "", p))
+    return units
+
+
+def iter_chunks(p: Path) -> Iterator[str]:
+    # Same decoding as Path.read_text(): utf-8, errors ignored, universal newlines
+    with p.open("r", encoding="utf-8", errors="ignore") as f:
+        for chunk in iter(lambda: f.read(CHUNK), ""):
+            yield chunk
+
+
+class Outputs:
+    """Temp files for the artifacts.
+
+    Byte offsets are tracked so ranges can be recorded and copied, and each
+    artifact is SHA-256'd as it is written (see docsyn_lib.record).
+    """
+
+    def __init__(self, outdir: Path) -> None:
+        outdir.mkdir(parents=True, exist_ok=True)
+        self.outdir = outdir
+        self.tmp = {k: outdir / f".{n}.tmp" for k, n in ARTIFACT_NAMES.items()}
+        self.files = {k: t.open("wb") for k, t in self.tmp.items()}
+        self.pos = dict.fromkeys(ARTIFACT_NAMES, 0)
+        self.hashes = {k: hashlib.sha256() for k in ARTIFACT_NAMES}
+        self.kernel_copy = hasattr(os, "copy_file_range")
+
+    def write(self, kind: str, text: str) -> None:
+        if text:
+            data = text.encode("utf-8")
+            self.files[kind].write(data)
+            self.hashes[kind].update(data)
+            self.pos[kind] += len(data)
+
+    def digests(self) -> Dict[str, dict]:
+        return {n: {"sha256": self.hashes[k].hexdigest(), "bytes": self.pos[k]} for k, n in ARTIFACT_NAMES.items()}
+
+    def copy(self, kind: str, src, offset: int, length: int) -> None:
+        """Append src[offset:offset+length]; src is an open binary file."""
+        f = self.files[kind]
+        if length <= 0:
+            return
+        f.flush()
+        dst_pos = self.pos[kind]
+        # The copy itself stays in the kernel; the digest reads the range through a mapping
+        with mmap.mmap(src.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm)[offset:offset + length] as view:
+            self.hashes[kind].update(view)
+        done = 0
+        while self.kernel_copy and done < length:
+            try:
+                n = os.copy_file_range(src.fileno(), f.fileno(), length - done, offset + done, dst_pos + done)
+            except OSError as e:
+                if e.errno not in NO_KERNEL_COPY:
+                    raise
+                self.kernel_copy = False      # e.g. output on another filesystem; later copies skip the attempt
+                break
+            if n == 0:
+                raise IOError(f"short copy from {src.name}")
+            done += n
+        f.seek(dst_pos + done)
+        if done < length:
+            src.seek(offset + done)
+            left = length - done
+            while left:
+                data = src.read(min(COPY_CHUNK, left))
+                if not data:
+                    raise IOError(f"short copy from {src.name}")
+                f.write(data)
+                left -= len(data)
+        self.pos[kind] = dst_pos + length
+
+    def commit(self) -> None:
+        for f in self.files.values():
+            f.close()
+        for k, n in ARTIFACT_NAMES.items():
+            os.replace(self.tmp[k], self.outdir / n)
+
+    def discard(self) -> None:
+        for f in self.files.values():
+            f.close()
+        for t in self.tmp.values():
+            if t.exists():
+                t.unlink()
+
+
+def reuse_exit_state(old: dict, entry: dict) -> Optional[dict]:
+    """Exit state if segment `old` replays unchanged from `entry`, else None.
+
+    The previous H1 only matters to the first H1 of a segment: a segment with
+    no H1 passes it through, and one whose first H1 differs from both the old
+    and the new previous H1 is kept either way.
+    """
+    was = old["entry"]
+    if any(was[k] != entry[k] for k in entry if k != "prev_h"):
+        return None
+    if was["prev_h"] == entry["prev_h"]:
+        return old["exit"]
+    first = old["first_h1"]
+    if first is None:
+        return dict(old["exit"], prev_h=entry["prev_h"])
+    if first != was["prev_h"] and first != entry["prev_h"]:
+        return old["exit"]
+    return None
+
+
+def splice_clean(unit: Unit, rec: dict, norm: StreamNormalizer, out: Outputs) -> bool:
+    """Copy a clean source's bytes straight into the outputs; False if its first H1 would be dropped.
+
+    The normalizer must have been release()d, so the source starts a fresh line.
+    """
+    if rec["first_h1"] is not None and rec["first_h1"] == norm.prev_h:
+        return False
+    with unit.path.open("rb") as src:
+        out.copy(unit.part, src, 0, rec["size"])
+        out.copy("SSOT", src, 0, rec["copy"])
+    norm.splice(rec)
+    return True
+
+
+class Assembled(NamedTuple):
+    stats: dict                      # SsotStats dict of the compiled SSOT
+    segments: Optional[List[dict]]   # segment map, when built with a digest
+    sources: List[dict]              # {"path", "part", "start", "end"}: SSOT bytes produced from each source
+    digests: Dict[str, dict]         # artifact name -> {"sha256", "bytes"}, computed while writing
+
+
+def assemble_streaming(core_paths, bp_paths, outdir: Path,
+                       digest: Optional[Callable[[Path], Optional[str]]] = None,
+                       previous: Optional[dict] = None,
+                       clean: Optional[CleanIndex] = None):
+    """Write Part A, Part B and the compiled SSOT in one pass.
+
+    Returns an Assembled, or None when every source is empty. `segments` is
+    None unless `digest` is given. `previous` is a segment map from an earlier
+    build whose artifacts are still in outdir. `clean` enables the zero-copy
+    path.
+    """
+    reusable: Dict[tuple, dict] = {}
+    old_files = {}
+    if previous and digest:
+        reusable = {(s["id"], s["sep"]): s for s in previous["segments"]}
+        old_files = {k: (outdir / n).open("rb") for k, n in ARTIFACT_NAMES.items()}
+
+    out = Outputs(outdir)
+    stats = SsotStats()
+    norm = StreamNormalizer(stats)
+    segments: Optional[List[dict]] = [] if digest else None
+    sources: List[dict] = []
+    has_content = False
+    try:
+        for unit in plan_units(core_paths, bp_paths):
+            sha = (digest(unit.path) if unit.path else "static") if digest else None
+            entry = norm.state()
+            start = dict(out.pos)
+            old = reusable.get((unit.id, unit.sep))
+            exit_state = reuse_exit_state(old, entry) if old and old["sha"] == sha else None
+            if exit_state is not None:
+                for kind, (offset, length) in old["ranges"].items():
+                    out.copy(kind, old_files[kind], offset, length)
+                norm = StreamNormalizer.from_state(exit_state, stats)
+                seg_stats, content, first_h1, reused = old["stats"], old["content"], old["first_h1"], True
+                body = old["body"]
+                stats.add(seg_stats)
+            else:
+                reused = False
+                before = stats.as_dict()
+                norm.begin_segment()
+                content = bool(unit.sep.strip())
+                if unit.part:
+                    out.write(unit.part, unit.sep)
+                out.write("SSOT", norm.feed(unit.sep))
+                released = norm.release()
+                out.write("SSOT", released)
+                body = out.pos["SSOT"] - start["SSOT"]
+                pieces = iter_chunks(unit.path) if unit.path else [unit.text]
+                rec = clean.get(unit.path) if clean and unit.path and released is not None else None
+                if rec and splice_clean(unit, rec, norm, out):
+                    clean.spliced += 1
+                    content, pieces = content or rec["content"], []
+                for text in pieces:
+                    if unit.part:
+                        out.write(unit.part, text)
+                        content = content or bool(text.strip())
+                    out.write("SSOT", norm.feed(text))
+                out.write("SSOT", norm.settle())
+                seg_stats, first_h1 = stats.since(before), norm.first_h1
+            has_content = has_content or content
+            if unit.path:
+                sources.append({"path": unit.path, "part": unit.part, "start": start["SSOT"] + body, "end": out.pos["SSOT"]})
+            if segments is not None:
+                segments.append({
+                    "id": unit.id, "sep": unit.sep, "sha": sha, "content": content, "reused": reused,
+                    "entry": entry, "exit": norm.state(), "first_h1": first_h1, "stats": seg_stats, "body": body,
+                    "ranges": {k: [start[k], out.pos[k] - start[k]] for k in out.pos if out.pos[k] > start[k]},
+                })
+        out.write("SSOT", norm.close())
+        if not has_content:
+            out.discard()
+            return None
+        out.commit()
+    except BaseException:
+        out.discard()
+        raise
+    finally:
+        for f in old_files.values():
+            f.close()
+
+    return Assembled(stats.as_dict(), segments, sources, out.digests())
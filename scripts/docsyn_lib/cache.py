@@ -0,0 +1,236 @@
+"""
+DocSyn — content-addressed build cache.
+
+Entries live under <cache_dir>/<namespace>/<key>/ and hold copies of the build
+artifacts plus ENTRY.json (caller metadata, size, last use). Keys are SHA-256
+digests over the caller's inputs, so any change to the inputs is a miss.
+- STATS.json in the namespace records hits, misses, stores and evictions.
+- LAST.json remembers which entry the output directory currently holds, so an
+  unchanged rebuild reuses the files in place instead of copying them.
+- Entries are evicted least-recently-used once the namespace exceeds max_bytes.
+
+HashMemo keeps per-file SHA-256 digests keyed by (size, mtime_ns) so warm runs
+can compute keys without reading unchanged sources. As with git's racy-clean
+check, a file whose mtime is not older than the memo file's own mtime is
+rehashed anyway: a same-size edit in the timestamp tick of the memo write
+would otherwise keep its old digest. VerdictCache stores
+per-file check results by content digest for the QA checks.
+"""
+from __future__ import annotations
+import hashlib
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+CHUNK = 1 << 20  # 1 MiB
+DEFAULT_MAX_BYTES = 256 << 20
+
+def sha256_file(path: Path) -> str:
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def load_json(path: Path, default):
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return default
+
+def write_json(path: Path, data) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(data, indent=2), encoding="utf-8")
+    os.replace(tmp, path)
+
+def stat_sig(path: Path) -> List[int]:
+    st = path.stat()
+    return [st.st_size, st.st_mtime_ns]
+
+
+class HashMemo:
+    """SHA-256 per file, recomputed only when size or mtime changes or the mtime is racy.
+
+    Loaded entries are trusted only for mtimes older than the memo file's
+    mtime (same filesystem clock, same granularity); digests computed in this
+    process are trusted as is. A racy entry is rehashed and saved again, so
+    the next run, reading a newer memo, trusts it.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        data = load_json(path, {})
+        self.entries: Dict[str, list] = data.get("entries", {}) if "entries" in data else {}
+        try:
+            self.trusted_before = path.stat().st_mtime_ns if self.entries else 0
+        except OSError:
+            self.trusted_before = 0
+        self.fresh: set = set()
+        self.dirty = False
+
+    def _lookup(self, k: str, sig: List[int]) -> Optional[str]:
+        cached = self.entries.get(k)
+        if cached and cached[:2] == sig and (sig[1] < self.trusted_before or k in self.fresh):
+            return cached[2]
+        return None
+
+    def _store(self, k: str, sig: List[int], digest: str) -> str:
+        self.entries[k] = list(sig) + [digest]
+        self.fresh.add(k)
+        self.dirty = True
+        return digest
+
+    def sha256(self, p: Path) -> Optional[str]:
+        if not p.exists():
+            return None
+        sig = stat_sig(p)
+        k = str(p)
+        return self._lookup(k, sig) or self._store(k, sig, sha256_file(p))
+
+    def peek(self, p: Path, sig: List[int]) -> Optional[str]:
+        """The memoized digest if `sig` (p's current size and mtime) is unchanged and not racy; never reads p."""
+        return self._lookup(str(p), sig)
+
+    def remember(self, p: Path, sig: List[int], data: bytes) -> str:
+        """Digest of `data`, already read from p when it had signature `sig`."""
+        return self._store(str(p), sig, hashlib.sha256(data).hexdigest())
+
+    def save(self) -> None:
+        if self.dirty:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            write_json(self.path, {"entries": self.entries})
+            self.dirty = False
+
+
+class VerdictCache:
+    """Per-file check results keyed by content SHA-256, valid for one check configuration.
+
+    `config` is a digest of everything the verdicts depend on (rules, limits,
+    code); a different value discards every entry. Entries unused in a run
+    are dropped on save.
+    """
+
+    def __init__(self, path: Path, config: str) -> None:
+        self.path = path
+        self.config = config
+        data = load_json(path, {})
+        self.entries: Dict[str, dict] = data.get("entries", {}) if data.get("config") == config else {}
+        self.used: Dict[str, dict] = {}
+
+    def get(self, sha: str) -> Optional[dict]:
+        verdict = self.used.get(sha) or self.entries.get(sha)
+        if verdict is not None:
+            self.used[sha] = verdict
+        return verdict
+
+    def put(self, sha: str, verdict: dict) -> None:
+        self.used[sha] = verdict
+
+    def save(self) -> None:
+        if self.used != self.entries:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            write_json(self.path, {"config": self.config, "entries": self.used})
+
+
+class BuildCache:
+    def __init__(self, cache_dir: Path, namespace: str, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self.dir = cache_dir / namespace
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.stats = load_json(self.dir / "STATS.json", {})
+        for k in ("hits", "misses", "stores", "evictions"):
+            self.stats.setdefault(k, 0)
+
+    @staticmethod
+    def key(parts: Iterable[str]) -> str:
+        h = hashlib.sha256()
+        for part in parts:
+            h.update(part.encode("utf-8"))
+            h.update(b"\0")
+        return h.hexdigest()
+
+    def _entry_meta(self, key: str) -> Optional[dict]:
+        meta = load_json(self.dir / key / "ENTRY.json", None)
+        if meta is None or not all((self.dir / key / n).exists() for n in meta.get("files", [])):
+            return None
+        return meta
+
+    def _remember_outputs(self, key: str, outdir: Path, names: List[str]) -> None:
+        write_json(self.dir / "LAST.json", {
+            "key": key,
+            "outdir": str(outdir),
+            "files": {n: stat_sig(outdir / n) for n in names},
+        })
+
+    def _outputs_current(self, key: str, outdir: Path, names: List[str]) -> bool:
+        last = load_json(self.dir / "LAST.json", {})
+        if last.get("key") != key or last.get("outdir") != str(outdir):
+            return False
+        try:
+            return all(last["files"].get(n) == stat_sig(outdir / n) for n in names)
+        except OSError:
+            return False
+
+    def restore(self, key: str, outdir: Path) -> Optional[dict]:
+        """Put the entry's files into outdir and return its metadata, or None on a miss."""
+        meta = self._entry_meta(key)
+        if meta is None:
+            self.stats["misses"] += 1
+            self.stats["last_result"] = "miss"
+            return None
+        names = meta["files"]
+        if self._outputs_current(key, outdir, names):
+            self.stats["last_result"] = "reuse"
+        else:
+            outdir.mkdir(parents=True, exist_ok=True)
+            for n in names:
+                tmp = outdir / f".{n}.tmp"
+                shutil.copyfile(self.dir / key / n, tmp)
+                os.replace(tmp, outdir / n)
+            self._remember_outputs(key, outdir, names)
+            self.stats["last_result"] = "restore"
+        self.stats["hits"] += 1
+        meta["last_used"] = time.time()
+        write_json(self.dir / key / "ENTRY.json", meta)
+        return meta
+
+    def store(self, key: str, outdir: Path, names: List[str], meta: dict) -> None:
+        entry = self.dir / key
+        tmp = self.dir / f".{key}.tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir(parents=True)
+        size = 0
+        for n in names:
+            shutil.copyfile(outdir / n, tmp / n)
+            size += (tmp / n).stat().st_size
+        meta = dict(meta, files=list(names), bytes=size, last_used=time.time())
+        write_json(tmp / "ENTRY.json", meta)
+        shutil.rmtree(entry, ignore_errors=True)
+        os.replace(tmp, entry)
+        self._remember_outputs(key, outdir, names)
+        self.stats["stores"] += 1
+        self._evict(keep=key)
+
+    def _evict(self, keep: str) -> None:
+        entries = []
+        for d in self.dir.iterdir():
+            if d.is_dir() and not d.name.startswith("."):
+                meta = load_json(d / "ENTRY.json", {})
+                entries.append((meta.get("last_used", 0), meta.get("bytes", 0), d))
+        total = sum(size for _, size, _ in entries)
+        for _, size, d in sorted(entries, key=lambda e: e[0]):
+            if total <= self.max_bytes:
+                break
+            if d.name == keep:
+                continue
+            shutil.rmtree(d, ignore_errors=True)
+            total -= size
+            self.stats["evictions"] += 1
+        self.stats["entries"] = sum(1 for d in self.dir.iterdir() if d.is_dir() and not d.name.startswith("."))
+        self.stats["bytes"] = total
+
+    def save_stats(self) -> None:
+        write_json(self.dir / "STATS.json", self.stats)
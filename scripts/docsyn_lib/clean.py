@@ -0,0 +1,116 @@
+"""
+DocSyn — per-source "clean" records for the zero-copy assembly path.
+
+A source is clean when normalizing it reproduces its own bytes: valid UTF-8,
+no carriage returns or other exotic line breaks, already NFC, no run of three
+newlines, no leading newline and no repeated H1. For such a source the
+streaming assembler splices the file's bytes into the outputs with
+copy_file_range instead of decoding and normalizing it; only the newlines
+held at the boundary before it go through the normalizer.
+
+analyze_source() decides this by running the file through a fresh
+StreamNormalizer and comparing the output with the raw bytes. The record also
+carries what the normalizer would have produced as a side effect: the exit
+state, the first and last H1 and the SSOT statistics. CleanIndex caches
+records in JSON keyed by the source's SHA-256, so a file is analyzed once per
+content. The index also stores a digest of the assembler and docsyn_lib code,
+and is discarded when that code changes.
+"""
+from __future__ import annotations
+import codecs
+from pathlib import Path
+from typing import Dict, Optional
+
+from docsyn_lib.cache import HashMemo, load_json, write_json
+from docsyn_lib.normalize import StreamNormalizer
+
+CHUNK = 1 << 20
+DIRTY = {"clean": False}
+
+
+def analyze_source(path: Path) -> dict:
+    """Clean record for path, or {"clean": False} when it needs the transforming path."""
+    decoder = codecs.getincrementaldecoder("utf-8")("strict")
+    norm = StreamNormalizer()
+    unmatched = bytearray()   # raw bytes not yet reproduced by the normalizer
+    copy = size = 0
+    content = False
+
+    def matches(text: str) -> bool:
+        nonlocal copy
+        data = text.encode("utf-8")
+        if unmatched[:len(data)] != data:
+            return False
+        del unmatched[:len(data)]
+        copy += len(data)
+        return True
+
+    try:
+        with path.open("rb") as f:
+            for raw in iter(lambda: f.read(CHUNK), b""):
+                if (not size and raw.startswith(b"\n")) or b"\r" in raw:
+                    return DIRTY
+                size += len(raw)
+                unmatched += raw
+                text = decoder.decode(raw)
+                content = content or bool(text.strip())
+                if not matches(norm.feed(text)):
+                    return DIRTY
+            if not matches(decoder.decode(b"", final=True) + norm.settle()):
+                return DIRTY
+    except (OSError, UnicodeDecodeError):
+        return DIRTY
+
+    # Whatever is left is held by the normalizer: extra trailing newlines, or an unterminated last line
+    rest = unmatched.decode("utf-8")
+    held = "\n" * (norm.pending_nl - norm.nl_emitted) if norm.pending_nl else norm.carry
+    if not size or norm.stats.h1_deduped or rest.rstrip("\n") != held.rstrip("\n"):
+        return DIRTY
+    return {
+        "clean": True,
+        "size": size,
+        "copy": copy,
+        "content": content,
+        "exit": {"pending_nl": norm.pending_nl, "nl_emitted": norm.nl_emitted, "carry": norm.carry},
+        "first_h1": norm.first_h1,
+        "last_h1": norm.prev_h,
+        "stats": norm.stats.as_dict(),
+    }
+
+
+class CleanIndex:
+    """Clean records keyed by content hash; entries unused in a run are dropped on save.
+
+    `code` is a digest of the code that decides cleanliness (normalizer and
+    assembler); an index written under other code is discarded whole.
+    """
+
+    def __init__(self, path: Path, memo: HashMemo, code: str) -> None:
+        self.path = path
+        self.memo = memo
+        self.code = code
+        data = load_json(path, {})
+        self.stale = data.get("code") != code
+        self.entries: Dict[str, dict] = {} if self.stale else data.get("entries", {})
+        self.used: Dict[str, dict] = {}
+        self.analyzed = 0
+        self.spliced = 0
+
+    def get(self, p: Path) -> Optional[dict]:
+        """The record for p if p is clean, else None."""
+        sha = self.memo.sha256(p)
+        if sha is None:
+            return None
+        rec = self.used.get(sha) or self.entries.get(sha)
+        if rec is None:
+            rec = analyze_source(p)
+            self.analyzed += 1
+        self.used[sha] = rec
+        if not rec["clean"] or p.stat().st_size != rec["size"]:
+            return None
+        return rec
+
+    def save(self) -> None:
+        if self.stale or self.used != self.entries:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            write_json(self.path, {"code": self.code, "entries": self.used})
@@ -0,0 +1,129 @@
+"""
+DocSyn — leakage fingerprints of the Part A global blocks.
+
+ci_consolidate and ci_validate look for the global blocks of Part A (router
+matrix, risk model, devcontainer, AQI) inside blueprint text after both are
+normalized with norm(): lowercased, with whitespace and the markdown
+punctuation `|`*_:>-` removed. A block has leaked where its normalized text
+occurs in the normalized blueprint text, exactly like `norm(block) in
+norm(text)`.
+
+FingerprintIndex is built once per build from the blocks. Each block's
+fingerprint is its first k normalized characters (k is the shortest block
+length, capped at ANCHOR_MAX), kept in a hash table. A scan jumps between
+positions where some fingerprint's first PREFIX characters occur (one
+C-level regex search, as in termscan), looks the k characters there up in
+the table and verifies the whole block only on a hit. The cost grows with
+the text, not with text length times the number of blocks.
+
+Each Match carries the character span and the 1-based line range of the
+leaked text in the original (unnormalized) input, via a map from normalized
+positions back to source positions. `fingerprint` is a digest of the indexed
+blocks, for keying caches of results that depend on them.
+"""
+from __future__ import annotations
+import bisect
+import hashlib
+import re
+from typing import Dict, Iterator, List, NamedTuple, Tuple
+
+ANCHOR_MAX = 64
+PREFIX = 4   # leading characters of each fingerprint the skip search looks for
+_DROP = re.compile(r"[\s\|`*_:>\-]+")
+_KEEP = re.compile(r"[^\s\|`*_:>\-]+")
+
+
+class Match(NamedTuple):
+    key: str
+    start: int       # character offsets of the leaked text in the original input
+    end: int
+    line: int        # 1-based lines of start and of the last character
+    end_line: int
+
+
+def norm(txt: str) -> str:
+    return _DROP.sub("", txt.lower())
+
+
+def _source_offsets(text: str, lowered: str, positions: List[int]) -> Dict[int, int]:
+    """Map sorted positions in norm(text) to the indexes of the characters of text they came from."""
+    where: Dict[int, int] = {}
+    todo = iter(positions)
+    pos = next(todo, None)
+    seen = 0
+    for m in _KEEP.finditer(lowered):
+        run = m.end() - m.start()
+        while pos is not None and pos < seen + run:
+            where[pos] = m.start() + pos - seen
+            pos = next(todo, None)
+        if pos is None:
+            break
+        seen += run
+    if len(lowered) != len(text):    # some character lowercases to several: map back to text
+        back, li = {}, 0
+        wanted = sorted(set(where.values()))
+        it = iter(wanted)
+        want = next(it, None)
+        for i, ch in enumerate(text):
+            li += len(ch.lower())
+            while want is not None and want < li:
+                back[want] = i
+                want = next(it, None)
+            if want is None:
+                break
+        where = {p: back[w] for p, w in where.items()}
+    return where
+
+
+class FingerprintIndex:
+    def __init__(self, blocks: Dict[str, str]) -> None:
+        """blocks: key -> raw block text; empty blocks are ignored, key order is kept."""
+        self.blocks: Dict[str, str] = {}
+        for key, text in blocks.items():
+            nb = norm(text or "")
+            if nb:
+                self.blocks[key] = nb
+        self.k = min([ANCHOR_MAX, *map(len, self.blocks.values())]) if self.blocks else 0
+        self.anchors: Dict[str, List[str]] = {}
+        for key, nb in self.blocks.items():
+            self.anchors.setdefault(nb[:self.k], []).append(key)
+        prefixes = sorted({a[:PREFIX] for a in self.anchors}, key=lambda a: (-len(a), a))
+        self._skip = re.compile("(?=" + "|".join(map(re.escape, prefixes)) + ")") if prefixes else None
+        h = hashlib.sha256()
+        for key, nb in self.blocks.items():
+            h.update(f"{key}\0{nb}\0".encode("utf-8"))
+        self.fingerprint = h.hexdigest()
+
+    def __bool__(self) -> bool:
+        return bool(self.blocks)
+
+    def _candidates(self, s: str) -> Iterator[Tuple[int, List[str]]]:
+        if self._skip is None:
+            return
+        k, anchors = self.k, self.anchors
+        for m in self._skip.finditer(s):
+            keys = anchors.get(s[m.start():m.start() + k])
+            if keys is not None:
+                yield m.start(), keys
+
+    def find(self, text: str) -> List[Match]:
+        """Every occurrence of every block in text, ordered by block (index order), then position."""
+        if not self.blocks:
+            return []
+        lowered = text.lower()
+        normed = _DROP.sub("", lowered)
+        found = []
+        for pos, keys in self._candidates(normed):
+            for key in keys:
+                nb = self.blocks[key]
+                if normed.startswith(nb, pos):
+                    found.append((key, pos, pos + len(nb) - 1))
+        if not found:
+            return []
+        src = _source_offsets(text, lowered, sorted({p for f in found for p in f[1:]}))
+        found = [(key, src[first], src[last] + 1) for key, first, last in found]
+        newlines = [m.start() for m in re.finditer("\n", text)]
+        order = {key: i for i, key in enumerate(self.blocks)}
+        found.sort(key=lambda f: (order[f[0]], f[1]))
+        return [Match(key, start, end, bisect.bisect_left(newlines, start) + 1, bisect.bisect_left(newlines, end - 1) + 1)
+                for key, start, end in found]
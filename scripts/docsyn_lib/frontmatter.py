@@ -0,0 +1,267 @@
+"""
+DocSyn — front-matter parsing without PyYAML, and a persistent index of it.
+
+Front matter is the block between a leading `---` line (blank lines before
+it are allowed) and the next `---` line. Only the subset of YAML our
+documents use is understood:
+- `key: value` scalars: plain, "double" or 'single' quoted, with `# comments`;
+  plain scalars resolve like PyYAML's safe_load for null, booleans
+  (true/yes/on ...), decimal integers and floats, and stay strings otherwise
+  (dates included, so results are JSON-serializable),
+- flow lists `[a, "b, c", 3]` and block lists (`key:` then `- item` lines).
+Anything else (nested mappings, multi-line strings, anchors) is recorded as
+an error for that line and otherwise skipped.
+
+read_header() reads a file only up to its closing fence (at most
+MAX_HEADER bytes), so tools that need front matter never read bodies.
+FrontMatterIndex keeps parsed headers in dist/FRONT_MATTER_INDEX.json keyed
+by path and re-reads a file only when its size or mtime changed.
+"""
+from __future__ import annotations
+import json
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from docsyn_lib.cache import load_json, stat_sig, write_json
+
+INDEX_NAME = "FRONT_MATTER_INDEX.json"
+INDEX_VERSION = 1      # bump when parse results for the same bytes change
+MAX_HEADER = 64 << 10  # a header longer than this is treated as unterminated
+
+_KEY = re.compile(r"([A-Za-z0-9_][\w.-]*)[ \t]*:(?:[ \t]+|$)(.*)$")
+_ITEM = re.compile(r"-(?:[ \t]+|$)(.*)$")
+_DQ = re.compile(r'"((?:[^"\\]|\\.)*)"[ \t]*(?:#.*)?$')
+_SQ = re.compile(r"'((?:[^']|'')*)'[ \t]*(?:#.*)?$")
+_FLOW = re.compile(r"\[(.*)\][ \t]*(?:#.*)?$")
+_FLOW_ITEM = re.compile(r"""[ \t]*("(?:[^"\\]|\\.)*"|'(?:[^']|'')*'|[^,"'\[\]{}]*?)[ \t]*(?:,|$)""")
+_COMMENT = re.compile(r"[ \t]+#.*$")
+_INT = re.compile(r"[-+]?(?:0|[1-9][0-9_]*)$")
+_FLOAT = re.compile(r"[-+]?[0-9][0-9_]*\.[0-9_]*(?:[eE][-+][0-9]+)?$")
+_CONSTANTS = {
+    **dict.fromkeys(("", "~", "null", "Null", "NULL"), None),
+    **dict.fromkeys(("true", "True", "TRUE", "yes", "Yes", "YES", "on", "On", "ON"), True),
+    **dict.fromkeys(("false", "False", "FALSE", "no", "No", "NO", "off", "Off", "OFF"), False),
+}
+
+
+class FrontMatter(NamedTuple):
+    data: Dict[str, object]
+    end: int                 # byte offset just past the closing fence line, where the body starts
+    errors: Tuple[str, ...]  # header lines outside the supported subset
+
+
+def _is_fence(line: bytes) -> bool:
+    return line.strip() == b"---"
+
+
+def _lines(data: bytes):
+    pos = 0
+    while pos < len(data):
+        nl = data.find(b"\n", pos)
+        end = len(data) if nl == -1 else nl + 1
+        yield data[pos:end]
+        pos = end
+
+
+def _scalar(s: str):
+    s = s.strip()
+    if s[:1] == '"':
+        m = _DQ.match(s)
+        if not m:
+            raise ValueError(s)
+        return json.loads(f'"{m.group(1)}"', strict=False)
+    if s[:1] == "'":
+        m = _SQ.match(s)
+        if not m:
+            raise ValueError(s)
+        return m.group(1).replace("''", "'")
+    if s[:1] in ("[", "{", "|", ">", "&", "*", "!"):
+        raise ValueError(s)
+    s = _COMMENT.sub("", s) if not s.startswith("#") else ""
+    if s in _CONSTANTS:
+        return _CONSTANTS[s]
+    if _INT.match(s):
+        return int(s.replace("_", ""))
+    if _FLOAT.match(s):
+        return float(s.replace("_", ""))
+    return s
+
+
+def _value(s: str):
+    if s.lstrip().startswith("["):
+        m = _FLOW.match(s.strip())
+        if not m:
+            raise ValueError(s)
+        inner, items, pos = m.group(1).strip(), [], 0
+        while pos < len(inner):
+            item = _FLOW_ITEM.match(inner, pos)
+            if not item or item.end() == pos or not item.group(1):
+                raise ValueError(s)
+            items.append(_scalar(item.group(1)))
+            pos = item.end()
+        return items
+    return _scalar(s)
+
+
+def parse_block(lines: Iterable[str]) -> Tuple[Dict[str, object], Tuple[str, ...]]:
+    """Parse the lines between the fences; returns (mapping, lines that could not be parsed)."""
+    data: Dict[str, object] = {}
+    errors: List[str] = []
+    open_list: Optional[str] = None   # key whose value may continue as a block list
+    for raw in lines:
+        line = raw.rstrip("\r\n")
+        stripped = line.strip()
+        if not stripped or stripped.startswith("#"):
+            continue
+        item = _ITEM.match(stripped)
+        if open_list is not None and item:
+            try:
+                if data[open_list] is None:
+                    data[open_list] = []
+                data[open_list].append(_value(item.group(1)))
+            except (ValueError, AttributeError):
+                errors.append(line)
+            continue
+        open_list = None
+        m = _KEY.match(line)
+        if not m:
+            errors.append(line)
+            continue
+        key, rest = m.group(1), m.group(2)
+        try:
+            data[key] = _value(rest)
+        except ValueError:
+            errors.append(line)
+            data.pop(key, None)
+            continue
+        if data[key] is None and not rest.strip():
+            open_list = key
+    return data, tuple(errors)
+
+
+def split(data) -> Optional[FrontMatter]:
+    """The front matter at the start of `data` (bytes or str); None if there is no closed block."""
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    lines = _lines(data)
+    pos = 0
+    for line in lines:
+        pos += len(line)
+        if line.strip():
+            if not _is_fence(line):
+                return None
+            break
+    else:
+        return None
+    block: List[str] = []
+    for line in lines:
+        pos += len(line)
+        if _is_fence(line):
+            fm, errors = parse_block(block)
+            return FrontMatter(fm, pos, errors)
+        block.append(line.decode("utf-8", errors="replace"))
+    return None
+
+
+def parse(data) -> Dict[str, object]:
+    """Just the mapping; {} when there is no front matter."""
+    fm = split(data)
+    return fm.data if fm else {}
+
+
+def read_header(path: Path, limit: int = MAX_HEADER) -> bytes:
+    """The bytes of `path` up to and including its closing fence line, or b"" if it has none."""
+    with open(path, "rb") as f:
+        head, opened = [], False
+        size = 0
+        while size <= limit:
+            line = f.readline(limit + 1 - size)
+            if not line:
+                break
+            head.append(line)
+            size += len(line)
+            if opened:
+                if _is_fence(line):
+                    return b"".join(head)
+            elif _is_fence(line):
+                opened = True
+            elif line.strip():
+                break
+    return b""
+
+
+def load(path: Path) -> Optional[FrontMatter]:
+    """Parse the front matter of a file, reading only its header."""
+    return split(read_header(path))
+
+
+class FrontMatterIndex:
+    """Parsed front matter per file, persisted and refreshed by size and mtime.
+
+    get() answers from the index while a file's signature is unchanged and
+    otherwise re-reads just its header; it raises OSError (FileNotFoundError)
+    for a missing file, like open(). Entries for files that no longer exist
+    are dropped on save.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        data = load_json(path, {})
+        self.entries: Dict[str, dict] = data.get("entries", {}) if data.get("version") == INDEX_VERSION else {}
+        self.hits = 0
+        self.misses = 0
+        self.dirty = False
+        self._lock = threading.Lock()
+
+    @classmethod
+    def in_dist(cls, dist: Path) -> "FrontMatterIndex":
+        return cls(dist / INDEX_NAME)
+
+    def get(self, p: Path) -> Optional[FrontMatter]:
+        p = Path(p).resolve()
+        sig = stat_sig(p)
+        key = str(p)
+        entry = self.entries.get(key)
+        if entry is not None and entry["sig"] == sig:
+            with self._lock:
+                self.hits += 1
+        else:
+            fm = load(p)
+            entry = {"sig": sig, "fm": fm.data if fm else None,
+                     "end": fm.end if fm else 0, "errors": list(fm.errors) if fm else []}
+            with self._lock:
+                self.misses += 1
+                self.entries[key] = entry
+                self.dirty = True
+        if entry["fm"] is None:
+            return None
+        return FrontMatter(entry["fm"], entry["end"], tuple(entry["errors"]))
+
+    def map(self, paths: Iterable[Path], workers: int = 1) -> List[object]:
+        """get() for each path in order; each result is a FrontMatter, None, or the OSError raised."""
+        def one(p):
+            try:
+                return self.get(p)
+            except OSError as e:
+                return e
+        paths = list(paths)
+        if workers <= 1 or len(paths) < 2:
+            return [one(p) for p in paths]
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="docsyn-fm") as pool:
+            return list(pool.map(one, paths))
+
+    def save(self) -> None:
+        gone = [k for k in self.entries if not os.path.exists(k)]
+        for k in gone:
+            del self.entries[k]
+        if self.dirty or gone:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            write_json(self.path, {"version": INDEX_VERSION, "entries": self.entries})
+            self.dirty = False
+
+    def stats(self) -> str:
+        return f"[front-matter] {self.hits + self.misses} files, {self.hits} from index, {self.misses} parsed"
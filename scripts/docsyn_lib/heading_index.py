@@ -0,0 +1,99 @@
+"""
+DocSyn — one-pass heading index of a Markdown document, as the validators see headings.
+
+A heading is any line of the form `[ws][> ...][\\]#{1,6} <title>`: leading
+whitespace, any number of blockquote markers, an optional escaping
+backslash (`\\## Title`, as some exports write headings) and 1-6 hashes
+followed by whitespace. Lines inside ``` fences count too (the validators
+have always counted them), but are flagged `fenced`.
+
+HeadingIndex scans the text once and keeps, per heading, its level, title,
+normalized title (lowercase, `1.`-style numbering removed), blockquote
+depth, escaping, 1-based line and the byte and character span of its line.
+Questions the validators ask become lookups:
+- count(label): headings whose title ends with label (case-insensitive),
+- block(key): the section under the last H1-H3 heading whose normalized
+  title contains key, up to the next H1-H3 heading.
+as_dict() is the JSON form written to dist/HEADING_INDEX.json by
+ci_validate, for other tools to reuse.
+"""
+from __future__ import annotations
+import hashlib
+import re
+from typing import Dict, List, NamedTuple, Optional
+
+INDEX_NAME = "HEADING_INDEX.json"
+INDEX_VERSION = 1
+SECTION_LEVEL = 3      # block() sections end at the next heading of this level or higher
+_HEADING = re.compile(r"\s*((?:>\s*)*)(\\)?(#{1,6})\s+(.*?)\s*$")
+_NUMBER = re.compile(r"^\d+\.\s*")
+
+
+class Heading(NamedTuple):
+    level: int
+    title: str
+    norm: str
+    line: int
+    start: int         # byte span of the heading line (without its line break)
+    end: int
+    char_start: int    # the same span in characters
+    char_end: int
+    quote: int         # blockquote depth
+    escaped: bool
+    fenced: bool
+
+
+def norm_title(title: str) -> str:
+    return _NUMBER.sub("", title).strip().lower()
+
+
+class HeadingIndex:
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self.headings: List[Heading] = []
+        self.titles: Dict[str, int] = {}          # lowercased title -> occurrences
+        self._counts: Dict[str, int] = {}
+        pos = byte = 0
+        fenced = False
+        for i, raw in enumerate(text.splitlines(keepends=True), 1):
+            line = raw.rstrip("\r\n\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029")
+            if line.lstrip().startswith("```"):
+                fenced = not fenced
+            if "#" in line:
+                m = _HEADING.match(line)
+                if m:
+                    title = m.group(4)
+                    self.headings.append(Heading(
+                        len(m.group(3)), title, norm_title(title), i,
+                        byte, byte + len(line.encode("utf-8")), pos, pos + len(line),
+                        m.group(1).count(">"), m.group(2) is not None, fenced))
+                    key = title.lower()
+                    self.titles[key] = self.titles.get(key, 0) + 1
+            pos += len(raw)
+            byte += len(raw.encode("utf-8"))
+
+    def count(self, label: str) -> int:
+        """Headings whose title ends with label, ignoring case (numbering and quoting allowed)."""
+        label = label.lower()
+        if label not in self._counts:
+            self._counts[label] = sum(n for title, n in self.titles.items() if title.endswith(label))
+        return self._counts[label]
+
+    def sections(self, max_level: int = SECTION_LEVEL) -> List[Heading]:
+        return [h for h in self.headings if h.level <= max_level]
+
+    def block(self, key: str, max_level: int = SECTION_LEVEL) -> Optional[str]:
+        """Text of the section under the last heading whose normalized title contains key."""
+        key = key.lower()
+        sections = self.sections(max_level)
+        for idx in range(len(sections) - 1, -1, -1):
+            if key in sections[idx].norm:
+                end = sections[idx + 1].char_start if idx + 1 < len(sections) else len(self.text)
+                return self.text[sections[idx].char_start:end]
+        return None
+
+    def as_dict(self) -> dict:
+        return {
+            "sha256": hashlib.sha256(self.text.encode("utf-8")).hexdigest(),
+            "headings": [h._asdict() for h in self.headings],
+        }
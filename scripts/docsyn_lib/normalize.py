@@ -0,0 +1,221 @@
+"""
+DocSyn — single-pass normalizer for the compiled SSOT.
+
+Applies the post-processing of the compiled document to text fed in arbitrary
+chunks, in one scan:
+- collapse runs of 3+ newlines to a blank line,
+- split on str.splitlines() boundaries and rejoin with "\\n",
+- drop an H1 whose title matches the previous H1 (case-insensitive),
+- NFC-normalize,
+while collecting the report statistics (code-fence count, global-heading
+counts, headings per level, dropped H1s, lines) as a by-product.
+
+Only heading lines are visited individually; everything else is handled by
+C-level string operations on whole chunks. Finished lines are returned as
+soon as they are known, so memory stays bounded by the chunk size plus the
+longest line. normalize_ssot() is the one-shot form for in-memory text.
+"""
+from __future__ import annotations
+import re
+import unicodedata
+from typing import Dict, Optional, Tuple
+
+GLOBAL_UNIQUE = [
+  "Query-Pattern Matrix",
+  "Unified Risk & Control Model",
+  "Standard Development Environment",
+  "Agent Query Index",
+]
+
+H1_RE = re.compile(r"^#\s+(.+)$")
+LEVEL_RE = re.compile(r"^(#{1,6})\s")
+HEADING_LINE_RE = re.compile(r"(?m)^#[^\n]*\n")
+NL3_RE = re.compile(r"\n{3,}")
+# str.splitlines() boundaries other than "\n"; blocks containing one take the per-line path
+OTHER_BREAKS_RE = re.compile("[\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029]")
+GLOBAL_RES = {g: re.compile(re.escape(g), re.I) for g in GLOBAL_UNIQUE}
+
+
+class SsotStats:
+    """Statistics of the normalized output; additive across chunks and segments."""
+
+    def __init__(self) -> None:
+        self.fence_count = 0
+        self.unique_counts = dict.fromkeys(GLOBAL_UNIQUE, 0)
+        self.headings = {f"h{i}": 0 for i in range(1, 7)}
+        self.h1_deduped = 0
+        self.lines = 0
+
+    def as_dict(self) -> dict:
+        return {
+            "fence_count": self.fence_count,
+            "unique_counts": dict(self.unique_counts),
+            "headings": dict(self.headings),
+            "h1_deduped": self.h1_deduped,
+            "lines": self.lines,
+        }
+
+    def add(self, other: dict, sign: int = 1) -> None:
+        self.fence_count += sign * other["fence_count"]
+        self.h1_deduped += sign * other["h1_deduped"]
+        self.lines += sign * other["lines"]
+        for g, c in other["unique_counts"].items():
+            self.unique_counts[g] += sign * c
+        for h, c in other["headings"].items():
+            self.headings[h] += sign * c
+
+    def since(self, before: dict) -> dict:
+        """Stats accumulated after the snapshot `before` (an as_dict() result)."""
+        delta = SsotStats()
+        delta.add(self.as_dict())
+        delta.add(before, sign=-1)
+        return delta.as_dict()
+
+
+class StreamNormalizer:
+    def __init__(self, stats: Optional[SsotStats] = None) -> None:
+        self.pending_nl = 0              # trailing "\n" run (capped at 2), held until its length is known
+        self.nl_emitted = 0              # newlines of that run already emitted by settle()
+        self.carry = ""                  # current line, not yet terminated
+        self.prev_h: Optional[str] = None
+        self.first_h1: Optional[str] = None  # first H1 seen since begin_segment()
+        self.stats = stats or SsotStats()
+
+    def begin_segment(self) -> None:
+        self.first_h1 = None
+
+    def state(self) -> dict:
+        return {"pending_nl": self.pending_nl, "nl_emitted": self.nl_emitted, "carry": self.carry, "prev_h": self.prev_h}
+
+    @classmethod
+    def from_state(cls, state: dict, stats: Optional[SsotStats] = None) -> "StreamNormalizer":
+        norm = cls(stats)
+        norm.pending_nl, norm.nl_emitted = state["pending_nl"], state["nl_emitted"]
+        norm.carry, norm.prev_h = state["carry"], state["prev_h"]
+        return norm
+
+    def _collapse(self, text: str) -> str:
+        body = text.lstrip("\n")
+        self.pending_nl = min(self.pending_nl + len(text) - len(body), 2)
+        if not body:
+            return ""
+        head = "\n" * (self.pending_nl - self.nl_emitted)
+        stripped = body.rstrip("\n")
+        self.pending_nl = min(len(body) - len(stripped), 2)
+        self.nl_emitted = 0
+        return head + NL3_RE.sub("\n\n", stripped)
+
+    def _keep_heading(self, ln: str) -> bool:
+        """Dedup and count one line starting with "#"; False if it is dropped."""
+        m = H1_RE.match(ln)
+        if m:
+            h = m.group(1).strip().lower()
+            if self.first_h1 is None:
+                self.first_h1 = h
+            if h == self.prev_h:
+                self.stats.h1_deduped += 1
+                return False
+            self.prev_h = h
+        lm = LEVEL_RE.match(ln)
+        if lm:
+            self.stats.headings[f"h{len(lm.group(1))}"] += 1
+        nfc = unicodedata.normalize("NFC", ln)
+        for g, rx in GLOBAL_RES.items():
+            if rx.search(nfc):
+                self.stats.unique_counts[g] += 1
+        return True
+
+    def _lines(self, text: str) -> str:
+        """Split off complete lines, drop duplicate H1s and return them "\\n"-terminated."""
+        if not text:
+            return ""
+        block = self.carry + text
+        if OTHER_BREAKS_RE.search(block):
+            return self._lines_generic(block)
+        end = block.rfind("\n") + 1
+        self.carry, body = block[end:], block[:end]
+        pieces, pos = [], 0
+        for m in HEADING_LINE_RE.finditer(body):
+            if not self._keep_heading(m.group(0)[:-1]):
+                pieces.append(body[pos:m.start()])
+                pos = m.end()
+        if pos:
+            pieces.append(body[pos:])
+            body = "".join(pieces)
+        return body
+
+    def _lines_generic(self, block: str) -> str:
+        parts = block.splitlines(keepends=True)
+        last = parts[-1]
+        # Hold back an unterminated line, and a lone "\r" that may pair with a later "\n"
+        if len(last.splitlines()[0]) == len(last) or last.endswith("\r"):
+            self.carry = parts.pop()
+        else:
+            self.carry = ""
+        out = []
+        for part in parts:
+            ln = part.splitlines()[0]
+            if ln.startswith("#") and not self._keep_heading(ln):
+                continue
+            out.append(ln + "\n")
+        return "".join(out)
+
+    def _emit(self, body: str) -> str:
+        if not body:
+            return ""
+        out = unicodedata.normalize("NFC", body)
+        self.stats.fence_count += out.count("```")
+        self.stats.lines += out.count("\n")
+        return out
+
+    def feed(self, text: str) -> str:
+        """Consume a chunk; return the normalized text of every line it completed."""
+        return self._emit(self._lines(self._collapse(text)))
+
+    def settle(self) -> str:
+        """Emit the current line early once a held newline guarantees it is complete.
+
+        Whatever follows, at least one of the held newlines is emitted, so the
+        line is final. Settling at source boundaries keeps the carried state
+        small, which lets incremental builds reuse the next source's output.
+        """
+        if self.pending_nl and not self.nl_emitted:
+            self.nl_emitted = 1
+            return self._emit(self._lines("\n"))
+        return ""
+
+    def release(self) -> Optional[str]:
+        """Emit the held newlines (and the line they end) so the next text starts a fresh line.
+
+        Returns None, changing nothing, when no newline is held behind an
+        unterminated line. Text fed afterwards is normalized exactly as if
+        nothing had been released.
+        """
+        if self.carry and self.pending_nl == self.nl_emitted:
+            return None
+        body = "\n" * (self.pending_nl - self.nl_emitted)
+        self.nl_emitted = self.pending_nl
+        return self._emit(self._lines(body))
+
+    def splice(self, rec: dict) -> None:
+        """Account for a clean source (see docsyn_lib.clean) copied verbatim after release()."""
+        self.stats.add(rec["stats"])
+        self.pending_nl, self.nl_emitted = rec["exit"]["pending_nl"], rec["exit"]["nl_emitted"]
+        self.carry = rec["exit"]["carry"]
+        if self.first_h1 is None:
+            self.first_h1 = rec["first_h1"]
+        if rec["last_h1"] is not None:
+            self.prev_h = rec["last_h1"]
+
+    def close(self) -> str:
+        """Flush held newlines and the final line (which always gets a trailing newline)."""
+        tail = "\n" * (self.pending_nl - self.nl_emitted) if self.pending_nl else "\n"
+        self.pending_nl = self.nl_emitted = 0
+        return self._emit(self._lines(tail))
+
+
+def normalize_ssot(text: str) -> Tuple[str, Dict]:
+    """Normalize a whole document in one pass; returns (output, stats dict)."""
+    norm = StreamNormalizer()
+    out = norm.feed(text) + norm.close()
+    return out, norm.stats.as_dict()
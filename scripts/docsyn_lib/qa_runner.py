@@ -0,0 +1,60 @@
+"""
+DocSyn — concurrent runner for independent QA checks.
+
+A Check names the shared inputs it needs; each input is built once by its
+provider and passed to the check as a keyword argument. Providers start
+first, and every check starts as soon as its inputs are ready. The rest run
+concurrently on a thread pool (most checks wait on file reads and hashing,
+which release the GIL).
+
+Results come back in declaration order whatever order the checks finish
+in, so reports stay deterministic. Timings hold each check's and each
+input's wall time in seconds; the built inputs are returned as well.
+"""
+from __future__ import annotations
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, NamedTuple, Sequence, Tuple
+
+
+class Check(NamedTuple):
+    name: str
+    run: Callable[..., dict]
+    needs: Tuple[str, ...] = ()
+
+
+def _timed(fn: Callable, *args, **kwargs):
+    t0 = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, round(time.perf_counter() - t0, 4)
+
+
+def run_checks(checks: Sequence[Check], providers: Dict[str, Callable[[], object]], jobs: int = 1):
+    """Run checks; returns ({check: result}, {"checks": {check: s}, "inputs": {input: s}}, {input: value})."""
+    needed = [n for n in providers if any(n in c.needs for c in checks)]
+    timings: dict = {"checks": {}, "inputs": {}}
+    if jobs <= 1:
+        inputs = {}
+        for n in needed:
+            inputs[n], timings["inputs"][n] = _timed(providers[n])
+        results = {}
+        for c in checks:
+            results[c.name], timings["checks"][c.name] = _timed(c.run, **{n: inputs[n] for n in c.needs})
+        return results, timings, inputs
+
+    with ThreadPoolExecutor(max_workers=jobs, thread_name_prefix="docsyn-qa") as pool:
+        # Providers are queued first, so a check waiting on one never holds up its producer
+        pending_inputs = {n: pool.submit(_timed, providers[n]) for n in needed}
+
+        def run(c: Check):
+            kwargs = {n: pending_inputs[n].result()[0] for n in c.needs}
+            return _timed(c.run, **kwargs)
+
+        pending = [(c.name, pool.submit(run, c)) for c in checks]
+        results = {}
+        for name, fut in pending:
+            results[name], timings["checks"][name] = fut.result()
+        inputs = {}
+        for n, fut in pending_inputs.items():
+            inputs[n], timings["inputs"][n] = fut.result()
+    return results, timings, inputs
@@ -0,0 +1,60 @@
+"""
+DocSyn — build record with digests computed while the artifacts are written.
+
+The assembler hashes every artifact as it writes it and records the SHA-256,
+size and mtime in dist/BUILD_RECORD.json. Verification reads the digest from
+the record instead of re-reading the artifact. The record is trusted only
+while the file's size and mtime still match what was recorded; otherwise, or
+with paranoid=True, the file is hashed again.
+"""
+from __future__ import annotations
+import hashlib
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from docsyn_lib.cache import load_json, sha256_file, stat_sig, write_json
+
+RECORD_NAME = "BUILD_RECORD.json"
+RECORD_VERSION = 1
+
+
+def digest_bytes(data: bytes) -> dict:
+    return {"sha256": hashlib.sha256(data).hexdigest(), "bytes": len(data)}
+
+
+def write_record(outdir: Path, digests: Dict[str, dict]) -> Path:
+    """Record digests ({name: {"sha256", "bytes"}}) with each file's current size and mtime."""
+    artifacts = {}
+    for name, d in sorted(digests.items()):
+        size, mtime_ns = stat_sig(outdir / name)
+        if size != d["bytes"]:
+            raise ValueError(f"{name}: {size} bytes on disk, {d['bytes']} written")
+        artifacts[name] = {"sha256": d["sha256"], "bytes": size, "mtime_ns": mtime_ns}
+    path = outdir / RECORD_NAME
+    write_json(path, {"version": RECORD_VERSION, "artifacts": artifacts})
+    return path
+
+
+def recorded_digest(outdir: Path, name: str) -> Optional[str]:
+    """SHA-256 from the record if it still describes the file on disk, else None."""
+    record = load_json(outdir / RECORD_NAME, {})
+    entry = (record.get("artifacts") or {}).get(name) if record.get("version") == RECORD_VERSION else None
+    try:
+        if entry and stat_sig(outdir / name) == [entry["bytes"], entry["mtime_ns"]]:
+            return entry["sha256"]
+    except OSError:
+        pass
+    return None
+
+
+def artifact_sha256(outdir: Path, name: str, paranoid: bool = False) -> Tuple[str, str]:
+    """(sha256, source) for an artifact; source is "record", "rehash" or "rehash-mismatch".
+
+    "rehash-mismatch" means paranoid mode found content that disagrees with a
+    record that still looked current.
+    """
+    recorded = recorded_digest(outdir, name)
+    if recorded and not paranoid:
+        return recorded, "record"
+    digest = sha256_file(outdir / name)
+    return digest, "rehash-mismatch" if recorded and recorded != digest else "rehash"
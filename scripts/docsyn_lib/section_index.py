@@ -0,0 +1,175 @@
+"""
+DocSyn — byte-offset section index for the compiled SSOT, and a lazy reader.
+
+build_index() scans DocSyn_Compiled.md once (through mmap, bytes only) and
+maps every heading, every {{#ANCHOR}} and every source file to a byte range
+and the SHA-256 of that range:
+- a heading's section runs to the next heading of the same or a higher level,
+- an anchor covers the section of the heading it sits under,
+- a source covers the SSOT bytes produced from it (as reported by the
+  assembler; a last line without a trailing newline is flushed with the next
+  separator, so it falls outside the range).
+Headings and anchors inside ``` fences are ignored.
+
+CompiledReader opens the compiled file with mmap and returns one section per
+lookup, reading only that section's pages. It refuses an index whose recorded
+size no longer matches the file (StaleIndexError).
+"""
+from __future__ import annotations
+import hashlib
+import json
+import mmap
+import re
+from pathlib import Path
+from typing import Dict, List, Optional
+
+INDEX_VERSION = 1
+LINE_RE = re.compile(rb"(?m)^(?:(#{1,6})[ \t]+(.*?)[ \t]*|```[^\n]*|\{\{#([^}\n]+)\}\}[ \t]*)$")
+SLUG_STRIP_RE = re.compile(r"[^\w\s-]")
+
+
+class StaleIndexError(ValueError):
+    pass
+
+
+def index_path_for(ssot_path: Path) -> Path:
+    return ssot_path.with_name(ssot_path.stem + ".index.json")
+
+
+def slugify(title: str) -> str:
+    return re.sub(r"\s+", "-", SLUG_STRIP_RE.sub("", title.lower()).strip())
+
+
+def _range(buf, start: int, end: int) -> dict:
+    with memoryview(buf)[start:end] as view:
+        return {"start": start, "end": end, "sha256": hashlib.sha256(view).hexdigest()}
+
+
+def build_index(ssot_path: Path, sources: List[dict], root: Path, sha256: Optional[str] = None) -> dict:
+    """Index of headings, anchors and sources; `sources` are the assembler's {"path", "part", "start", "end"}.
+
+    `sha256` is the compiled file's digest when the caller already has it.
+    """
+    size = ssot_path.stat().st_size
+    with ssot_path.open("rb") as f:
+        buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        try:
+            return _scan(buf, size, sources, root, ssot_path.name, sha256)
+        finally:
+            if size:
+                buf.close()
+
+
+def _scan(buf, size: int, sources: List[dict], root: Path, name: str, sha256: Optional[str]) -> dict:
+    sections: List[dict] = []
+    anchors: Dict[str, dict] = {}
+    open_sections: List[int] = []      # indices of sections whose end is not known yet
+    in_fence = False
+    line, line_pos = 1, 0
+    for m in LINE_RE.finditer(buf):
+        if m.group(1) is None and m.group(3) is None:
+            in_fence = not in_fence
+            continue
+        if in_fence:
+            continue
+        line += buf[line_pos:m.start()].count(b"\n")
+        line_pos = m.start()
+        if m.group(1) is not None:
+            level = len(m.group(1))
+            while open_sections and sections[open_sections[-1]]["level"] >= level:
+                sections[open_sections.pop()]["end"] = m.start()
+            title = m.group(2).decode("utf-8", errors="replace")
+            sections.append({"level": level, "title": title, "slug": slugify(title), "line": line,
+                             "start": m.start(), "end": size})
+            open_sections.append(len(sections) - 1)
+        else:
+            anchor = m.group(3).decode("utf-8", errors="replace").strip()
+            if anchor not in anchors:
+                anchors[anchor] = {"section": open_sections[-1] if open_sections else None,
+                                   "line": line, "start": m.start()}
+
+    for s in sections:
+        s.update(_range(buf, s["start"], s["end"]))
+    for a in anchors.values():
+        if a["section"] is not None:
+            sec = sections[a["section"]]
+            a.update(_range(buf, sec["start"], sec["end"]))
+        else:
+            nxt = next((s["start"] for s in sections if s["start"] > a["start"]), size)
+            a.update(_range(buf, a["start"], nxt))
+    by_source = {}
+    for src in sources:
+        p = Path(src["path"])
+        rel = p.relative_to(root).as_posix() if p.is_absolute() and p.is_relative_to(root) else str(p)
+        by_source[rel] = dict(_range(buf, src["start"], src["end"]), part=src["part"])
+    if sha256 is None:
+        sha256 = _range(buf, 0, size)["sha256"]
+    return {"version": INDEX_VERSION, "file": name, "size": size, "sha256": sha256,
+            "sections": sections, "anchors": anchors, "sources": by_source}
+
+
+def write_index(ssot_path: Path, sources: List[dict], root: Path, sha256: Optional[str] = None) -> dict:
+    """Write the index next to the compiled file; returns its {"sha256", "bytes"}."""
+    out = index_path_for(ssot_path)
+    tmp = out.with_name(out.name + ".tmp")
+    data = json.dumps(build_index(ssot_path, sources, root, sha256), indent=1, ensure_ascii=False).encode("utf-8")
+    tmp.write_bytes(data)
+    tmp.replace(out)
+    return {"sha256": hashlib.sha256(data).hexdigest(), "bytes": len(data)}
+
+
+class CompiledReader:
+    """Section-at-a-time access to the compiled SSOT through its index."""
+
+    def __init__(self, ssot_path: Path, index_path: Optional[Path] = None) -> None:
+        self.path = Path(ssot_path)
+        ipath = Path(index_path) if index_path else index_path_for(self.path)
+        self.index = json.loads(ipath.read_text(encoding="utf-8"))
+        if self.index.get("version") != INDEX_VERSION or self.index["size"] != self.path.stat().st_size:
+            raise StaleIndexError(f"{ipath} does not describe {self.path}; rebuild with assemble_ssot.py")
+        self._by_slug: Dict[str, dict] = {}
+        self._by_title: Dict[str, dict] = {}
+        for s in self.index["sections"]:
+            self._by_slug.setdefault(s["slug"], s)
+            self._by_title.setdefault(s["title"].strip().lower(), s)
+        self._file = self.path.open("rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.index["size"] else None
+
+    def close(self) -> None:
+        if self._mm is not None:
+            self._mm.close()
+        self._file.close()
+
+    def __enter__(self) -> "CompiledReader":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _entry(self, kind: str, key: str) -> Optional[dict]:
+        if kind == "anchor":
+            return self.index["anchors"].get(key.strip().strip("{}").lstrip("#"))
+        if kind == "source":
+            return self.index["sources"].get(key)
+        return self._by_title.get(key.strip().lower()) or self._by_slug.get(slugify(key))
+
+    def read(self, entry: dict, verify: bool = False) -> str:
+        data = self._mm[entry["start"]:entry["end"]] if self._mm is not None else b""
+        if verify and hashlib.sha256(data).hexdigest() != entry["sha256"]:
+            raise StaleIndexError(f"content of {self.path} changed at bytes {entry['start']}-{entry['end']}")
+        return data.decode("utf-8")
+
+    def anchor(self, name: str, verify: bool = False) -> Optional[str]:
+        """Section under {{#name}}; `name` may be given with or without the braces."""
+        entry = self._entry("anchor", name)
+        return self.read(entry, verify) if entry else None
+
+    def section(self, title: str, verify: bool = False) -> Optional[str]:
+        """First section whose heading matches `title` (case-insensitive) or its slug."""
+        entry = self._entry("section", title)
+        return self.read(entry, verify) if entry else None
+
+    def source(self, rel_path: str, verify: bool = False) -> Optional[str]:
+        """SSOT text produced from a curated source, e.g. "blueprints/janitor.md"."""
+        entry = self._entry("source", rel_path)
+        return self.read(entry, verify) if entry else None
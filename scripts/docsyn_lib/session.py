@@ -0,0 +1,108 @@
+"""
+DocSyn — state shared between pipeline stages running in one process.
+
+The `docsyn` runner (scripts/docsyn) executes promote, clean-staging, lift,
+assemble, router-test and qa back to back in a single interpreter and opens a
+Session around them. While it is active:
+- read_bytes() serves files from memory when their size and mtime
+  are unchanged since an earlier stage read them (up to max_bytes in total),
+  so the sources that lift, assembly and QA all look at are read once,
+- hash_memo() hands every stage the same HashMemo per memo file, and
+  digest() hashes through the build's memo (dist/.cache/HASHES.json), so
+  files clean-staging hashes are not hashed again by assembly,
+- shared() keeps any other object a later stage can reuse.
+Outside a session each helper falls through to a plain read or a fresh
+object, so the scripts behave exactly as before when run on their own.
+"""
+from __future__ import annotations
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+from docsyn_lib.cache import HashMemo, sha256_file, stat_sig
+
+DEFAULT_MAX_BYTES = 256 << 20
+
+
+class Session:
+    def __init__(self, root: Path, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self.root = Path(root).resolve()
+        self.max_bytes = max_bytes
+        self.objects: Dict[object, object] = {}
+        self.files: Dict[str, Tuple[list, bytes]] = {}
+        self.cached_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def shared(self, key, factory: Callable[[], object]):
+        with self._lock:
+            if key not in self.objects:
+                self.objects[key] = factory()
+            return self.objects[key]
+
+    def read_bytes(self, p: Path) -> bytes:
+        p = Path(p)
+        key, sig = str(p.resolve()), stat_sig(p)
+        cached = self.files.get(key)
+        if cached is not None and cached[0] == sig:
+            with self._lock:
+                self.hits += 1
+            return cached[1]
+        data = p.read_bytes()
+        with self._lock:
+            self.misses += 1
+            if self.cached_bytes + len(data) <= self.max_bytes:
+                old = self.files.get(key)
+                self.cached_bytes += len(data) - (len(old[1]) if old else 0)
+                self.files[key] = (sig, data)
+        return data
+
+    def close(self) -> None:
+        """Persist shared objects that have unsaved state (e.g. HashMemo)."""
+        for obj in self.objects.values():
+            save = getattr(obj, "save", None)
+            if callable(save):
+                save()
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "cached_mb": round(self.cached_bytes / 2**20, 1)}
+
+
+_current: Optional[Session] = None
+
+
+def current() -> Optional[Session]:
+    return _current
+
+
+@contextmanager
+def session(root: Path, max_bytes: int = DEFAULT_MAX_BYTES) -> Iterator[Session]:
+    """Make a Session current for the duration of the block, saving shared state on exit."""
+    global _current
+    previous, _current = _current, Session(root, max_bytes)
+    try:
+        yield _current
+    finally:
+        s, _current = _current, previous
+        s.close()
+
+
+def read_bytes(p: Path) -> bytes:
+    return _current.read_bytes(p) if _current is not None else Path(p).read_bytes()
+
+
+def shared(key, factory: Callable[[], object]):
+    return _current.shared(key, factory) if _current is not None else factory()
+
+
+def hash_memo(path: Path) -> HashMemo:
+    return shared(("hash-memo", str(Path(path).resolve())), lambda: HashMemo(path))
+
+
+def digest(p: Path) -> str:
+    """SHA-256 of a file; memoized by size and mtime in the build's memo during a session."""
+    if _current is None:
+        return sha256_file(Path(p))
+    return hash_memo(_current.root / "dist" / ".cache" / "HASHES.json").sha256(Path(p).resolve())
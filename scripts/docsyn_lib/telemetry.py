@@ -0,0 +1,182 @@
+"""
+DocSyn — per-stage telemetry shared by the pipeline scripts.
+
+Each script wraps its work in `with stage("assemble", dist) as m:` and, on
+exit, merges one entry into dist/BUILD_METRICS.json:
+- wall_s, cpu_s: elapsed and process CPU time (user + sys) for the stage,
+- peak_rss_mb: the process's peak resident set size (getrusage ru_maxrss),
+- files_read / files_written and bytes_read / bytes_written: every distinct
+  file under the project root the stage opened, seen through an audit hook
+  on "open" (the scripts' own code is excluded). Bytes are the size at open
+  time for reads and the final size for writes, so a file read twice counts
+  once and mmap or copy_file_range transfers count like plain reads,
+- cache: whatever hit/miss counters the stage reports via m.cache(),
+- exit: the stage's exit status (SystemExit code, 1 for an exception).
+
+Entries are keyed by stage name, so re-running a stage replaces its entry and
+the file always shows the latest run of each. Writers take an flock on the
+file, so stages may run concurrently.
+"""
+from __future__ import annotations
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+METRICS_NAME = "BUILD_METRICS.json"
+METRICS_VERSION = 1
+SCRIPTS = Path(__file__).resolve().parents[1]
+WRITE_FLAGS = os.O_WRONLY | os.O_RDWR | os.O_APPEND | os.O_CREAT | os.O_TRUNC
+
+_active = []   # open StageMetrics; the audit hook is installed once per process
+
+
+def _audit(event: str, args) -> None:
+    if not _active:
+        return
+    if event == "open":
+        for m in _active:
+            m._opened(*args[:3])
+    elif event == "os.rename":   # also raised by os.replace: credit temp-file writes to the target
+        for m in _active:
+            m._renamed(*args[:2])
+
+
+def peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    unit = 1 if sys.platform == "darwin" else 1024
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * unit / 2**20, 1)
+
+
+class StageMetrics:
+    def __init__(self, name: str, dist: Path, root: Optional[Path] = None) -> None:
+        self.name = name
+        self.dist = Path(dist).resolve()
+        self.root = Path(root).resolve() if root else self.dist.parent
+        self.reads: Dict[str, int] = {}
+        self.writes: set = set()
+        self.counters: Dict[str, int] = {}
+        self.extra: dict = {}
+        self.exit = 0
+
+    def _opened(self, path, mode, flags) -> None:
+        if not isinstance(path, (str, bytes, os.PathLike)):
+            return   # an fd
+        p = os.path.abspath(os.fsdecode(path))
+        if not p.startswith(str(self.root) + os.sep) or p.startswith(str(SCRIPTS) + os.sep):
+            return
+        if p == str(self.dist / METRICS_NAME) or p.endswith(".lock"):
+            return
+        if isinstance(mode, str):
+            writing = any(c in mode for c in "wax+")
+        else:
+            writing = bool((flags or 0) & WRITE_FLAGS)
+        if writing:
+            self.writes.add(p)
+        elif p not in self.reads:
+            try:
+                self.reads[p] = os.stat(p).st_size
+            except OSError:
+                pass
+
+    def _renamed(self, src, dst) -> None:
+        if isinstance(src, (str, bytes, os.PathLike)) and isinstance(dst, (str, bytes, os.PathLike)):
+            src = os.path.abspath(os.fsdecode(src))
+            if src in self.writes:
+                self.writes.discard(src)
+                self._opened(dst, "w", None)
+
+    def cache(self, name: str, hits: int = 0, misses: int = 0) -> None:
+        """Add to the hit/miss counters of one cache (e.g. "build", "clean")."""
+        self.counters[f"{name}_hits"] = self.counters.get(f"{name}_hits", 0) + hits
+        self.counters[f"{name}_misses"] = self.counters.get(f"{name}_misses", 0) + misses
+
+    def note(self, **values) -> None:
+        """Stage-specific values stored alongside the standard metrics."""
+        self.extra.update(values)
+
+    def as_dict(self, wall: float, cpu: float) -> dict:
+        written = 0
+        for p in self.writes:
+            try:
+                written += os.stat(p).st_size
+            except OSError:
+                pass   # written then removed (temp files)
+        entry = {
+            "wall_s": round(wall, 4),
+            "cpu_s": round(cpu, 4),
+            "peak_rss_mb": peak_rss_mb(),
+            "files_read": len(self.reads),
+            "files_written": len(self.writes),
+            "bytes_read": sum(self.reads.values()),
+            "bytes_written": written,
+            "cache": dict(sorted(self.counters.items())),
+            "exit": self.exit,
+            "finished_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        }
+        entry.update(self.extra)
+        return entry
+
+
+def merge_entry(dist: Path, name: str, entry: dict) -> Path:
+    """Replace `name`'s entry in dist/BUILD_METRICS.json under an exclusive lock."""
+    dist.mkdir(parents=True, exist_ok=True)
+    path = dist / METRICS_NAME
+    with open(dist / (METRICS_NAME + ".lock"), "w") as lock:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+            if data.get("version") != METRICS_VERSION:
+                raise ValueError
+        except (OSError, ValueError):
+            data = {"version": METRICS_VERSION, "stages": {}}
+        data["stages"][name] = entry
+        tmp = path.with_name(path.name + f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(data, indent=2), encoding="utf-8")
+        os.replace(tmp, path)
+    return path
+
+
+class stage:
+    """Context manager measuring one pipeline stage; yields its StageMetrics."""
+
+    _hooked = False
+
+    def __init__(self, name: str, dist: Path, root: Optional[Path] = None) -> None:
+        self.metrics = StageMetrics(name, dist, root)
+
+    def __enter__(self) -> StageMetrics:
+        if not stage._hooked:
+            sys.addaudithook(_audit)
+            stage._hooked = True
+        _active.append(self.metrics)
+        self._wall, self._cpu = time.perf_counter(), time.process_time()
+        return self.metrics
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        wall, cpu = time.perf_counter() - self._wall, time.process_time() - self._cpu
+        _active.remove(self.metrics)
+        m = self.metrics
+        if exc_type is SystemExit:
+            code = exc.code
+            m.exit = code if isinstance(code, int) else (0 if code is None else 1)
+        elif exc_type is not None:
+            m.exit = 1
+        try:
+            merge_entry(m.dist, m.name, m.as_dict(wall, cpu))
+        except OSError as e:
+            print(f"[WARN] could not write {METRICS_NAME}: {e}", file=sys.stderr)
@@ -0,0 +1,171 @@
+"""
+DocSyn — multi-pattern term scanner (Aho-Corasick over UTF-8 bytes).
+
+TermMatcher compiles a list of terms once into an automaton and then finds
+every occurrence of every term in a single pass over the input, so the cost
+of a scan grows with the text, not with the number of terms. Matching is
+case-sensitive and exact, like `term in text`; overlapping occurrences and
+terms contained in other terms are all reported.
+
+While the automaton sits in its root state no match is in progress, so the
+scanner jumps straight to the next position where some term's first bytes
+occur (one C-level regex search) and only steps byte by byte from there.
+
+Inputs:
+- scan(buf): bytes, bytearray or an mmap,
+- scan_file(path): mmaps the file,
+- scan_stream(f): reads a binary file object in chunks; memory stays at one
+  chunk plus the longest term, whatever the file or line length.
+Each returns Hit(term, line, col, offset) in order of position: line and col
+are 1-based, col counts characters, offset is the byte offset of the match.
+"""
+from __future__ import annotations
+import mmap
+import re
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterable, Iterator, List, NamedTuple
+
+CHUNK = 1 << 20
+PREFIX = 3   # leading bytes of each term the skip search looks for
+UTF8_CONT = bytes(range(0x80, 0xC0))
+
+
+class Hit(NamedTuple):
+    term: str
+    line: int
+    col: int
+    offset: int
+
+
+def _chars(data: bytes) -> int:
+    """Characters in UTF-8 bytes (continuation bytes do not start one)."""
+    return len(data.translate(None, UTF8_CONT))
+
+
+class _Locator:
+    """Line and column of increasing byte offsets, counted incrementally."""
+
+    def __init__(self) -> None:
+        self.line, self.col, self.pos = 1, 0, 0
+
+    def advance(self, buf, base: int, to: int) -> None:
+        """Move to absolute offset `to`; buf holds the bytes from absolute offset base."""
+        seg = buf[self.pos - base:to - base]
+        nl = seg.count(b"\n")
+        if nl:
+            self.line += nl
+            self.col = _chars(seg[seg.rfind(b"\n") + 1:])
+        else:
+            self.col += _chars(seg)
+        self.pos = to
+
+
+class TermMatcher:
+    def __init__(self, terms: Iterable[str]) -> None:
+        self.terms: List[str] = list(dict.fromkeys(terms))
+        if any(not t or "\n" in t for t in self.terms):
+            raise ValueError("terms must be non-empty single-line strings")
+        patterns = [t.encode("utf-8") for t in self.terms]
+        self._lengths = [len(p) for p in patterns]
+
+        # Trie, then failure links in BFS order folded into a full transition table:
+        # delta[s][byte] is the next state; bytes without an entry lead back to the root
+        goto: List[Dict[int, int]] = [{}]
+        out: List[List[int]] = [[]]
+        depth = [0]
+        for i, p in enumerate(patterns):
+            s = 0
+            for b in p:
+                if b not in goto[s]:
+                    goto[s][b] = len(goto)
+                    goto.append({})
+                    out.append([])
+                    depth.append(depth[s] + 1)
+                s = goto[s][b]
+            out[s].append(i)
+        fail = [0] * len(goto)
+        delta: List[Dict[int, int]] = [dict(goto[0])] + [{} for _ in goto[1:]]
+        queue = list(goto[0].values())
+        for s in queue:
+            if s:
+                out[s] += out[fail[s]]
+            for b, t in goto[s].items():
+                if s:
+                    fail[t] = delta[fail[s]].get(b, 0)
+                queue.append(t)
+            if s:
+                delta[s] = {**delta[fail[s]], **goto[s]}
+        self._delta = delta
+        self._out = [tuple(o) for o in out]
+        self._depth = depth
+        prefixes = sorted({p[:PREFIX] for p in patterns}, key=lambda p: (-len(p), p))
+        self._skip = re.compile(b"|".join(re.escape(p) for p in prefixes)) if prefixes else None
+
+    def _run(self, buf, pos: int, end: int, state: int, base: int, hits: list, final: bool):
+        """Advance the automaton over buf[pos:end], appending (start, term index) per match.
+
+        Positions are relative to buf; hit starts are absolute (base + ...).
+        Returns (position, state). Unless `final`, the scan may stop short of
+        `end` in the root state, leaving the last bytes, which could begin a
+        term, for the next call.
+        """
+        delta, out, lengths, skip = self._delta, self._out, self._lengths, self._skip
+        # Without more input, a term could begin at or after `limit` without its prefix being visible yet
+        limit = end if final else end - PREFIX + 1
+        while pos < end:
+            if state == 0:
+                m = skip.search(buf, pos, end)
+                if m is None or m.start() >= limit:
+                    return max(pos, limit), 0
+                pos = m.start()
+            state = delta[state].get(buf[pos], 0)
+            pos += 1
+            for i in out[state]:
+                hits.append((base + pos - lengths[i], i))
+        return pos, state
+
+    def scan(self, buf) -> List[Hit]:
+        """All hits in an in-memory buffer (bytes, bytearray or mmap)."""
+        if not self.terms or not len(buf):
+            return []
+        hits: list = []
+        self._run(buf, 0, len(buf), 0, 0, hits, True)
+        loc, located = _Locator(), []
+        for start, i in sorted(hits):
+            loc.advance(buf, 0, start)
+            located.append(Hit(self.terms[i], loc.line, loc.col + 1, start))
+        return located
+
+    def scan_file(self, path: Path) -> List[Hit]:
+        """All hits in a file, read through mmap."""
+        with open(path, "rb") as f:
+            if not self.terms or not f.seek(0, 2):
+                return []
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                return self.scan(buf)
+
+    def scan_stream(self, f: BinaryIO, chunk: int = CHUNK) -> Iterator[Hit]:
+        """Hits from a binary stream, read chunk by chunk; same results as scan()."""
+        if not self.terms:
+            return
+        loc = _Locator()
+        buf, base, pos, state = b"", 0, 0, 0   # buf holds the bytes from absolute offset base on
+        held: list = []                        # hits that a later chunk could still precede
+        while True:
+            data = f.read(chunk)
+            final = not data
+            buf += data
+            pos, state = self._run(buf, pos - base, len(buf), state, base, held, final)
+            pos += base
+            # Later matches start at or after the partial match in progress (or the unscanned tail)
+            cut = base + len(buf) if final else pos - self._depth[state]
+            held.sort()
+            ready = [h for h in held if h[0] < cut]
+            held = held[len(ready):]
+            for start, i in ready:
+                loc.advance(buf, base, start)
+                yield Hit(self.terms[i], loc.line, loc.col + 1, start)
+            if final:
+                return
+            loc.advance(buf, base, cut)
+            buf, base = buf[cut - base:], cut
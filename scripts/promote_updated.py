@@ -3,6 +3,9 @@ import shutil, sys, time, json, os, re
 from pathlib import Path
 from typing import Optional
 
+from docsyn_lib import frontmatter
+from docsyn_lib.telemetry import stage
+
 PROJ = Path(__file__).resolve().parents[1]
 UPDATED = PROJ / "merge_pr" / "updated"
 BLUEPRINTS = PROJ / "blueprints"
@@ -63,30 +66,6 @@ def suggest_router_mapping(slug: str, code_hint: Optional[str] = None) -> None:
     with suggestions_file.open("a", encoding="utf-8") as f:
         f.write(line)
 
-def parse_front_matter(content: str) -> dict:
-    """Extract YAML front-matter from markdown content."""
-    lines = content.split('\n')
-    if not lines or not lines[0].strip() == '---':
-        return {}
-    
-    try:
-        end_idx = lines[1:].index('---') + 1
-        front_matter_lines = lines[1:end_idx]
-        
-        # Simple YAML parser for basic key: value pairs
-        metadata = {}
-        for line in front_matter_lines:
-            line = line.strip()
-            if ':' in line and not line.startswith('#'):
-                key, value = line.split(':', 1)
-                key = key.strip()
-                value = value.strip().strip('"\'')
-                metadata[key] = value
-        
-        return metadata
-    except (ValueError, IndexError):
-        return {}
-
 def determine_target_path(src_path: Path, metadata: dict) -> Path:
     """Determine where to promote the file based on front-matter."""
     # Check for part: A (goes to core)
@@ -95,7 +74,7 @@ def determine_target_path(src_path: Path, metadata: dict) -> Path:
     
     # Check for blueprint: <slug> (goes to blueprints)
     if 'blueprint' in metadata:
-        blueprint_slug = metadata['blueprint']
+        blueprint_slug = str(metadata['blueprint'])
         slug = _slugify(blueprint_slug)
         
         # Ensure blueprint anchor exists
@@ -125,11 +104,12 @@ def main():
     # promote with front-matter awareness
     promoted = []
     auto_created = []
+    index = frontmatter.FrontMatterIndex.in_dist(DIST)
     
     for src in UPDATED.glob("*.md"):
         try:
-            content = src.read_text(encoding="utf-8")
-            metadata = parse_front_matter(content)
+            fm = index.get(src)
+            metadata = fm.data if fm else {}
             dst = determine_target_path(src, metadata)
             
             # Ensure target directory exists
@@ -141,7 +121,7 @@ def main():
             
             # Track auto-created blueprints
             if 'blueprint' in metadata:
-                slug = _slugify(metadata['blueprint'])
+                slug = _slugify(str(metadata['blueprint']))
                 if (BLUEPRINTS / f"{slug}.md").exists() and slug != src.stem:
                     auto_created.append(f"{slug}.md")
                     
@@ -151,6 +131,7 @@ def main():
             dst = BLUEPRINTS / src.name
             shutil.copy2(src, dst)
             promoted.append(f"{src.name} → {dst.relative_to(PROJ)} (fallback)")
+    index.save()
 
     # safety net: no shrinks > 20%
     sizes_new = {p.name: p.stat().st_size for p in BLUEPRINTS.glob("*.md")}
@@ -188,5 +169,10 @@ def main():
     if shrunk:
         print("[WARN] Some blueprints shrank > 20%:", shrunk)
 
+def run(argv=None) -> int:
+    with stage("promote", DIST):
+        main()
+    return 0
+
 if __name__ == "__main__":
-    main()
+    sys.exit(run())
@@ -5,40 +5,106 @@ Ensures clean, consistent output free of contamination from previous document ba
 Supports policy-aware validation for vendor-specific content.
 """
 
+import argparse
+import os
 import re
 import json
 import sys
-try:
-    import yaml  # PyYAML
-except ModuleNotFoundError:
-    print("[ERROR] Missing dependency: PyYAML. Install with:")
-    print("  pip install -r scripts/requirements.txt")
-    raise
 import unicodedata
 from pathlib import Path
+from typing import Optional
+
+from docsyn_lib import frontmatter, session
+from docsyn_lib.cache import BuildCache, HashMemo, VerdictCache, stat_sig
+from docsyn_lib.loader import decode_text
+from docsyn_lib.qa_runner import Check, run_checks
+from docsyn_lib.record import artifact_sha256
+from docsyn_lib.telemetry import stage
+from docsyn_lib.termscan import TermMatcher
 
 ROOT = Path(__file__).resolve().parent.parent
 DIST_DIR = ROOT / "dist"
 COMPILED_FILE = DIST_DIR / "DocSyn_Compiled.md"
+QA_CACHE = DIST_DIR / ".cache" / "qa"
 
 # Constants for policy-aware validation
 FORBIDDEN_TERMS = ["Claude Code", "Claude AI", "Single Source of Truth"]
 MIN_BYTES_BLUEPRINT = 1000
+VERDICT_VERSION = 1   # bump when the meaning of a cached per-file verdict changes
 
-# Helper: read YAML front-matter if present
-def read_front_matter(path: Path):
-    if yaml is None:
-        return {}  # Skip YAML parsing if module not available
-    try:
-        text = path.read_text(encoding="utf-8")
-        if text.startswith("---"):
-            end = text.find("\n---", 3)
-            if end != -1:
-                fm = text[3:end].strip()
-                return yaml.safe_load(fm) or {}
-    except Exception:
-        pass
-    return {}
+class FileRecord:
+    """A blueprint seen by BlueprintScan, with its per-file verdict."""
+    __slots__ = ("path", "rel", "verdict")
+
+    def __init__(self, path: Path, rel: str, verdict: dict):
+        self.path, self.rel, self.verdict = path, rel, verdict
+
+class BlueprintScan:
+    """One traversal of blueprints/ producing a verdict per file for the per-file checks.
+
+    A verdict holds the file's size, its forbidden-term hits and its policy
+    classification (vendor-specific, anchor). With a VerdictCache, a file
+    whose content digest (from its size and mtime) already has a verdict for
+    the current check configuration is neither read nor parsed; any other
+    file is read once and its front matter parsed at most once. The counters
+    end up in the QA report so extra reads or parses show up as a regression.
+    """
+
+    def __init__(self, root: Path = ROOT, cache: Optional[VerdictCache] = None, memo: Optional[HashMemo] = None):
+        self.reads = 0
+        self.fm_parses = 0
+        self.cache_hits = 0
+        self.records = []
+        self._matcher = None
+        for path in sorted(Path(root / "blueprints").rglob("*.md")):
+            rel = str(path.relative_to(root))
+            verdict = None
+            if cache is not None:
+                sig = stat_sig(path)
+                sha = memo.peek(path, sig)
+                verdict = cache.get(sha) if sha else None
+            if verdict is not None and verdict["path"] == rel:
+                self.cache_hits += 1
+            else:
+                data = session.read_bytes(path)
+                self.reads += 1
+                verdict = self._evaluate(path, rel, data)
+                if cache is not None:
+                    cache.put(memo.remember(path, sig, data), verdict)
+            self.records.append(FileRecord(path, rel, verdict))
+
+    def _evaluate(self, path: Path, rel: str, data: bytes) -> dict:
+        if self._matcher is None:
+            self._matcher = TermMatcher(FORBIDDEN_TERMS)
+        fm = self._front_matter(data)
+        return {
+            "path": rel,
+            "size": len(data),
+            "hits": [{"term": h.term, "line": h.line, "col": h.col} for h in self._matcher.scan(data)],
+            "vendor": is_vendor_specific(path, fm),
+            "anchor": is_anchor(path, fm),
+        }
+
+    def _front_matter(self, data: bytes) -> dict:
+        fm = frontmatter.split(data)
+        if fm is None:
+            return {}
+        self.fm_parses += 1
+        return fm.data
+
+    def stats(self) -> dict:
+        return {"files": len(self.records), "reads": self.reads, "fm_parses": self.fm_parses,
+                "bytes": sum(r.verdict["size"] for r in self.records),
+                "cache_hits": self.cache_hits, "cache_misses": len(self.records) - self.cache_hits}
+
+def check_config_key() -> str:
+    """Digest of everything a per-file verdict depends on; cached verdicts are valid only under it."""
+    import inspect   # only needed with the verdict cache; costly to import
+    parts = [json.dumps({"terms": FORBIDDEN_TERMS, "min_bytes": MIN_BYTES_BLUEPRINT, "version": VERDICT_VERSION})]
+    parts += [inspect.getsource(f) for f in (is_vendor_specific, is_anchor, BlueprintScan)]
+    parts += [(Path(__file__).parent / "docsyn_lib" / name).read_text(encoding="utf-8")
+              for name in ("termscan.py", "frontmatter.py")]
+    return BuildCache.key(parts)
 
 # Helper: policy classification
 def is_vendor_specific(path: Path, fm: dict) -> bool:
@@ -54,34 +120,38 @@ def is_vendor_specific(path: Path, fm: dict) -> bool:
 def is_anchor(path: Path, fm: dict) -> bool:
     return bool(fm.get("anchor") is True)
 
-def check_forbidden_terms():
-    """Check for forbidden terms with policy awareness for vendor-specific files."""
+def check_forbidden_terms(files=None):
+    """Check for forbidden terms with policy awareness for vendor-specific files.
+
+    All terms are matched in one pass per file; every occurrence is reported
+    with its line and column under "forbidden_hits".
+    """
     problems = []
     warnings = []
+    locations = {}
     
-    for path in Path(ROOT / "blueprints").rglob("*.md"):
-        fm = read_front_matter(path)
-        text = path.read_text(encoding="utf-8", errors="replace")
-        hits = [t for t in FORBIDDEN_TERMS if t in text]
+    for rec in (files or BlueprintScan()).records:
+        found = rec.verdict["hits"]
         
-        if hits:
-            rel_path = str(path.relative_to(ROOT))
-            if is_vendor_specific(path, fm):
-                warnings.append((rel_path, hits))
+        if found:
+            seen = {h["term"] for h in found}
+            hits = [t for t in FORBIDDEN_TERMS if t in seen]
+            locations[rec.rel] = found
+            if rec.verdict["vendor"]:
+                warnings.append((rec.rel, hits))
             else:
-                problems.append((rel_path, hits))
+                problems.append((rec.rel, hits))
     
-    return {"forbidden_problems": problems, "forbidden_warnings": warnings}
+    return {"forbidden_problems": problems, "forbidden_warnings": warnings, "forbidden_hits": locations}
 
-def check_blueprint_sizes():
+def check_blueprint_sizes(files=None):
     """Check blueprint file sizes with anchor exemption."""
     small = []
-    for path in Path(ROOT / "blueprints").rglob("*.md"):
-        fm = read_front_matter(path)
-        if is_anchor(path, fm):   # anchor files are exempt
+    for rec in (files or BlueprintScan()).records:
+        if rec.verdict["anchor"]:   # anchor files are exempt
             continue
-        if path.stat().st_size < MIN_BYTES_BLUEPRINT:
-            small.append(str(path.relative_to(ROOT)))
+        if rec.verdict["size"] < MIN_BYTES_BLUEPRINT:
+            small.append(rec.rel)
     return {"small_blueprints": small}
 
 def check_unicode_integrity():
@@ -131,7 +201,7 @@ def check_router_contract():
     if not router_file.exists():
         return {"router_contract": "FAIL", "error": "Router file missing"}
     
-    router = router_file.read_text(encoding="utf-8")
+    router = decode_text(session.read_bytes(router_file), errors="strict")
     missing_codes = []
     missing_mappings = []
     
@@ -151,8 +221,12 @@ def check_router_contract():
     
     return {"router_contract": "OK"}
 
-def check_determinism():
-    """Verify build determinism by checking if multiple builds produce same hash."""
+def check_determinism(paranoid=False):
+    """Verify build determinism by checking if multiple builds produce same hash.
+
+    The current hash comes from dist/BUILD_RECORD.json unless it is stale or
+    paranoid is set, in which case the compiled file is re-hashed.
+    """
     if not COMPILED_FILE.exists():
         return {"determinism": "FAIL", "error": "Compiled file not found"}
     
@@ -160,30 +234,57 @@ def check_determinism():
     if not baseline_file.exists():
         return {"determinism": "UNKNOWN", "error": "Baseline not found"}
     
-    import hashlib
-    current_hash = hashlib.sha256(COMPILED_FILE.read_bytes()).hexdigest()
+    current_hash, hash_source = artifact_sha256(DIST_DIR, COMPILED_FILE.name, paranoid)
     baseline_hash = baseline_file.read_text().strip()
     
-    return {
+    result = {
         "determinism": "OK" if current_hash == baseline_hash else "FAIL",
         "current_hash": current_hash,
-        "baseline_hash": baseline_hash
+        "baseline_hash": baseline_hash,
+        "hash_source": hash_source
     }
+    if hash_source == "rehash-mismatch":
+        result.update(determinism="FAIL", error="Compiled file does not match BUILD_RECORD.json")
+    return result
 
-def main():
+def qa_checks(paranoid=False):
+    """The QA checks in report order; "files" is the shared BlueprintScan of blueprints/."""
+    return [
+        Check("forbidden_terms", check_forbidden_terms, ("files",)),
+        Check("blueprint_sizes", check_blueprint_sizes, ("files",)),
+        Check("unicode", check_unicode_integrity),
+        Check("required_files", check_required_files),
+        Check("router_contract", check_router_contract),
+        Check("determinism", lambda: check_determinism(paranoid)),
+    ]
+
+def main(metrics=None, argv=None):
     """Run all QA checks and generate report."""
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--paranoid", action="store_true", help="Re-hash build outputs instead of trusting dist/BUILD_RECORD.json")
+    ap.add_argument("--jobs", type=int, default=min(6, os.cpu_count() or 1), help="Checks run concurrently (1 = sequential)")
+    ap.add_argument("--no-cache", action="store_true", help="Cold run: re-check every file; do not read or write dist/.cache/qa")
+    args = ap.parse_args(argv)
+
+    cache = memo = None
+    if not args.no_cache:
+        cache = VerdictCache(QA_CACHE / "VERDICTS.json", check_config_key())
+        memo = HashMemo(QA_CACHE / "HASHES.json")
+
     report = {
         "timestamp": str(Path().cwd()),
         "checks": {}
     }
     
-    # Run all checks
-    report["checks"]["forbidden_terms"] = check_forbidden_terms()
-    report["checks"]["blueprint_sizes"] = check_blueprint_sizes()
-    report["checks"]["unicode"] = check_unicode_integrity()
-    report["checks"]["required_files"] = check_required_files()
-    report["checks"]["router_contract"] = check_router_contract()
-    report["checks"]["determinism"] = check_determinism()
+    # Run all checks; the per-file ones share a single read of blueprints/
+    providers = {"files": lambda: BlueprintScan(ROOT, cache, memo)}
+    report["checks"], report["timings"], inputs = run_checks(qa_checks(args.paranoid), providers, args.jobs)
+    report["scan"] = inputs["files"].stats()
+    if cache is not None:
+        cache.save()
+        memo.save()
+    if metrics is not None:
+        metrics.cache("qa", hits=report["scan"]["cache_hits"], misses=report["scan"]["cache_misses"])
     
     # Check for failures (only problems, not warnings)
     has_failures = (
@@ -201,6 +302,8 @@ def main():
         print("❌ FORBIDDEN TERMS IN NON-VENDOR FILES:")
         for file, terms in forbidden_check["forbidden_problems"]:
             print(f"   {file}: {', '.join(terms)}")
+            for hit in forbidden_check["forbidden_hits"][file]:
+                print(f"      {file}:{hit['line']}:{hit['col']}: {hit['term']}")
     else:
         print("✅ Forbidden terms check: CLEAN")
     
@@ -295,6 +398,10 @@ def main():
         summary_lines.extend([
             "## Forbidden Terms in Non-Vendor Files:",
             *[f"- {file}: {', '.join(terms)}" for file, terms in forbidden_check["forbidden_problems"]],
+            "",
+            "### Locations:",
+            *[f"- {file}:{hit['line']}:{hit['col']}: {hit['term']}"
+              for file, _ in forbidden_check["forbidden_problems"] for hit in forbidden_check["forbidden_hits"][file]],
             ""
         ])
     
@@ -325,5 +432,10 @@ def main():
     
     return 0 if not has_failures else 1
 
+def run(argv=None) -> int:
+    with stage("qa", DIST_DIR) as metrics:
+        metrics.exit = main(metrics, argv)
+    return metrics.exit
+
 if __name__ == "__main__":
-    sys.exit(main())
+    sys.exit(run())
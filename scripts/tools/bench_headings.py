@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Benchmark curator_lib.norm.heading_iter against the prefix-rescanning original.
+
+The input is --input FILE (default: blueprints/claude-code-bible.md) repeated
+up to --mb megabytes. heading_iter runs on all of it. The reference, which
+counts the lines and bytes of md[:start] for every heading, is quadratic, so
+it runs on the first --reference-mb megabytes only; both must agree there,
+and its time on the full input is extrapolated from the measured quadratic
+growth.
+
+Usage: python3 scripts/tools/bench_headings.py [--mb 10] [--reference-mb 1]
+"""
+import argparse, math, sys, time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from curator_lib.norm import HEADING_RE, Heading, heading_iter
+
+def prefix_rescan(md: str):
+    """Reference: line number and byte offset of each heading from the text before it."""
+    out = []
+    for m in HEADING_RE.finditer(md):
+        start = len(md[:m.start()].encode("utf-8"))
+        out.append(Heading(m.group("title"), len(m.group("hashes")), md[:m.start()].count("\n") + 1,
+                           start, start + len(m.group().encode("utf-8"))))
+    return out
+
+def scaled(base: str, mb: float) -> str:
+    size = len(base.encode("utf-8"))
+    text = base * max(1, int(mb * 1e6 // size))
+    return text[:int(mb * 1e6)]
+
+def timed(fn, text: str):
+    t0 = time.perf_counter()
+    result = list(fn(text))
+    return time.perf_counter() - t0, result
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--input", default="blueprints/claude-code-bible.md")
+    ap.add_argument("--mb", type=float, default=10, help="Input size for heading_iter")
+    ap.add_argument("--reference-mb", type=float, default=1, help="Input size for the quadratic reference")
+    args = ap.parse_args()
+
+    base = Path(args.input).read_text(encoding="utf-8", errors="ignore")
+    if not base:
+        print(f"ERROR: empty input: {args.input}", file=sys.stderr)
+        sys.exit(2)
+    text, small = scaled(base, args.mb), scaled(base, args.reference_mb)
+
+    t_half, _ = timed(prefix_rescan, small[:len(small) // 2])
+    t_ref, ref = timed(prefix_rescan, small)
+    t_small, fast_small = timed(heading_iter, small)
+    if fast_small != ref:
+        print("ERROR: heading_iter differs from the prefix-rescanning reference", file=sys.stderr)
+        sys.exit(1)
+    t_fast, fast = timed(heading_iter, text)
+
+    mb, ref_mb = len(text.encode("utf-8")) / 1e6, len(small.encode("utf-8")) / 1e6
+    growth = t_ref / t_half if t_half > 0 else 4.0   # ~4 per doubling when quadratic
+    t_ref_est = t_ref * growth ** max(0.0, math.log2(mb / ref_mb))
+    print(f"input: {args.input}, {len(fast)} headings in {mb:.1f} MB")
+    print(f"reference (prefix rescan): {t_ref:.3f}s on {ref_mb:.1f} MB, {growth:.1f}x per doubling; "
+          f"~{t_ref_est:.0f}s extrapolated to {mb:.1f} MB")
+    print(f"heading_iter (one pass):   {t_small:.3f}s on {ref_mb:.1f} MB, {t_fast:.3f}s on {mb:.1f} MB ({mb / t_fast:.1f} MB/s)")
+    print(f"speedup:                   {t_ref / t_small:.0f}x at {ref_mb:.1f} MB, ~{t_ref_est / t_fast:.0f}x at {mb:.1f} MB")
+
+if __name__ == "__main__":
+    main()
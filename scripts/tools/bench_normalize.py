@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Benchmark the fused SSOT normalizer against the original multi-pass pipeline.
+
+The input is the raw (pre-normalization) SSOT assembled from the manifest, or
+--input FILE, repeated --repeat times to scale it up. Both implementations
+must produce identical text and statistics; the run fails otherwise.
+
+Usage: python3 scripts/tools/bench_normalize.py [--repeat 50] [--runs 3]
+"""
+import argparse, json, re, sys, time, unicodedata
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from docsyn_lib.assembly import BANNER, DIVIDER, SEPARATORS
+from docsyn_lib.normalize import GLOBAL_UNIQUE, normalize_ssot
+
+def multi_pass(md: str):
+    """Reference: the original collapse / splitlines / H1 dedup / NFC / count passes."""
+    md = re.sub(r"\n{3,}", "\n\n", md)
+    if not md.endswith("\n"):
+        md += "\n"
+    out_lines, prev_h, dropped = [], None, 0
+    for ln in md.splitlines():
+        m = re.match(r"^#\s+(.+)$", ln)
+        if m:
+            h = m.group(1).strip().lower()
+            if h == prev_h:
+                dropped += 1
+                continue
+            prev_h = h
+        out_lines.append(ln)
+    ssot = unicodedata.normalize("NFC", "\n".join(out_lines) + "\n")
+    headings = {f"h{i}": 0 for i in range(1, 7)}
+    for m in re.finditer(r"^(#{1,6})\s", ssot, flags=re.M):
+        headings[f"h{len(m.group(1))}"] += 1
+    return ssot, {
+        "fence_count": ssot.count("```"),
+        "unique_counts": {g: len(re.findall(rf"^#.*{re.escape(g)}", ssot, flags=re.M|re.I)) for g in GLOBAL_UNIQUE},
+        "headings": headings,
+        "h1_deduped": dropped,
+        "lines": ssot.count("\n"),
+    }
+
+def raw_ssot(manifest_path: Path) -> str:
+    root = manifest_path.resolve().parent
+    sources = sorted(json.loads(manifest_path.read_text(encoding="utf-8")).get("curated_sources", []))
+    read = lambda rel: (root / rel).read_text(encoding="utf-8", errors="ignore") if (root / rel).exists() else ""
+    core = [read(p) for p in sources if "/core/" in p or p.startswith("core/")]
+    bps = [read(p) for p in sources if "/blueprints/" in p or p.startswith("blueprints/")]
+    return BANNER + SEPARATORS["A"].join(core) + DIVIDER + SEPARATORS["B"].join(bps)
+
+def best_of(fn, text: str, runs: int):
+    best, result = None, None
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        result = fn(text)
+        dt = time.perf_counter() - t0
+        best = dt if best is None else min(best, dt)
+    return best, result
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--manifest", default="build.manifest.json")
+    ap.add_argument("--input", help="Raw markdown to normalize instead of the manifest sources")
+    ap.add_argument("--repeat", type=int, default=20, help="Concatenate the input this many times")
+    ap.add_argument("--runs", type=int, default=3, help="Report the best of N runs")
+    args = ap.parse_args()
+
+    base = Path(args.input).read_text(encoding="utf-8", errors="ignore") if args.input else raw_ssot(Path(args.manifest))
+    text = base * args.repeat
+    mb = len(text.encode("utf-8")) / 1e6
+
+    t_multi, (out_multi, stats_multi) = best_of(multi_pass, text, args.runs)
+    t_fused, (out_fused, stats_fused) = best_of(normalize_ssot, text, args.runs)
+
+    if out_multi != out_fused or stats_multi != stats_fused:
+        print("ERROR: fused normalizer output differs from the multi-pass reference", file=sys.stderr)
+        sys.exit(1)
+
+    print(f"input: {mb:.1f} MB ({args.repeat}x), best of {args.runs}")
+    print(f"multi-pass: {t_multi:.3f}s ({mb / t_multi:.1f} MB/s)")
+    print(f"fused:      {t_fused:.3f}s ({mb / t_fused:.1f} MB/s)")
+    print(f"speedup:    {t_multi / t_fused:.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Scaling benchmark for the DocSyn pipeline on synthetic corpora.
+
+For each --scales entry a corpus is generated with gen_synthetic_corpus.py
+(1 = the ~500 KB reference size) and these stages run in order, each as its
+own process with the corpus as the project root:
+  promote, assemble, ci_consolidate, ci_validate, qa
+Per stage we record wall time, CPU time (user + sys of the child) and peak
+RSS, taking the best of --repeat runs. A stage's exit status is recorded but
+does not stop the run (ci_validate and qa are expected to flag the leaked
+blocks the generator plants).
+
+Results go to dist/BENCH_PIPELINE.json. They are compared with
+tests/BENCH_BASELINE.json: a metric regresses when it exceeds the baseline by
+more than --tolerance and by more than the noise floor (50 ms / 8 MB). Any
+regression exits 1. --update-baseline rewrites the baseline from this run.
+
+Usage: python3 scripts/tools/bench_pipeline.py [--scales 1,10,100] [--repeat 3]
+"""
+import argparse, json, os, platform, shutil, sys, tempfile, time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from gen_synthetic_corpus import generate
+
+PROJ = Path(__file__).resolve().parents[2]
+BASELINE = PROJ / "tests" / "BENCH_BASELINE.json"
+STAGES = [
+    ("promote", ["scripts/promote_updated.py"]),
+    ("assemble", ["scripts/assemble_ssot.py", "--no-cache"]),
+    ("ci_consolidate", ["scripts/ci_consolidate.py"]),
+    ("ci_validate", ["scripts/ci_validate.py"]),
+    ("qa", ["scripts/qa_build.py"]),
+]
+NOISE = {"wall_s": 0.05, "cpu_s": 0.05, "peak_rss_mb": 8.0}
+# ru_maxrss is KiB on Linux, bytes on macOS
+RSS_UNIT = 1 if sys.platform == "darwin" else 1024
+
+
+def run_stage(root: Path, argv: list) -> dict:
+    """Run one stage in root; wall, child CPU and peak RSS come from wait4()."""
+    t0 = time.perf_counter()
+    pid = _spawn(root, argv)
+    _, status, ru = os.wait4(pid, 0)
+    wall = time.perf_counter() - t0
+    return {"wall_s": round(wall, 4), "cpu_s": round(ru.ru_utime + ru.ru_stime, 4),
+            "peak_rss_mb": round(ru.ru_maxrss * RSS_UNIT / 2**20, 1), "exit": os.waitstatus_to_exitcode(status)}
+
+
+def _spawn(root: Path, argv: list) -> int:
+    """fork + exec rather than subprocess, so wait4() reports this child alone (output discarded)."""
+    pid = os.fork()
+    if pid == 0:
+        try:
+            os.chdir(root)
+            null = os.open(os.devnull, os.O_RDWR)
+            for fd in (0, 1, 2):
+                os.dup2(null, fd)
+            os.execv(sys.executable, [sys.executable, *argv])
+        finally:
+            os._exit(127)
+    return pid
+
+
+def bench_scale(scale: float, repeat: int, seed: int, keep: bool) -> dict:
+    root = Path(tempfile.mkdtemp(prefix=f"docsyn-bench-{scale:g}x-"))
+    try:
+        t0 = time.perf_counter()
+        corpus = generate(root, scale, seed)
+        corpus["generate_s"] = round(time.perf_counter() - t0, 2)
+        pristine = {d: root / f".pristine-{d}" for d in ("blueprints", "merge_pr")}
+        for d, copy in pristine.items():
+            shutil.copytree(root / d, copy)
+        best = {}
+        for _ in range(repeat):
+            # promote moves staged files, so every repetition starts from the generated tree
+            for d, copy in pristine.items():
+                shutil.rmtree(root / d)
+                shutil.copytree(copy, root / d)
+            shutil.rmtree(root / "dist", ignore_errors=True)
+            for name, argv in STAGES:
+                r = run_stage(root, argv)
+                prev = best.get(name)
+                best[name] = r if prev is None else {
+                    k: (min(v, prev[k]) if k in NOISE else v) for k, v in r.items()}
+        return {"corpus": corpus, "stages": best}
+    finally:
+        if keep:
+            print(f"[bench] kept {root}")
+        else:
+            shutil.rmtree(root, ignore_errors=True)
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """Human-readable regressions of results against baseline (same scale and stage only)."""
+    regressions = []
+    for scale, res in results.items():
+        base = baseline.get(scale)
+        if not base:
+            continue
+        for stage, metrics in res["stages"].items():
+            ref = base["stages"].get(stage)
+            if not ref:
+                continue
+            for k, floor in NOISE.items():
+                now, then = metrics[k], ref[k]
+                if now > then * (1 + tolerance) and now - then > floor:
+                    regressions.append(f"{scale}x {stage} {k}: {then} -> {now} (+{(now / then - 1) * 100 if then else 0:.0f}%)")
+    return regressions
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--scales", default="1,10", help="Comma-separated corpus scales (100 and 1000 take minutes)")
+    ap.add_argument("--repeat", type=int, default=3, help="Runs per scale; the best of each metric is kept")
+    ap.add_argument("--seed", type=int, default=1234)
+    ap.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown vs baseline (0.25 = 25%%)")
+    ap.add_argument("--baseline", default=str(BASELINE))
+    ap.add_argument("--update-baseline", action="store_true")
+    ap.add_argument("--keep", action="store_true", help="Keep the generated corpora")
+    args = ap.parse_args()
+
+    results = {}
+    for s in args.scales.split(","):
+        scale = float(s)
+        key = f"{scale:g}"
+        results[key] = bench_scale(scale, max(1, args.repeat), args.seed, args.keep)
+        c = results[key]["corpus"]
+        print(f"[bench] {key}x: {c['blueprints']} blueprints, {c['bytes'] / 1e6:.1f} MB")
+        for stage, m in results[key]["stages"].items():
+            note = "" if m["exit"] == 0 else f"  (exit {m['exit']})"
+            print(f"  {stage:<15} wall {m['wall_s']:8.3f}s  cpu {m['cpu_s']:8.3f}s  rss {m['peak_rss_mb']:7.1f} MB{note}")
+
+    report = {"python": platform.python_version(), "machine": platform.machine(), "repeat": args.repeat,
+              "seed": args.seed, "scales": results}
+    out = PROJ / "dist" / "BENCH_PIPELINE.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    print(f"[bench] report: {out}")
+
+    baseline_path = Path(args.baseline)
+    if args.update_baseline:
+        merged = json.loads(baseline_path.read_text(encoding="utf-8")) if baseline_path.exists() else {}
+        merged.update({k: v for k, v in report.items() if k != "scales"})
+        merged.setdefault("scales", {}).update(results)
+        baseline_path.write_text(json.dumps(merged, indent=2) + "\n", encoding="utf-8")
+        print(f"[bench] baseline updated: {baseline_path}")
+        return 0
+    if not baseline_path.exists():
+        print("[bench] no baseline; run with --update-baseline to record one")
+        return 0
+    regressions = compare(results, json.loads(baseline_path.read_text(encoding="utf-8"))["scales"], args.tolerance)
+    for r in regressions:
+        print(f"[REGRESSION] {r}")
+    if regressions:
+        return 1
+    print(f"[bench] no regressions vs {baseline_path.name} (tolerance {args.tolerance:.0%})")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
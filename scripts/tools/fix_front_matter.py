@@ -1,30 +1,16 @@
 #!/usr/bin/env python3
 import argparse, sys, pathlib, re, datetime, unicodedata
 
-FM_OPEN = re.compile(r'^\s*---\s*$')
-FM_CLOSE = re.compile(r'^\s*---\s*$')
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+from docsyn_lib.frontmatter import FrontMatterIndex
+
+DIST = pathlib.Path(__file__).resolve().parents[2] / "dist"   # the repo's dist/, wherever the tool runs from
 
 def slugify(name: str) -> str:
     s = unicodedata.normalize('NFKD', name)
     s = re.sub(r'[^a-zA-Z0-9]+', '-', s).strip('-')
     return s.lower()
 
-def detect_existing_fm(text: str):
-    lines = text.splitlines()
-    i = 0
-    while i < len(lines) and lines[i].strip() == '':
-        i += 1
-    if i >= len(lines) or not FM_OPEN.match(lines[i]):
-        return False, None, None
-    start = i
-    i += 1
-    while i < len(lines) and not FM_CLOSE.match(lines[i]):
-        i += 1
-    if i >= len(lines):
-        return False, None, None
-    end = i  # index of closing fence line
-    return True, start, end
-
 def build_front_matter(args, src_path: pathlib.Path, assumed_blueprint: str):
     retrieved = args.retrieved or datetime.date.today().isoformat()
     owner = args.owner
@@ -79,13 +65,13 @@ def main():
 
     fixed = 0
     skipped = 0
+    index = FrontMatterIndex.in_dist(DIST)
 
     for f in sorted(md_files):
-        text = f.read_text(encoding="utf-8", errors="replace")
-        has_fm, fm_start, fm_end = detect_existing_fm(text)
-        if has_fm:
+        if index.get(f) is not None:
             skipped += 1
             continue
+        text = f.read_text(encoding="utf-8", errors="replace")
 
         # infer blueprint from path if present: merge_pr/updated/<slug>/file.md
         assumed = None
@@ -122,6 +108,8 @@ def main():
             print(f"wrote: {dst}")
         fixed += 1
 
+    if not args.dry_run:
+        index.save()
     print(f"\nSummary: fixed={fixed}, skipped(existing FM)={skipped}, outdir={outdir}")
     if args.dry_run and fixed == 0:
         sys.exit(1)
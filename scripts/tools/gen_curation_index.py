@@ -3,34 +3,15 @@ import argparse, json, os, re, sys
 from pathlib import Path
 from typing import Optional, Dict, List, Tuple
 
-FM_RE = re.compile(r"(?s)^\s*---\s*(.*?)\s*---\s*")
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from docsyn_lib.frontmatter import FrontMatterIndex
+from docsyn_lib.loader import DEFAULT_WORKERS, ParallelLoader, decode_text
+
 H1_RE = re.compile(r"(?m)^\s*#\s+(.+?)\s*$")
 
 def read_text(p: Path) -> str:
     return p.read_text(encoding="utf-8", errors="strict")
 
-def parse_front_matter(text: str) -> Dict[str, any]:
-    m = FM_RE.match(text)
-    if not m:
-        return {}
-    block = m.group(1)
-    out = {}
-    for line in block.splitlines():
-        line = line.strip()
-        if not line or line.startswith("#"): continue
-        if ":" not in line: continue
-        k, v = line.split(":", 1)
-        out[k.strip()] = v.strip().strip('"\'')
-    # crude list parser for tags
-    if "tags" in out and out["tags"].startswith("[") and out["tags"].endswith("]"):
-        tags = [t.strip(" '\"\t") for t in out["tags"][1:-1].split(",") if t.strip()]
-        out["tags"] = tags
-    return out
-
-def strip_front_matter(text: str) -> str:
-    m = FM_RE.match(text)
-    return text[m.end():] if m else text
-
 def first_h1(text: str) -> Optional[str]:
     m = H1_RE.search(text)
     return m.group(1).strip() if m else None
@@ -39,15 +20,15 @@ def words_count(s: str) -> int:
     return len(re.findall(r"\b\w+\b", s, flags=re.UNICODE))
 
 def is_vendor(fm: Dict[str, any]) -> bool:
-    pol = (fm.get("policy") or "").lower()
-    tags = [t.lower() for t in (fm.get("tags") or [])]
+    pol = str(fm.get("policy") or "").lower()
+    tags = [str(t).lower() for t in (fm.get("tags") or [])]
     return pol == "vendor-specific" or "vendor" in tags
 
 def section_label(fm: Dict[str, any], path: Path) -> str:
     if "part" in fm:
-        return f"Part {fm['part'].strip()}"
+        return f"Part {str(fm['part']).strip()}"
     if "blueprint" in fm:
-        return f"Blueprint: {fm['blueprint'].strip()}"
+        return f"Blueprint: {str(fm['blueprint']).strip()}"
     # fallback from path
     parts = path.parts
     if "core" in parts: return "Part A"
@@ -59,6 +40,7 @@ def main():
     ap.add_argument("--manifest", default="build.manifest.json")
     ap.add_argument("--root", default=".")
     ap.add_argument("--out", default="core/95-curation-index.md")
+    ap.add_argument("--io-workers", type=int, default=DEFAULT_WORKERS, help="Parallel source reads")
     args = ap.parse_args()
 
     root = Path(args.root).resolve()
@@ -73,14 +55,16 @@ def main():
         return 3
 
     rows = []
-    for idx, rel in enumerate(curated, start=1):
-        p = (root / rel).resolve()
-        if not p.exists():
+    index = FrontMatterIndex.in_dist(root / "dist")
+    loader = ParallelLoader(args.io_workers)
+    loaded = loader.map((root / rel).resolve() for rel in curated)
+    for idx, (rel, (p, data)) in enumerate(zip(curated, loaded), start=1):
+        if data is None:
             print(f"[error] curated path missing: {rel}", file=sys.stderr)
             return 4
-        txt = read_text(p)
-        fm = parse_front_matter(txt)
-        body = strip_front_matter(txt)
+        header = index.get(p)
+        fm = header.data if header else {}
+        body = decode_text(data[header.end:] if header else data, errors="strict")
         title = first_h1(body) or p.stem.replace("-", " ").replace("_", " ")
         sec = section_label(fm, p.relative_to(root))
         vendor = "Vendor" if is_vendor(fm) else "Neutral"
@@ -106,6 +90,9 @@ def main():
     content = "\n".join(lines) + "\n"
     out_path.write_text(content, encoding="utf-8", errors="strict")
     print(f"[ok] wrote {out_path.relative_to(root)} ({len(rows)} entries)")
+    index.save()
+    print(loader.stats.summary())
+    print(index.stats())
     return 0
 
 if __name__ == "__main__":
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Generate a deterministic synthetic DocSyn corpus for benchmarking.
+
+The corpus is a self-contained project root: the repo's scripts/ and curated
+core files, N generated blueprints, a few staged updates in merge_pr/updated/
+and a build.manifest.json listing everything. At --scale 1 the blueprints
+total about 500 KB, the size of the real corpus; --scale N multiplies that.
+
+Blueprints vary in:
+- size (log-normal around the mean, never below the 1000-byte QA floor),
+- code-fence density (--fence-rate: share of sections with a code block),
+- front matter (none, flow or block tag lists, quoted values, vendor
+  policy, anchors),
+- leaked global blocks (--leak-rate: share of blueprints carrying a copy of
+  a Part A global section, as ci_consolidate is meant to strip).
+
+The same --scale and --seed always produce byte-identical files.
+
+Usage: python3 scripts/tools/gen_synthetic_corpus.py --root /tmp/corpus --scale 10
+"""
+import argparse, json, random, shutil, sys
+from pathlib import Path
+
+REPO = Path(__file__).resolve().parents[2]
+BASE_BYTES = 500_000
+BASE_BLUEPRINTS = 12
+MIN_BYTES = 1_200
+CORE_SOURCES = [
+    "core/00-router.md",
+    "core/01-risks.md",
+    "core/02-devcontainer.md",
+    "core/95-curation-index.md",
+    "core/90-appendix-vendors.md",
+]
+WORDS = ("agent blueprint router guard pipeline secret review coverage deploy rollback cache token budget "
+         "policy audit trace latency retry sandbox container approval dataset schema index fixture "
+         "metric alert owner scope module branch commit release incident runbook").split()
+LANGS = ["bash", "python", "yaml", "json", ""]
+FRONT_MATTER = [
+    lambda slug: "",
+    lambda slug: f"---\nblueprint: {slug}\ntags: [blueprint, generated]\n---\n\n",
+    lambda slug: f"---\nblueprint: \"{slug}\"\nowner: 'platform'\ntags:\n  - blueprint\n  - generated\n---\n\n",
+    lambda slug: f"---\nblueprint: {slug}\npolicy: vendor-specific\ntags: [vendor]\n---\n\n",
+    lambda slug: f"---\nblueprint: {slug}\nanchor: true\ntags: [blueprint, anchor]\n---\n\n",
+]
+
+
+def sentence(rng: random.Random) -> str:
+    words = [rng.choice(WORDS) for _ in range(rng.randint(6, 16))]
+    return " ".join(words).capitalize() + "."
+
+
+def paragraph(rng: random.Random) -> str:
+    return " ".join(sentence(rng) for _ in range(rng.randint(2, 6)))
+
+
+def code_block(rng: random.Random) -> str:
+    body = "\n".join(f"{rng.choice(WORDS)}_{i} = {rng.randint(0, 999)}" for i in range(rng.randint(2, 12)))
+    return f"```{rng.choice(LANGS)}\n{body}\n```"
+
+
+def table(rng: random.Random) -> str:
+    rows = ["| Step | Owner | Notes |", "|---|---|---|"]
+    rows += [f"| {i} | {rng.choice(WORDS)} | {sentence(rng)} |" for i in range(1, rng.randint(3, 8))]
+    return "\n".join(rows)
+
+
+def global_blocks(root: Path) -> list:
+    """Part A sections that blueprints may leak (ci_consolidate strips these)."""
+    blocks = []
+    for rel in CORE_SOURCES[:3]:
+        text = (root / rel).read_text(encoding="utf-8")
+        blocks.append(text.strip())
+    return blocks
+
+
+def blueprint(rng: random.Random, slug: str, target: int, fence_rate: float, leak: str) -> str:
+    fm = FRONT_MATTER[rng.randrange(len(FRONT_MATTER))](slug)
+    parts = [f"{fm}# {slug.replace('-', ' ').title()}", "## Objective\n" + paragraph(rng)]
+    size = sum(len(p) for p in parts)
+    n = 0
+    while size < target:
+        n += 1
+        section = [f"## {rng.choice(WORDS).title()} {n}", paragraph(rng)]
+        if rng.random() < fence_rate:
+            section.append(code_block(rng))
+        if rng.random() < 0.2:
+            section.append(table(rng))
+        if rng.random() < 0.1:
+            section.append(f"### Notes {n}\n" + paragraph(rng))
+        block = "\n\n".join(section)
+        parts.append(block)
+        size += len(block) + 2
+    if leak:
+        parts.insert(rng.randint(2, len(parts)), leak)
+    return "\n\n".join(parts) + "\n"
+
+
+def generate(root: Path, scale: float = 1, seed: int = 1234, fence_rate: float = 0.35,
+             leak_rate: float = 0.1, update_rate: float = 0.05) -> dict:
+    """Write the corpus under root (which must not exist or be empty); returns its summary."""
+    rng = random.Random(f"{seed}:{scale}")
+    root.mkdir(parents=True, exist_ok=True)
+    shutil.copytree(REPO / "scripts", root / "scripts", ignore=shutil.ignore_patterns("__pycache__"))
+    for rel in CORE_SOURCES + ["core/00-router.SOURCED.md"]:
+        (root / rel).parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(REPO / rel, root / rel)
+    (root / "tests").mkdir(exist_ok=True)
+    (root / "tests" / "BASELINE_SHA256").write_text("0" * 64 + "\n", encoding="utf-8")
+
+    count = max(BASE_BLUEPRINTS, round(BASE_BLUEPRINTS * scale))
+    weights = [rng.lognormvariate(0, 0.9) for _ in range(count)]
+    total = BASE_BYTES * scale
+    sizes = [max(MIN_BYTES, int(total * w / sum(weights))) for w in weights]
+    leaks = global_blocks(root)
+    # The structural files qa_build requires come first, then generated slugs
+    slugs = ["documenter", "guardian", "janitor", "tester", "cicd-analyst", "orchestrator", "adaptive-learning"]
+    slugs += [f"bp-{i:05d}-{WORDS[i % len(WORDS)]}" for i in range(count - len(slugs))]
+
+    bp_dir, upd_dir = root / "blueprints", root / "merge_pr" / "updated"
+    bp_dir.mkdir(parents=True, exist_ok=True)
+    upd_dir.mkdir(parents=True, exist_ok=True)
+    written = leaked = updated = 0
+    for slug, size in zip(slugs, sizes):
+        leak = rng.choice(leaks) if rng.random() < leak_rate else ""
+        text = blueprint(rng, slug, size, fence_rate, leak)
+        (bp_dir / f"{slug}.md").write_text(text, encoding="utf-8")
+        written += len(text.encode("utf-8"))
+        leaked += bool(leak)
+        if rng.random() < update_rate:
+            body = text.split("\n---\n", 1)[-1] if text.startswith("---\n") else text
+            staged = f"---\nblueprint: {slug}\n---\n\n{body.lstrip()}\n{paragraph(rng)}\n"
+            (upd_dir / f"{slug}.md").write_text(staged, encoding="utf-8")
+            updated += 1
+
+    manifest = {"deterministic": True, "curated_sources": CORE_SOURCES + [f"blueprints/{s}.md" for s in slugs]}
+    (root / "build.manifest.json").write_text(json.dumps(manifest, indent=2) + "\n", encoding="utf-8")
+    return {"scale": scale, "seed": seed, "blueprints": count, "bytes": written, "leaked": leaked, "staged_updates": updated}
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--root", required=True, help="Directory to create the corpus in")
+    ap.add_argument("--scale", type=float, default=1, help="Multiple of the ~500 KB reference corpus")
+    ap.add_argument("--seed", type=int, default=1234)
+    ap.add_argument("--fence-rate", type=float, default=0.35)
+    ap.add_argument("--leak-rate", type=float, default=0.1)
+    args = ap.parse_args()
+
+    root = Path(args.root)
+    if root.exists() and any(root.iterdir()):
+        print(f"[error] {root} is not empty", file=sys.stderr)
+        return 2
+    summary = generate(root, args.scale, args.seed, args.fence_rate, args.leak_rate)
+    print(json.dumps(summary))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,33 +1,12 @@
 #!/usr/bin/env python3
-import argparse, sys, pathlib, re
+import argparse, sys, pathlib
 
-FM_OPEN = re.compile(r'^\s*---\s*$')
-FM_CLOSE = re.compile(r'^\s*---\s*$')
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+from docsyn_lib.frontmatter import FrontMatterIndex
 
-REQUIRED_ONE_OF = [('part', 'blueprint')]  # exactly one must exist
+DIST = pathlib.Path(__file__).resolve().parents[2] / "dist"   # the repo's dist/, wherever the tool runs from
 
-def has_well_formed_front_matter(text: str):
-    lines = text.splitlines()
-    # skip leading empty lines
-    i = 0
-    while i < len(lines) and lines[i].strip() == '':
-        i += 1
-    if i >= len(lines) or not FM_OPEN.match(lines[i]):
-        return False, {}
-    i += 1
-    kv = {}
-    while i < len(lines) and not FM_CLOSE.match(lines[i]):
-        line = lines[i].strip()
-        if line and not line.startswith('#'):
-            # very light key: value sniff
-            m = re.match(r'^([A-Za-z0-9_-]+)\s*:\s*(.*)$', line)
-            if m:
-                key, val = m.group(1), m.group(2)
-                kv[key] = val
-        i += 1
-    if i >= len(lines) or not FM_CLOSE.match(lines[i]):
-        return False, {}
-    return True, kv
+REQUIRED_ONE_OF = [('part', 'blueprint')]  # exactly one must exist
 
 def main():
     p = argparse.ArgumentParser(description="List .md files with missing/malformed YAML front-matter.")
@@ -48,16 +27,18 @@ def main():
     missing = []
     malformed = []
     bad_contract = []
+    index = FrontMatterIndex.in_dist(DIST)
 
     for f in sorted(md_files):
-        text = f.read_text(encoding="utf-8", errors="replace")
-        ok, kv = has_well_formed_front_matter(text)
-        if not ok:
+        fm = index.get(f)
+        if fm is None:
             missing.append(f)
             continue
+        if fm.errors:
+            malformed.append(f)
         # contract: exactly one of part or blueprint
         for pair in REQUIRED_ONE_OF:
-            present = sum(1 for k in pair if k in kv and kv[k] and not kv[k].strip().startswith('#'))
+            present = sum(1 for k in pair if fm.data.get(k) not in (None, ""))
             if present != 1:
                 bad_contract.append(f)
                 break
@@ -74,6 +55,7 @@ def main():
 
     if not (missing or malformed or bad_contract):
         print("All good: front-matter present and contract satisfied.")
+    index.save()
 
     # return nonzero if anything needs fixing (handy for CI)
     sys.exit(1 if (missing or malformed or bad_contract) else 0)
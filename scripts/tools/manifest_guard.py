@@ -1,30 +1,18 @@
 #!/usr/bin/env python3
-import argparse, json, sys, re
+import argparse, json, sys
 from pathlib import Path
 from typing import Dict, List
 
-FM_RE = re.compile(r"(?s)^\s*---\s*(.*?)\s*---\s*")
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from docsyn_lib.frontmatter import FrontMatterIndex
+from docsyn_lib.loader import DEFAULT_WORKERS, ParallelLoader
 
 def read(p: Path) -> str:
     return p.read_text(encoding="utf-8", errors="strict")
 
-def parse_fm(text: str) -> Dict[str, any]:
-    m = FM_RE.match(text)
-    if not m: return {}
-    block = m.group(1)
-    out = {}
-    for line in block.splitlines():
-        line = line.strip()
-        if not line or ":" not in line: continue
-        k, v = line.split(":", 1)
-        out[k.strip()] = v.strip().strip('"\'')
-    if "tags" in out and out["tags"].startswith("[") and out["tags"].endswith("]"):
-        out["tags"] = [t.strip(" '\"") for t in out["tags"][1:-1].split(",") if t.strip()]
-    return out
-
 def is_vendor(fm: Dict[str, any]) -> bool:
-    pol = (fm.get("policy") or "").lower()
-    tags = [t.lower() for t in (fm.get("tags") or [])]
+    pol = str(fm.get("policy") or "").lower()
+    tags = [str(t).lower() for t in (fm.get("tags") or [])]
     return pol == "vendor-specific" or "vendor" in tags
 
 def main():
@@ -32,6 +20,7 @@ def main():
     ap.add_argument("--manifest", default="build.manifest.json")
     ap.add_argument("--root", default=".")
     ap.add_argument("--vendor-appendix", default="core/90-appendix-vendors.md")
+    ap.add_argument("--io-workers", type=int, default=DEFAULT_WORKERS, help="Parallel front-matter and source reads")
     args = ap.parse_args()
 
     root = Path(args.root).resolve()
@@ -42,22 +31,28 @@ def main():
 
     # existence + duplicates
     seen = set()
-    for rel in curated:
+    fms = []
+    index = FrontMatterIndex.in_dist(root / "dist")
+    for rel, header in zip(curated, index.map(((root / rel) for rel in curated), args.io_workers)):
         if rel in seen:
             print(f"[error] duplicate curated path: {rel}", file=sys.stderr); return 3
         seen.add(rel)
-        p = (root / rel).resolve()
-        if not p.exists():
+        if isinstance(header, OSError):
             print(f"[error] curated path missing: {rel}", file=sys.stderr); return 4
-        fm = parse_fm(read(p))
+        fms.append(header.data if header else {})
         # Note: anchor files are allowed in our architecture as placeholders
 
+    # encoding: the index reads only headers, so every curated file is still decoded in full, strictly
+    for rel, (p, data) in zip(curated, ParallelLoader(args.io_workers).map((root / rel).resolve() for rel in curated)):
+        try:
+            (data or b"").decode("utf-8", errors="strict")
+        except UnicodeDecodeError as e:
+            print(f"[error] curated path is not valid UTF-8: {rel} (byte {e.start})", file=sys.stderr); return 5
+
     # vendor ordering rule
     vendor_idx = []
     appendix_idx = None
-    for i, rel in enumerate(curated):
-        p = (root / rel).resolve()
-        fm = parse_fm(read(p))
+    for i, (rel, fm) in enumerate(zip(curated, fms)):
         if rel == args.vendor_appendix:
             appendix_idx = i
         if is_vendor(fm):
@@ -73,6 +68,8 @@ def main():
             print(f"[error] vendor items must come *after* {args.vendor_appendix}; bad indices: {bad}", file=sys.stderr)
             return 7
 
+    index.save()
+    print(index.stats())
     print("[ok] manifest guard passed")
     return 0
 
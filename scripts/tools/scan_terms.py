@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Report every occurrence of a set of terms in one or more files.
+
+The terms default to qa_build.FORBIDDEN_TERMS; --term (repeatable) and
+--terms-file (one term per line) replace them. All terms are matched in a
+single pass per file, through mmap by default or in bounded-memory chunks
+with --stream (e.g. for files larger than the address space, or pipes: use
+"-" for stdin). Output is one "path:line:col: term" line per hit; the exit
+status is 1 if anything was found.
+
+Usage: python3 scripts/tools/scan_terms.py dist/DocSyn_Compiled.md [--stream] [--term X ...]
+"""
+import argparse, sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from docsyn_lib.termscan import TermMatcher
+
+def scan(matcher: TermMatcher, name: str, stream: bool):
+    if name == "-":
+        yield from matcher.scan_stream(sys.stdin.buffer)
+    elif stream:
+        with open(name, "rb") as f:
+            yield from matcher.scan_stream(f)
+    else:
+        yield from matcher.scan_file(Path(name))
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("files", nargs="+", help="Files to scan ('-' for stdin, implies --stream)")
+    ap.add_argument("--term", action="append", help="Term to look for (repeatable)")
+    ap.add_argument("--terms-file", help="File with one term per line")
+    ap.add_argument("--stream", action="store_true", help="Read in chunks instead of mmap")
+    args = ap.parse_args()
+
+    terms = list(args.term or [])
+    if args.terms_file:
+        terms += [t for t in Path(args.terms_file).read_text(encoding="utf-8").splitlines() if t.strip()]
+    if not terms:
+        from qa_build import FORBIDDEN_TERMS
+        terms = FORBIDDEN_TERMS
+    matcher = TermMatcher(terms)
+
+    found = 0
+    for name in args.files:
+        for h in scan(matcher, name, args.stream):
+            found += 1
+            print(f"{name}:{h.line}:{h.col}: {h.term}")
+    print(f"[scan] {found} hits for {len(matcher.terms)} terms in {len(args.files)} files", file=sys.stderr)
+    return 1 if found else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Print one section of dist/DocSyn_Compiled.md through its byte-offset index.
+
+Usage: python3 scripts/tools/ssot_section.py --anchor CH0-ROUTER
+       python3 scripts/tools/ssot_section.py --heading "Janitor"
+       python3 scripts/tools/ssot_section.py --source blueprints/janitor.md
+"""
+import argparse, sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from docsyn_lib.section_index import CompiledReader, StaleIndexError
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--input", default="dist/DocSyn_Compiled.md")
+    group = ap.add_mutually_exclusive_group(required=True)
+    group.add_argument("--anchor", help="Anchor id, e.g. CH0-ROUTER or {{#CH0-ROUTER}}")
+    group.add_argument("--heading", help="Heading title or slug")
+    group.add_argument("--source", help="Curated source path, e.g. blueprints/janitor.md")
+    ap.add_argument("--verify", action="store_true", help="Check the section against its recorded SHA-256")
+    args = ap.parse_args()
+
+    try:
+        with CompiledReader(Path(args.input)) as reader:
+            if args.anchor:
+                text = reader.anchor(args.anchor, args.verify)
+            elif args.heading:
+                text = reader.section(args.heading, args.verify)
+            else:
+                text = reader.source(args.source, args.verify)
+    except (OSError, StaleIndexError) as e:
+        print(f"[error] {e}", file=sys.stderr)
+        return 2
+    if text is None:
+        print("[error] no such section", file=sys.stderr)
+        return 1
+    sys.stdout.write(text)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
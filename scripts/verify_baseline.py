@@ -1,16 +1,25 @@
 #!/usr/bin/env python3
 """
 Verify DocSyn build matches baseline hash
+
+The digest comes from dist/BUILD_RECORD.json, written by assemble_ssot.py while
+it wrote the file; --paranoid re-hashes the file instead.
 """
-import hashlib
+import argparse
 import sys
 from pathlib import Path
 
+from docsyn_lib.record import artifact_sha256
+
 REPO_ROOT = Path(__file__).resolve().parent.parent  # Go up from scripts/ to repo root
 BASELINE_FILE = REPO_ROOT / "tests" / "BASELINE_SHA256"
 COMPILED_FILE = REPO_ROOT / "dist" / "DocSyn_Compiled.md"
 
 def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--paranoid", action="store_true", help="Re-hash the compiled file instead of trusting the build record")
+    args = ap.parse_args()
+
     if not BASELINE_FILE.exists():
         print("No baseline found. Create tests/BASELINE_SHA256 first.")
         return 2
@@ -20,7 +29,10 @@ def main():
         return 1
     
     # Get current hash
-    current_hash = hashlib.sha256(COMPILED_FILE.read_bytes()).hexdigest()
+    current_hash, source = artifact_sha256(COMPILED_FILE.parent, COMPILED_FILE.name, args.paranoid)
+    if source == "rehash-mismatch":
+        print("Build record is wrong: DocSyn_Compiled.md does not match BUILD_RECORD.json")
+        return 1
     
     # Get baseline hash
     baseline_hash = BASELINE_FILE.read_text().strip()
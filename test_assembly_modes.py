@@ -0,0 +1,385 @@
+#!/usr/bin/env python3
+"""
+DocSyn Assembly Mode Tests - every assembly mode must match the in-memory build
+
+Tests:
+1. Streaming build of the curated corpus matches tests/BASELINE_SHA256
+2. Streaming and in-memory builds agree byte-for-byte on edge-case sources
+3. A build cache hit restores outputs identical to a fresh build
+4. Incremental rebuilds after an edit match a full build and reuse untouched sources
+5. Zero-copy splicing of clean sources matches the in-memory build
+6. Parallel source loading is independent of the worker count
+7. The section index maps anchors, headings and sources to their SSOT bytes in every mode
+8. BUILD_RECORD.json digests match the artifacts in every mode, and --paranoid catches tampering
+9. BUILD_METRICS.json records the assemble stage, including build-cache hits
+10. The single-process docsyn runner produces the same artifacts as the separate stage scripts
+11. The build graph skips stages whose inputs and scripts are unchanged and reruns exactly the affected ones
+12. Clean records written by other assembler code are discarded, not trusted
+13. The hash memo rehashes files whose mtime is too close to its last write to tell edits apart
+14. Zero-copy splicing falls back to read/write when copy_file_range fails partway (e.g. EXDEV)
+
+Usage: python test_assembly_modes.py
+"""
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent
+sys.path.insert(0, str(REPO_ROOT / "scripts"))
+from docsyn_lib.cache import HashMemo
+from docsyn_lib.record import RECORD_NAME, artifact_sha256
+from docsyn_lib.section_index import CompiledReader
+ASSEMBLE = REPO_ROOT / "scripts" / "assemble_ssot.py"
+BASELINE = REPO_ROOT / "tests" / "BASELINE_SHA256"
+OUTPUTS = ["PartA_Core.md", "PartB_Blueprints.md", "DocSyn_Compiled.md"]
+
+EDGE_CASES = {
+    "core/00-a.md": "# Router\n\n\n\n# Router\nrow cafe\u0301\n",
+    "core/01-b.md": "\n\n# router\nno trailing newline",
+    "blueprints/a.md": "---\nblueprint: a\n---\n# A\r\n\r\n\r\n\r\nbody\x0bsplit here\n```\ncode\n",
+    "blueprints/b.md": "# A\n```\n\n\n\n",
+    "blueprints/c.md": "",
+    "blueprints/d.md": "# D\n{{#BP-D}}\n## Query-Pattern Matrix\n```\ncafé\n\n",
+    "core/02-c.md": "## Clean\nno trailing newline either",
+}
+
+def run_assemble(root: Path, out: Path, *flags) -> str:
+    result = subprocess.run(
+        [sys.executable, str(ASSEMBLE), "--out", str(out), *flags],
+        cwd=root, capture_output=True, text=True, check=True
+    )
+    return result.stdout
+
+def assemble(root: Path, out: Path, *flags):
+    run_assemble(root, out, "--no-cache", *flags)
+    return {name: (out / name).read_bytes() for name in OUTPUTS}
+
+def write_fixture(root: Path):
+    for rel, content in EDGE_CASES.items():
+        p = root / rel
+        p.parent.mkdir(parents=True, exist_ok=True)
+        p.write_bytes(content.encode("utf-8"))
+    manifest = {"curated_sources": sorted(EDGE_CASES)}
+    (root / "build.manifest.json").write_text(json.dumps(manifest), encoding="utf-8")
+
+def test_streaming_matches_baseline():
+    """Test 1: Streaming build reproduces the baseline hash"""
+    with tempfile.TemporaryDirectory() as tmp:
+        outputs = assemble(REPO_ROOT, Path(tmp), "--stream")
+    digest = hashlib.sha256(outputs["DocSyn_Compiled.md"]).hexdigest()
+    assert digest == BASELINE.read_text().strip(), f"stream build hash {digest[:8]} != baseline"
+    return {"stream_hash": digest[:8]}
+
+def test_streaming_matches_in_memory():
+    """Test 2: Streaming and in-memory builds agree on edge cases"""
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        write_fixture(root)
+        full = assemble(root, root / "full")
+        stream = assemble(root, root / "stream", "--stream")
+    mismatched = [name for name in OUTPUTS if full[name] != stream[name]]
+    assert not mismatched, f"stream output differs: {mismatched}"
+    return {"identical_outputs": OUTPUTS}
+
+def test_cache_hit_restores_outputs():
+    """Test 3: Cache hit restores outputs identical to a fresh build"""
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        write_fixture(root)
+        out = root / "dist"
+        first = run_assemble(root, out)
+        fresh = {name: (out / name).read_bytes() for name in OUTPUTS}
+        for name in OUTPUTS:
+            (out / name).unlink()
+        second = run_assemble(root, out)
+        restored = {name: (out / name).read_bytes() for name in OUTPUTS}
+    assert "[cache] miss" in first, first
+    assert "[cache] restore" in second, second
+    assert fresh == restored, "restored outputs differ from fresh build"
+    return {"restored_outputs": OUTPUTS}
+
+def test_incremental_matches_full_build():
+    """Test 4: Incremental rebuild after an edit matches a full build"""
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        write_fixture(root)
+        out = root / "dist"
+        run_assemble(root, out, "--no-cache", "--incremental")
+        # Retitle the middle blueprint so H1 dedup across its boundaries changes
+        (root / "blueprints" / "b.md").write_text("# A\n# Router\nedited\n", encoding="utf-8")
+        log = run_assemble(root, out, "--no-cache", "--incremental")
+        incremental = {name: (out / name).read_bytes() for name in OUTPUTS}
+        full = assemble(root, root / "full")
+    assert "[incremental] reused" in log and "reused 0/" not in log, log
+    mismatched = [name for name in OUTPUTS if full[name] != incremental[name]]
+    assert not mismatched, f"incremental output differs: {mismatched}"
+    return {"log": next(ln for ln in log.splitlines() if ln.startswith("[incremental]"))}
+
+def test_zero_copy_matches_in_memory():
+    """Test 5: Zero-copy splicing of clean sources matches the in-memory build"""
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        write_fixture(root)
+        full = assemble(root, root / "full")
+        log = run_assemble(root, root / "stream", "--no-cache", "--stream")
+        spliced = {name: (root / "stream" / name).read_bytes() for name in OUTPUTS}
+    assert "[zero-copy] spliced 2/" in log, log
+    mismatched = [name for name in OUTPUTS if full[name] != spliced[name]]
+    assert not mismatched, f"zero-copy output differs: {mismatched}"
+    return {"log": next(ln for ln in log.splitlines() if ln.startswith("[zero-copy]"))}
+
+def test_parallel_load_is_ordered():
+    """Test 6: Parallel source loading is independent of the worker count"""
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        write_fixture(root)
+        serial = assemble(root, root / "serial", "--io-workers", "1")
+        log = run_assemble(root, root / "parallel", "--no-cache", "--io-workers", "16")
+        parallel = {name: (root / "parallel" / name).read_bytes() for name in OUTPUTS}
+    assert "[load] 7 files" in log, log
+    mismatched = [name for name in OUTPUTS if serial[name] != parallel[name]]
+    assert not mismatched, f"parallel load output differs: {mismatched}"
+    return {"log": next(ln for ln in log.splitlines() if ln.startswith("[load]"))}
+
+def test_section_index():
+    """Test 7: Section index maps anchors, headings and sources in every mode"""
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        write_fixture(root)
+        indexes = {}
+        for mode in ["", "--stream", "--incremental"]:
+            out = root / (mode.strip("-") or "full")
+            run_assemble(root, out, "--no-cache", *filter(None, [mode]))
+            indexes[mode] = (out / "DocSyn_Compiled.index.json").read_bytes()
+        with CompiledReader(root / "full" / "DocSyn_Compiled.md") as reader:
+            anchor = reader.anchor("{{#BP-D}}", verify=True)
+            heading = reader.section("query-pattern matrix")
+            source = reader.source("blueprints/d.md", verify=True)
+    assert len(set(indexes.values())) == 1, "index differs between assembly modes"
+    assert anchor.startswith("# D\n{{#BP-D}}\n## Query-Pattern Matrix"), anchor
+    assert heading == "## Query-Pattern Matrix\n```\ncafé\n\n", heading
+    assert source == EDGE_CASES["blueprints/d.md"][:-1], source
+    return {"anchor_bytes": len(anchor.encode("utf-8"))}
+
+def test_build_record():
+    """Test 8: Build record digests match the artifacts; --paranoid catches tampering"""
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        write_fixture(root)
+        out = root / "dist"
+        for flags in [["--no-cache"], ["--stream"], ["--incremental"], ["--incremental"], ["--stream"]]:
+            run_assemble(root, out, *flags)
+            record = json.loads((out / RECORD_NAME).read_text(encoding="utf-8"))["artifacts"]
+            for name, entry in record.items():
+                digest = hashlib.sha256((out / name).read_bytes()).hexdigest()
+                assert entry["sha256"] == digest, f"{flags}: {name} recorded {entry['sha256'][:8]} != {digest[:8]}"
+        ssot = out / "DocSyn_Compiled.md"
+        stat = ssot.stat()
+        ssot.write_bytes(ssot.read_bytes().replace(b"D", b"X", 1))
+        os.utime(ssot, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        trusted = artifact_sha256(out, ssot.name)
+        paranoid = artifact_sha256(out, ssot.name, paranoid=True)
+    assert trusted[1] == "record", trusted
+    assert paranoid[1] == "rehash-mismatch", paranoid
+    return {"artifacts": sorted(record)}
+
+def test_build_metrics():
+    """Test 9: Assembly records its stage in BUILD_METRICS.json, cache hits included"""
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        write_fixture(root)
+        out = root / "dist"
+        run_assemble(root, out)
+        cold = json.loads((out / "BUILD_METRICS.json").read_text(encoding="utf-8"))["stages"]["assemble"]
+        run_assemble(root, out)
+        warm = json.loads((out / "BUILD_METRICS.json").read_text(encoding="utf-8"))["stages"]["assemble"]
+    assert cold["cache"] == {"build_hits": 0, "build_misses": 1}, cold["cache"]
+    assert warm["cache"] == {"build_hits": 1, "build_misses": 0}, warm["cache"]
+    assert cold["files_read"] >= 4 and cold["bytes_read"] > 0 and cold["bytes_written"] > 0, cold
+    assert cold["peak_rss_mb"] and cold["exit"] == 0, cold
+    return {k: cold[k] for k in ("files_read", "files_written", "bytes_read", "bytes_written")}
+
+def test_single_process_runner():
+    """Test 10: `scripts/docsyn ci` matches running the stage scripts one by one"""
+    scripts = ["clean_staging_duplicates.py --delete --fail-if-leftovers", "lift_code_blocks.py check",
+               "assemble_ssot.py", "router_smoke_test.py", "qa_build.py"]
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        for name in ["core", "blueprints", "tests"]:
+            shutil.copytree(REPO_ROOT / name, root / name)
+        shutil.copytree(REPO_ROOT / "scripts", root / "scripts", ignore=shutil.ignore_patterns("__pycache__"))
+        shutil.copy(REPO_ROOT / "build.manifest.json", root)
+        for script in scripts:
+            subprocess.run([sys.executable, *f"scripts/{script}".split()], cwd=root, capture_output=True, check=True)
+        chain = {name: (root / "dist" / name).read_bytes() for name in OUTPUTS}
+        chain_qa = json.loads((root / "dist" / "QA_REPORT.json").read_text(encoding="utf-8"))
+        shutil.rmtree(root / "dist")
+        log = subprocess.run([sys.executable, "scripts/docsyn", "ci"], cwd=root, capture_output=True, text=True, check=True).stdout
+        single = {name: (root / "dist" / name).read_bytes() for name in OUTPUTS}
+        single_qa = json.loads((root / "dist" / "QA_REPORT.json").read_text(encoding="utf-8"))
+        metrics = json.loads((root / "dist" / "BUILD_METRICS.json").read_text(encoding="utf-8"))["stages"]
+    assert single == chain, [name for name in OUTPUTS if single[name] != chain[name]]
+    assert single_qa["checks"] == chain_qa["checks"], "QA report differs"
+    assert list(metrics["docsyn"]["stages"]) == ["clean-staging", "lift", "assemble", "router-test", "qa"], metrics["docsyn"]
+    assert metrics["docsyn"]["session"]["hits"] > 0, metrics["docsyn"]["session"]
+    assert "[docsyn] 5/5 stages in one process" in log, log
+    return {"session": metrics["docsyn"]["session"]}
+
+def test_build_graph():
+    """Test 11: The build graph reruns only stages whose inputs, outputs or scripts changed"""
+    def graph(root, *args):
+        log = subprocess.run([sys.executable, "scripts/docsyn", "graph", *args], cwd=root,
+                             capture_output=True, text=True).stdout
+        stages = json.loads((root / "dist" / "BUILD_METRICS.json").read_text(encoding="utf-8"))["stages"]["graph"]["stages"]
+        return log, {name: s["status"] for name, s in stages.items()}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        for name in ["core", "blueprints", "tests"]:
+            shutil.copytree(REPO_ROOT / name, root / name)
+        shutil.copytree(REPO_ROOT / "scripts", root / "scripts", ignore=shutil.ignore_patterns("__pycache__"))
+        shutil.copy(REPO_ROOT / "build.manifest.json", root)
+        log, first = graph(root)
+        compiled = hashlib.sha256((root / "dist" / "DocSyn_Compiled.md").read_bytes()).hexdigest()
+        metrics_txt = (root / "dist" / "METRICS.txt").read_text(encoding="utf-8")
+        _, second = graph(root)
+        (root / "tests" / "BASELINE_SHA256").write_text("0" * 64 + "\n")
+        os.utime(root / "blueprints" / "tester.md")       # new mtime, same content
+        (root / "dist" / "METRICS.txt").unlink()
+        _, third = graph(root)
+        _, targeted = graph(root, "assemble", "--force", "assemble")
+        smoke = root / "scripts" / "router_smoke_test.py"
+        smoke.write_text(smoke.read_text(encoding="utf-8") + "\n# edited stage script\n", encoding="utf-8")
+        _, script_edit = graph(root, "router-test")
+    assert compiled == (REPO_ROOT / "tests" / "BASELINE_SHA256").read_text().strip(), "graph build differs from baseline"
+    assert metrics_txt.startswith("path:dist/DocSyn_Compiled.md\n"), metrics_txt
+    assert "[graph] critical path: " in log, log
+    # ci_validate's verdict depends on the corpus; a failing stage is never recorded as up to date
+    checked = {n: s for n, s in first.items() if n != "validate"}
+    assert set(checked.values()) == {"ran"} and len(first) == 11, first
+    assert {n for n, s in second.items() if s != "up-to-date"} <= {"validate"}, second
+    # qa now fails on the bogus baseline, which is still a rerun
+    assert {n for n, s in third.items() if s != "up-to-date"} - {"validate"} == {"qa", "metrics"}, third
+    assert set(targeted) == {"promote", "curation-index", "clean-staging", "lift", "assemble"}, targeted
+    assert targeted["assemble"] == "ran" and targeted["lift"] == "up-to-date", targeted
+    assert script_edit == {"promote": "up-to-date", "router-test": "ran"}, script_edit
+    return {"stages": len(first), "rerun_after_edit": sorted(n for n, s in third.items() if s != "up-to-date")}
+
+def test_clean_index_code_digest():
+    """Test 12: CLEAN.json written under other assembler code is discarded"""
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        write_fixture(root)
+        out = root / "stream"
+        run_assemble(root, out, "--no-cache", "--stream")
+        warm = run_assemble(root, out, "--no-cache", "--stream")
+        # Pretend an older normalizer judged every source dirty
+        index_path = out / ".cache" / "CLEAN.json"
+        index = json.loads(index_path.read_text(encoding="utf-8"))
+        stale = {sha: {"clean": False} for sha in index["entries"]}
+        index_path.write_text(json.dumps({"code": "0" * 64, "entries": stale}), encoding="utf-8")
+        rerun = run_assemble(root, out, "--no-cache", "--stream")
+        saved = json.loads(index_path.read_text(encoding="utf-8"))
+    assert "(analyzed 0)" in warm, warm
+    assert "[zero-copy] spliced 2/" in rerun and "(analyzed 0)" not in rerun, rerun
+    assert saved["code"] == index["code"], "index not rewritten under the current code digest"
+    return {"log": next(ln for ln in rerun.splitlines() if ln.startswith("[zero-copy]"))}
+
+def test_hash_memo_racy_mtime():
+    """Test 13: HashMemo rehashes a same-size edit whose mtime is racy with the memo write; settled files are trusted"""
+    with tempfile.TemporaryDirectory() as tmp:
+        memo_path, src = Path(tmp) / "HASHES.json", Path(tmp) / "src.md"
+
+        def edit_keeping_sig(text):
+            st = src.stat()
+            src.write_text(text, encoding="utf-8")
+            os.utime(src, ns=(st.st_atime_ns, st.st_mtime_ns))
+
+        def digest():
+            memo = HashMemo(memo_path)
+            d = memo.sha256(src)
+            memo.save()
+            return d
+
+        # An mtime at or after the memo write, as for an edit in the same timestamp tick
+        src.write_text("one\n", encoding="utf-8")
+        ahead = src.stat().st_mtime_ns + 5_000_000_000
+        os.utime(src, ns=(ahead, ahead))
+        first = digest()
+        edit_keeping_sig("two\n")
+        racy = digest()
+        # Written well before the memo: a matching signature is trusted without reading, on every later run
+        old = ahead - 60_000_000_000
+        os.utime(src, ns=(old, old))
+        settled = digest()
+        edit_keeping_sig("six\n")
+        trusted, again = digest(), digest()
+    assert racy != first, "same-size edit within the racy window kept the old digest"
+    assert racy == hashlib.sha256(b"two\n").hexdigest(), racy
+    assert trusted == again == settled == racy, "settled signature was rehashed"
+    return {"racy": racy[:8], "trusted": trusted[:8]}
+
+# Runs assemble_ssot.py with copy_file_range moving one byte, then failing as across filesystems
+EXDEV_RUNNER = """
+import errno, os, runpy, sys
+real = os.copy_file_range
+calls = []
+def fake(src, dst, count, offset_src=None, offset_dst=None):
+    calls.append(count)
+    if len(calls) == 1:
+        return real(src, dst, 1, offset_src, offset_dst)
+    raise OSError(errno.EXDEV, "Invalid cross-device link")
+os.copy_file_range = fake
+sys.argv = sys.argv[1:]
+sys.path.insert(0, os.path.dirname(sys.argv[0]))
+try:
+    runpy.run_path(sys.argv[0], run_name="__main__")
+finally:
+    print(f"[test] copy_file_range calls: {len(calls)}")
+"""
+
+def test_zero_copy_cross_device_fallback():
+    """Test 14: Zero-copy splicing falls back to read/write when copy_file_range fails with EXDEV"""
+    if not hasattr(os, "copy_file_range"):
+        return {"skipped": "no os.copy_file_range"}
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        write_fixture(root)
+        full = assemble(root, root / "full")
+        log = subprocess.run(
+            [sys.executable, "-c", EXDEV_RUNNER, str(ASSEMBLE), "--out", str(root / "stream"), "--no-cache", "--stream"],
+            cwd=root, capture_output=True, text=True, check=True
+        ).stdout
+        spliced = {name: (root / "stream" / name).read_bytes() for name in OUTPUTS}
+    assert "[zero-copy] spliced 2/" in log, log
+    # One partial copy, one EXDEV; every later splice goes straight to read/write
+    assert "[test] copy_file_range calls: 2" in log, log
+    mismatched = [name for name in OUTPUTS if full[name] != spliced[name]]
+    assert not mismatched, f"fallback output differs: {mismatched}"
+    return {"log": next(ln for ln in log.splitlines() if ln.startswith("[zero-copy]"))}
+
+def main():
+    """Run all tests"""
+    print("DocSyn Assembly Mode Tests")
+    print("=" * 40)
+    failed = 0
+    for test in [test_streaming_matches_baseline, test_streaming_matches_in_memory,
+                 test_cache_hit_restores_outputs, test_incremental_matches_full_build,
+                 test_zero_copy_matches_in_memory, test_parallel_load_is_ordered,
+                 test_section_index, test_build_record, test_build_metrics, test_single_process_runner,
+                 test_build_graph, test_clean_index_code_digest,
+                 test_hash_memo_racy_mtime, test_zero_copy_cross_device_fallback]:
+        try:
+            print(f"✅ {test.__doc__}: {test()}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__doc__}: {e}")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""
+Curator Agent Tests - curator_agent.py and curator_lib on throwaway project trees
+
+Tests:
+1. heading_iter reports title, level, line and byte span like the prefix-rescanning reference
+2. plan removes Part A global blocks from staged files, using heading_iter to cut the blocks
+3. analyze re-stages only new or changed inputs and removes staged files whose input is gone
+4. analyze extracts PDF, DOCX and HTML inputs in the process pool, caching by sha256
+5. extractor plugins from config.yaml run under the per-file time and memory limits; a crash fails only its file
+6. an input whose extraction failed is extracted again on the next analyze
+7. plan removes lightly edited copies of global blocks, scored, at the configured threshold
+8. apply packs proposals into batches under max_files_per_pr/max_loc_per_pr, one branch per passing batch
+
+Usage: python test_curator.py
+"""
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import zipfile
+import zlib
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent
+sys.path.insert(0, str(REPO_ROOT / "scripts"))
+from curator_lib.norm import heading_iter
+sys.path.insert(0, str(REPO_ROOT / "scripts" / "tools"))
+from bench_headings import prefix_rescan
+
+PART_A = ("# Part A\n\n## 1. Router — Query-Pattern Matrix\n| Route | Ch. |\n| R1 | 2 |\n\n"
+          "## 2. Standard Development Environment\nUse the devcontainer for every agent run.\n")
+
+def make_pdf(text: str) -> bytes:
+    """One Flate-compressed content stream showing text, next to an image stream that must be skipped."""
+    content = zlib.compress(f"BT /F1 12 Tf 72 720 Td ({text}) Tj 0 -14 Td [(Step) -250 (one \\(daily\\))] TJ ET".encode("latin-1"))
+    return (b"%%PDF-1.4\n4 0 obj\n<< /Length %d /Filter /FlateDecode >>\nstream\n" % len(content) + content +
+            b"\nendstream\nendobj\n5 0 obj\n<< /Subtype /Image /Length 12 >>\nstream\nBT (img) Tj ET\nendstream\nendobj\n%%EOF\n")
+
+def make_docx(path: Path):
+    w = 'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"'
+    with zipfile.ZipFile(path, "w") as z:
+        z.writestr("word/document.xml", f'<w:document {w}><w:body>'
+                   '<w:p><w:pPr><w:pStyle w:val="Heading1"/></w:pPr><w:r><w:t>Deploy</w:t></w:r></w:p>'
+                   '<w:p><w:r><w:t xml:space="preserve">Run </w:t></w:r><w:r><w:t>make ci</w:t></w:r></w:p>'
+                   '<w:p><w:pPr><w:numPr/></w:pPr><w:r><w:t>then review</w:t></w:r></w:p></w:body></w:document>')
+
+def make_project(root: Path) -> Path:
+    """A minimal project tree with this repo's scripts and curator config, and a built Part A."""
+    shutil.copytree(REPO_ROOT / "scripts", root / "scripts", ignore=shutil.ignore_patterns("__pycache__"))
+    shutil.copytree(REPO_ROOT / "curator", root / "curator", ignore=shutil.ignore_patterns("staging", "diffs"))
+    (root / "dist").mkdir()
+    (root / "dist" / "PartA_Core.md").write_text(PART_A, encoding="utf-8")
+    return root
+
+def curator(root: Path, *args) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, "scripts/curator_agent.py", *args], cwd=root, capture_output=True, text=True)
+
+def test_heading_iter():
+    """Test 1: heading_iter matches the prefix-rescanning reference, spans included"""
+    bible = (REPO_ROOT / "blueprints" / "claude-code-bible.md").read_text(encoding="utf-8")
+    edge = ("# Café\r\n\r\n> > \\## 2. Quoted — ü\n##\n## 1.\n####### seven\n   ### Indented  \t\n"
+            "text # not a heading\n```\n# fenced\n```\n#\tTab")
+    for md in [bible, edge, "", "no headings\n"]:
+        heads = list(heading_iter(md))
+        assert heads == prefix_rescan(md), md[:80]
+        data = md.encode("utf-8")
+        for h in heads:
+            assert data[h.start:h.end].decode("utf-8").splitlines()[0].rstrip().endswith(h.title), h
+            assert data[:h.start].count(b"\n") + 1 == h.line, h
+    heads = list(heading_iter(edge))
+    assert [(h.title, h.level, h.line) for h in heads] == [
+        ("Café", 1, 1), ("Quoted — ü", 2, 3), ("1.", 2, 5), ("Indented", 3, 7), ("fenced", 1, 10), ("Tab", 1, 12)], heads
+    return {"headings": len(list(heading_iter(bible)))}
+
+def test_plan_removes_global_blocks():
+    """Test 2: plan drops staged paragraphs that copy a Part A global block"""
+    with tempfile.TemporaryDirectory() as tmp:
+        root = make_project(Path(tmp))
+        staging = root / "curator" / "staging"
+        staging.mkdir(parents=True)
+        (staging / "tester.md").write_text(
+            "# Tester\n\nKeep this paragraph.\n\nCopied: ## 2. Standard Development Environment\n"
+            "Use the **devcontainer** for every agent run.\n\nAnd this one.\n", encoding="utf-8")
+        result = curator(root, "plan")
+        plan = json.loads((root / "curator" / "diffs" / "PLAN.json").read_text(encoding="utf-8"))
+        proposal = (root / "curator" / "diffs" / "tester.proposal.md").read_text(encoding="utf-8")
+    assert result.returncode == 0, result.stderr
+    removed = plan["proposals"][0]["removed_blocks"]
+    assert [(r["key"], r["line_start"], r["line_end"]) for r in removed] == [("Standard Development Environment", 5, 6)], removed
+    assert proposal == "# Tester\n\nKeep this paragraph.\n\nAnd this one.\n", proposal
+    return {"removed": len(removed)}
+
+def test_analyze_incremental():
+    """Test 3: analyze re-stages only new or changed inputs and drops staged files of removed inputs"""
+    with tempfile.TemporaryDirectory() as tmp:
+        root = make_project(Path(tmp))
+        inp, staging = root / "input", root / "curator" / "staging"
+        inp.mkdir()
+        for name in ["alpha.md", "beta.txt", "gamma.md"]:
+            (inp / name).write_text(f"# {name}\n\nbody\n", encoding="utf-8")
+        first = curator(root, "analyze", "--workers", "2")
+        staged = {p.name: p.read_text(encoding="utf-8") for p in staging.glob("*.md")}
+        # Old inputs look settled: their mtimes predate the manifest by more than the racy window
+        manifest_path = staging / "ANALYZE_MANIFEST.json"
+        manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+        manifest["written_ns"] += 10 ** 10
+        manifest_path.write_text(json.dumps(manifest), encoding="utf-8")
+        os.utime(inp / "alpha.md")                      # touched, same content
+        (inp / "beta.txt").write_text("# beta\n\nedited\n", encoding="utf-8")
+        (inp / "gamma.md").unlink()
+        (inp / "delta.md").write_text("# delta\n", encoding="utf-8")
+        second = curator(root, "analyze")
+        after = {p.name: p.read_text(encoding="utf-8") for p in staging.glob("*.md")}
+        manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+        third = curator(root, "analyze")
+    assert first.returncode == 0 and second.returncode == 0, first.stderr + second.stderr
+    assert "staged: 3 (3 re-staged, 0 unchanged, 0 removed)" in first.stdout, first.stdout
+    assert "staged: 3 (2 re-staged, 1 unchanged, 1 removed)" in second.stdout, second.stdout
+    assert "staged: 3 (0 re-staged, 3 unchanged, 0 removed)" in third.stdout, third.stdout
+    assert sorted(after) == ["alpha.md", "beta.md", "delta.md"], sorted(after)
+    assert after["alpha.md"] == staged["alpha.md"], "unchanged input was rewritten"
+    assert after["beta.md"].endswith("# beta\n\nedited\n"), after["beta.md"]
+    assert [Path(e["path"]).name for e in manifest["inputs"]] == ["alpha.md", "beta.txt", "delta.md"], manifest
+    assert all({"size", "mtime_ns", "sha256", "generated_at"} <= set(e) for e in manifest["inputs"]), manifest
+    return {"second": second.stdout.strip()}
+
+def test_analyze_extractors():
+    """Test 4: analyze extracts PDF, DOCX and HTML in the process pool and reuses extractions by sha256"""
+    with tempfile.TemporaryDirectory() as tmp:
+        root = make_project(Path(tmp))
+        inp, staging = root / "input", root / "curator" / "staging"
+        inp.mkdir()
+        (inp / "runbook.pdf").write_bytes(make_pdf("Runbook: rotate keys"))
+        make_docx(inp / "deploy.docx")
+        (inp / "guide.html").write_text("<html><head><style>p{}</style></head><body><h2>Guide &amp; Notes</h2>"
+                                        "<p>Hello\n  world</p><ul><li>one</li><li>two</li></ul></body></html>", encoding="utf-8")
+        (inp / "scan.tiff").write_bytes(b"II*\0")
+        first = curator(root, "analyze", "--workers", "2")
+        body = {p.stem: p.read_text(encoding="utf-8").split("---\n", 2)[2] for p in staging.glob("*.md")}
+        cached = sorted(p.name.split(".", 1)[1] for p in (staging / ".cache" / "extract").iterdir())
+        shutil.copy(inp / "deploy.docx", inp / "deploy-copy.docx")
+        (staging / "runbook.md").unlink()
+        second = curator(root, "analyze")
+        recached = len(list((staging / ".cache" / "extract").iterdir()))
+        manifest = json.loads((staging / "ANALYZE_MANIFEST.json").read_text(encoding="utf-8"))
+    assert first.returncode == 0 and second.returncode == 0, first.stderr + second.stderr
+    assert body["runbook"] == "Runbook: rotate keys\nStep one (daily)\n\n", body["runbook"]
+    assert body["deploy"] == "# Deploy\n\nRun make ci\n\n- then review\n\n", body["deploy"]
+    assert body["guide"] == "## Guide & Notes\n\nHello world\n\n- one\n- two\n\n", body["guide"]
+    assert body["scan"].startswith("> [Curator placeholder] Binary .tiff not extracted."), body["scan"]
+    assert cached == ["docx.v1.txt", "html.v1.txt", "pdf.v1.txt"], cached
+    assert "staged: 5 (2 re-staged, 3 unchanged, 0 removed)" in second.stdout, second.stdout
+    assert recached == 3, "an extraction was repeated for identical content"
+    assert {Path(e["path"]).name: e["extractor"] for e in manifest["inputs"]} == {
+        "deploy-copy.docx": "docx.v1", "deploy.docx": "docx.v1", "guide.html": "html.v1",
+        "runbook.pdf": "pdf.v1", "scan.tiff": None}, manifest
+    return {"cached": len(cached)}
+
+SLOW_PLUGIN = """
+import os
+from curator_lib.extract import register
+@register("spin", ".spin")
+def spin(path):
+    while True:
+        pass
+    yield ""
+@register("crash", ".crash")
+def crash(path):
+    os._exit(3)
+    yield ""
+@register("hog", ".hog")
+def hog(path):
+    yield str(len(bytearray(1 << 31)))
+"""
+
+def test_extractor_limits():
+    """Test 5: config.yaml extractor plugins are stopped by the time and memory limits; a dying worker fails only its file"""
+    with tempfile.TemporaryDirectory() as tmp:
+        root = make_project(Path(tmp))
+        (root / "scripts" / "slow_extractors.py").write_text(SLOW_PLUGIN, encoding="utf-8")
+        config = root / "curator" / "config.yaml"
+        config.write_text(config.read_text(encoding="utf-8") + "extractor_plugins: [slow_extractors]\n", encoding="utf-8")
+        inp, staging = root / "input", root / "curator" / "staging"
+        inp.mkdir()
+        for name in ["loop.spin", "big.hog", "boom.crash", "ok.md"]:
+            (inp / name).write_text("x\n", encoding="utf-8")
+        for i in range(4):
+            (inp / f"page{i}.html").write_text(f"<p>page {i}</p>", encoding="utf-8")
+        result = curator(root, "analyze", "--workers", "2", "--extract-timeout", "1", "--extract-memory-mb", "512")
+        staged = {p.stem: p.read_text(encoding="utf-8") for p in staging.glob("*.md")}
+        manifest = {Path(e["path"]).name: e for e in json.loads((staging / "ANALYZE_MANIFEST.json").read_text(encoding="utf-8"))["inputs"]}
+        cached = sorted(p.name.split(".", 1)[1] for p in (staging / ".cache" / "extract").iterdir())
+    assert result.returncode == 0, result.stderr
+    assert manifest["loop.spin"]["error"] == "spin extractor exceeded 1s", manifest
+    assert manifest["big.hog"]["error"] == "hog extractor exceeded the memory limit", manifest
+    assert manifest["boom.crash"]["error"] == "crash extractor worker died", manifest
+    assert all(staged[f"page{i}"].endswith(f"page {i}\n\n") and "error" not in manifest[f"page{i}.html"] for i in range(4)), staged
+    assert "> Reason: spin extractor exceeded 1s" in staged["loop"], staged["loop"]
+    assert staged["ok"].endswith("x\n") and "error" not in manifest["ok.md"], manifest
+    assert cached == ["html.v1.txt"] * 4, cached      # failures are not cached, nor is partial output
+    return {"not_extracted": result.stdout.count("not extracted")}
+
+def test_analyze_retries_failures():
+    """Test 6: a failed extraction is not cached: the next analyze extracts the input again"""
+    with tempfile.TemporaryDirectory() as tmp:
+        root = make_project(Path(tmp))
+        inp, staging = root / "input", root / "curator" / "staging"
+        inp.mkdir()
+        (inp / "a.html").write_text("<h1>Title</h1><p>Body</p>", encoding="utf-8")
+        (inp / "b.md").write_text("# B\n", encoding="utf-8")
+        first = curator(root, "analyze", "--extract-timeout", "0.000001")
+        failed = (staging / "a.md").read_text(encoding="utf-8")
+        # Settled inputs: the size/mtime fast path alone would call both unchanged
+        manifest_path = staging / "ANALYZE_MANIFEST.json"
+        manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+        manifest["written_ns"] += 10 ** 10
+        manifest_path.write_text(json.dumps(manifest), encoding="utf-8")
+        second = curator(root, "analyze")
+        retried = (staging / "a.md").read_text(encoding="utf-8")
+        entry = json.loads(manifest_path.read_text(encoding="utf-8"))["inputs"][0]
+    assert "> Reason: html extractor exceeded 1e-06s" in failed, failed
+    assert "staged: 2 (1 re-staged, 1 unchanged, 0 removed)" in second.stdout, second.stdout
+    assert retried.endswith("# Title\n\nBody\n\n") and "error" not in entry, (retried, entry)
+    return {"second": second.stdout.strip()}
+
+RISK = ("## 3. Unified Risk & Control Model\n| Pillar | Risk | Severity | Mitigation |\n"
+        "| Security | Secret leakage through agent logs | 5 | Redact tokens before any log write |\n"
+        "| Reliability | Flaky CI hides regressions | 4 | Quarantine flaky tests within one day |\n"
+        "| Cost | Runaway agent loops | 3 | Cap tool calls and wall time per task |\n")
+
+def test_plan_near_duplicates():
+    """Test 7: plan removes exact and lightly edited copies of global blocks and records their scores"""
+    edited = RISK.replace("within one day", "within two days").replace("Runaway", "Unbounded")
+    unrelated = "| Pillar | Risk |\n| Security | Tester keeps its own fixtures per run |"
+    with tempfile.TemporaryDirectory() as tmp:
+        root = make_project(Path(tmp))
+        (root / "dist" / "PartA_Core.md").write_text(PART_A + "\n" + RISK, encoding="utf-8")
+        staging = root / "curator" / "staging"
+        staging.mkdir(parents=True)
+        (staging / "tester.md").write_text(f"# Tester\n\nIntro.\n\nExact: {RISK}\nEdited: {edited}\n{unrelated}\n", encoding="utf-8")
+        default = curator(root, "plan")
+        removed = json.loads((root / "curator" / "diffs" / "PLAN.json").read_text(encoding="utf-8"))["proposals"][0]["removed_blocks"]
+        strict = curator(root, "plan", "--threshold", "1")
+        strict_removed = json.loads((root / "curator" / "diffs" / "PLAN.json").read_text(encoding="utf-8"))["proposals"][0]["removed_blocks"]
+        proposal = (root / "curator" / "diffs" / "tester.proposal.md").read_text(encoding="utf-8")
+    assert default.returncode == 0 and strict.returncode == 0, default.stderr + strict.stderr
+    assert [(r["key"], r["line_start"]) for r in removed] == [("Unified Risk & Control Model", 5), ("Unified Risk & Control Model", 11)], removed
+    assert removed[0]["score"] == 1.0 and 0.7 <= removed[1]["score"] < 1.0, removed
+    assert [r["line_start"] for r in strict_removed] == [5], strict_removed
+    assert "Edited:" in proposal and unrelated in proposal, proposal
+    return {"edited_score": removed[1]["score"]}
+
+CHECK = """import pathlib, sys
+sys.exit(any("BROKEN" in p.read_text() for p in pathlib.Path("blueprints").glob("*.md")))
+"""
+
+def git(root: Path, *args) -> str:
+    return subprocess.run(["git", *args], cwd=root, capture_output=True, text=True, check=True).stdout
+
+def test_apply_batches():
+    """Test 8: apply bin-packs proposals by diff LOC, validates each batch alone and skips only failing ones"""
+    with tempfile.TemporaryDirectory() as tmp:
+        root = make_project(Path(tmp))
+        config = root / "curator" / "config.yaml"
+        text = config.read_text(encoding="utf-8").replace("max_files_per_pr: 6", "max_files_per_pr: 2")
+        text = text.replace("max_loc_per_pr: 2000", "max_loc_per_pr: 50").replace('validate_cmd: "make ci"', 'validate_cmd: "python3 check.py"')
+        config.write_text(text, encoding="utf-8")
+        (root / "check.py").write_text(CHECK, encoding="utf-8")
+        (root / "blueprints").mkdir()
+        for name in ["alpha", "alpha-copy"]:
+            (root / "blueprints" / f"{name}.md").write_text("# Alpha\n" + "".join(f"old {i}\n" for i in range(10)), encoding="utf-8")
+        git(root, "init", "-q", "-b", "main")
+        git(root, "-c", "user.name=t", "-c", "user.email=t@t", "commit", "-q", "--allow-empty", "-m", "base")
+        git(root, "add", "blueprints", "check.py")
+        git(root, "-c", "user.name=t", "-c", "user.email=t@t", "commit", "-q", "-m", "blueprints")
+        hook = root / ".git" / "hooks" / "pre-commit"       # rejects the first batch after it validated
+        hook.write_text("#!/bin/sh\ngit diff --cached --name-only | grep -q huge && exit 1\nexit 0\n", encoding="utf-8")
+        hook.chmod(0o755)
+        diffs = root / "curator" / "diffs"
+        diffs.mkdir(parents=True)
+        sizes = {"alpha": 30, "beta": 25, "gamma": 20, "delta": 15, "huge": 70, "bad": 5, "same": 0}
+        proposals = []
+        for name, loc in sizes.items():
+            body = "".join(f"line {i}\n" for i in range(loc)) + ("BROKEN\n" if name == "bad" else "")
+            if name == "alpha":   # 10 lines removed, 29 added: 39 LOC
+                body = "# Alpha\n" + "".join(f"new {i}\n" for i in range(29))
+            if name == "same":    # identical to its blueprint: never batched
+                name = "alpha-copy"; body = (root / "blueprints" / "alpha-copy.md").read_text(encoding="utf-8")
+            (diffs / f"{name}.proposal.md").write_text(body, encoding="utf-8")
+            proposals.append({"proposal": f"curator/diffs/{name}.proposal.md", "target_blueprint": f"blueprints/{name}.md"})
+        (diffs / "PLAN.json").write_text(json.dumps({"proposals": proposals}), encoding="utf-8")
+        env = dict(os.environ, GIT_AUTHOR_NAME="t", GIT_AUTHOR_EMAIL="t@t", GIT_COMMITTER_NAME="t", GIT_COMMITTER_EMAIL="t@t")
+        result = subprocess.run([sys.executable, "scripts/curator_agent.py", "apply"], cwd=root, capture_output=True, text=True, env=env)
+        batches = json.loads((diffs / "BATCHES.json").read_text(encoding="utf-8"))["batches"]
+        branches = {b["branch"]: sorted(git(root, "diff", "--name-only", "main", b["branch"]).split()) for b in batches if b["branch"]}
+        head = git(root, "rev-parse", "--abbrev-ref", "HEAD").strip()
+        clean = git(root, "status", "--porcelain", "blueprints")
+        main_files = sorted(git(root, "ls-files", "blueprints").split())
+    assert result.returncode == 2, result.stdout + result.stderr
+    packed = [([Path(p["target_blueprint"]).stem for p in b["proposals"]], b["loc"], b["status"]) for b in batches]
+    # The test repo has no remote: committed batches stay on their branches, unpushed
+    assert packed == [(["huge"], 70, "failed"), (["alpha", "bad"], 45, "failed"),
+                      (["beta", "gamma"], 45, "unpushed"), (["delta"], 15, "unpushed")], packed
+    assert sorted(branches.values()) == [["blueprints/beta.md", "blueprints/gamma.md"], ["blueprints/delta.md"]], branches
+    assert head == "main" and clean == "", (head, clean)
+    assert main_files == ["blueprints/alpha-copy.md", "blueprints/alpha.md"], main_files
+    assert "validation failed" in result.stderr and "commit failed" in result.stderr, result.stderr
+    assert "0/4 batch(es) applied" in result.stdout, result.stdout
+    return {"statuses": [b["status"] for b in batches]}
+
+def main():
+    """Run all tests"""
+    print("Curator Agent Tests")
+    print("=" * 40)
+    failed = 0
+    for test in [test_heading_iter, test_plan_removes_global_blocks, test_analyze_incremental,
+                 test_analyze_extractors, test_extractor_limits, test_analyze_retries_failures,
+                 test_plan_near_duplicates,
+                 test_apply_batches]:
+        try:
+            print(f"✅ {test.__doc__}: {test()}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__doc__}: {e}")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
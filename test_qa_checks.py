@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+DocSyn QA Check Tests - qa_build.py on throwaway project trees
+
+Tests:
+1. The multi-term scanner finds exactly what a brute-force search finds, in every input mode
+2. qa_build reports forbidden terms with line and column, honouring the vendor policy
+3. Per-file checks share one read and at most one YAML parse per blueprint
+4. Concurrent checks produce the same report as a sequential run, with per-check timings
+5. Cached verdicts are reused only for unchanged files under an unchanged check configuration
+6. The front-matter parser agrees with PyYAML on our subset and its index re-reads only changed headers
+7. The leakage fingerprint index finds what normalized substring search finds, with source spans
+8. ci_consolidate output is independent of the worker count and cached per blueprint and Part A blocks
+9. ci_validate answers heading checks from a one-pass heading index, writes it out and locates leaks
+10. manifest_guard reads front matter from the index but still rejects curated sources that are not UTF-8
+
+Usage: python test_qa_checks.py
+"""
+import io
+import json
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import yaml
+
+REPO_ROOT = Path(__file__).resolve().parent
+sys.path.insert(0, str(REPO_ROOT / "scripts"))
+from docsyn_lib import frontmatter
+from docsyn_lib.fingerprint import FingerprintIndex, norm
+from docsyn_lib.termscan import Hit, TermMatcher
+
+BLUEPRINTS = {
+    "documenter.md": "# Documenter\n\nUses Claude Code here.\n" + "filler line\n" * 100,
+    "guardian.md": "---\npolicy: vendor-specific\n---\n# Guardian\nClaude AI and Claude Code\n" + "x\n" * 600,
+    "janitor.md": "# Janitor\n\ncafé — Single Source of Truth\n" + "y\n" * 600,
+}
+
+def make_project(root: Path, blueprints: dict) -> Path:
+    """A minimal project tree with this repo's scripts, for running qa_build.py in isolation."""
+    shutil.copytree(REPO_ROOT / "scripts", root / "scripts", ignore=shutil.ignore_patterns("__pycache__"))
+    for name, text in blueprints.items():
+        p = root / "blueprints" / name
+        p.parent.mkdir(parents=True, exist_ok=True)
+        p.write_text(text, encoding="utf-8")
+    return root
+
+def run_qa(root: Path, *flags) -> dict:
+    subprocess.run([sys.executable, "scripts/qa_build.py", *flags], cwd=root, capture_output=True, text=True)
+    return json.loads((root / "dist" / "QA_REPORT.json").read_text(encoding="utf-8"))
+
+def brute_force(terms, text: str):
+    terms = list(dict.fromkeys(terms))
+    data, hits = text.encode("utf-8"), []
+    for idx, t in enumerate(terms):
+        i = data.find(t.encode("utf-8"))
+        while i != -1:
+            before = data[:i].decode("utf-8")
+            hits.append((i, idx, Hit(t, before.count("\n") + 1, len(before) - before.rfind("\n"), i)))
+            i = data.find(t.encode("utf-8"), i + 1)
+    return [h for _, _, h in sorted(hits)]
+
+def test_term_scanner():
+    """Test 1: Term scanner matches brute force via scan, mmap and streaming"""
+    rng = random.Random(11)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "input.md"
+        for _ in range(500):
+            terms = ["".join(rng.choice("abé C") for _ in range(rng.randint(1, 6))) for _ in range(rng.randint(1, 8))]
+            text = "".join(rng.choice("abcé\n C") for _ in range(rng.randint(0, 400)))
+            matcher, expected = TermMatcher(terms), brute_force(terms, text)
+            path.write_bytes(text.encode("utf-8"))
+            assert matcher.scan(text.encode("utf-8")) == expected, (terms, text)
+            assert matcher.scan_file(path) == expected, (terms, text)
+            for chunk in (1, 2, 5, 64):
+                assert list(matcher.scan_stream(io.BytesIO(text.encode("utf-8")), chunk)) == expected, (chunk, terms, text)
+    return {"cases": 500}
+
+def test_forbidden_term_locations():
+    """Test 2: Forbidden terms are reported with line and column, vendor files as warnings"""
+    with tempfile.TemporaryDirectory() as tmp:
+        report = run_qa(make_project(Path(tmp), BLUEPRINTS))["checks"]["forbidden_terms"]
+    problems = dict((f, terms) for f, terms in report["forbidden_problems"])
+    warnings = dict((f, terms) for f, terms in report["forbidden_warnings"])
+    assert problems == {"blueprints/documenter.md": ["Claude Code"],
+                        "blueprints/janitor.md": ["Single Source of Truth"]}, problems
+    assert warnings == {"blueprints/guardian.md": ["Claude Code", "Claude AI"]}, warnings
+    assert report["forbidden_hits"]["blueprints/janitor.md"] == [
+        {"term": "Single Source of Truth", "line": 3, "col": 8}], report["forbidden_hits"]
+    assert [h["col"] for h in report["forbidden_hits"]["blueprints/guardian.md"]] == [1, 15]
+    return {"hits": sum(len(v) for v in report["forbidden_hits"].values())}
+
+def test_single_traversal():
+    """Test 3: Each blueprint is read once and its front matter parsed once"""
+    blueprints = dict(BLUEPRINTS, **{"tiny.md": "# Tiny\n", "anchor.md": "---\nanchor: true\n---\n# Anchor\n"})
+    with tempfile.TemporaryDirectory() as tmp:
+        report = run_qa(make_project(Path(tmp), blueprints))
+    assert report["scan"] == {"files": 5, "reads": 5, "fm_parses": 2,
+                              "bytes": sum(len(t.encode("utf-8")) for t in blueprints.values()),
+                              "cache_hits": 0, "cache_misses": 5}, report["scan"]
+    small = report["checks"]["blueprint_sizes"]["small_blueprints"]
+    assert small == ["blueprints/tiny.md"], small
+    return report["scan"]
+
+def test_concurrent_checks():
+    """Test 4: Concurrent and sequential QA runs agree and time every check"""
+    with tempfile.TemporaryDirectory() as tmp:
+        root = make_project(Path(tmp), BLUEPRINTS)
+        sequential = run_qa(root, "--jobs", "1")
+        summary = (root / "dist" / "QA_SUMMARY.txt").read_text(encoding="utf-8")
+        concurrent = run_qa(root, "--jobs", "6")
+        assert (root / "dist" / "QA_SUMMARY.txt").read_text(encoding="utf-8") == summary
+    assert concurrent["checks"] == sequential["checks"]
+    assert list(concurrent["checks"]) == list(concurrent["timings"]["checks"]), concurrent["timings"]
+    assert list(concurrent["timings"]["inputs"]) == ["files"], concurrent["timings"]
+    return {"checks": len(concurrent["checks"])}
+
+def test_verdict_cache():
+    """Test 5: Warm QA runs re-check only changed files; config changes and --no-cache are cold"""
+    with tempfile.TemporaryDirectory() as tmp:
+        root = make_project(Path(tmp), BLUEPRINTS)
+        cold = run_qa(root)
+        warm = run_qa(root)
+        (root / "blueprints" / "janitor.md").write_text("# Janitor\nClaude AI\n", encoding="utf-8")
+        edited = run_qa(root)
+        forced = run_qa(root, "--no-cache")
+        qa = root / "scripts" / "qa_build.py"
+        qa.write_text(qa.read_text(encoding="utf-8").replace("MIN_BYTES_BLUEPRINT = 1000", "MIN_BYTES_BLUEPRINT = 10"), encoding="utf-8")
+        reconfigured = run_qa(root)
+    assert warm["checks"] == cold["checks"]
+    assert (warm["scan"]["reads"], warm["scan"]["cache_hits"]) == (0, 3), warm["scan"]
+    assert (edited["scan"]["reads"], edited["scan"]["cache_hits"]) == (1, 2), edited["scan"]
+    assert edited["checks"]["blueprint_sizes"]["small_blueprints"] == ["blueprints/janitor.md"], edited["checks"]
+    assert dict(edited["checks"]["forbidden_terms"]["forbidden_problems"])["blueprints/janitor.md"] == ["Claude AI"]
+    assert (forced["scan"]["reads"], forced["scan"]["cache_hits"]) == (3, 0), forced["scan"]
+    assert forced["checks"] == edited["checks"]
+    assert reconfigured["scan"]["cache_hits"] == 0, reconfigured["scan"]
+    assert reconfigured["checks"]["blueprint_sizes"]["small_blueprints"] == [], reconfigured["checks"]
+    return {"warm": warm["scan"]["cache_hits"], "edited": edited["scan"]["reads"]}
+
+def test_front_matter():
+    """Test 6: Front matter parses like yaml.safe_load and the index reuses unchanged headers"""
+    rng = random.Random(15)
+    scalars = ["a", "vendor-specific", "true", "No", "~", "12", "-3", "1.5", "'it''s'", '"x, y"', '"tab\\t"', "A # note", "a#b"]
+    for _ in range(300):
+        keys = rng.sample(["part", "blueprint", "tags", "anchor", "order", "owner", "policy"], rng.randint(1, 5))
+        lines = []
+        for k in keys:
+            if rng.random() < 0.3:
+                lines.append(f"{k}: [{', '.join(rng.sample(scalars[:10], rng.randint(0, 4)))}]")
+            elif rng.random() < 0.2:
+                lines += [f"{k}:"] + [f"  - {v}" for v in rng.sample(scalars, rng.randint(1, 3))]
+            else:
+                lines.append(f"{k}: {rng.choice(scalars)}")
+        block = "\n".join(lines)
+        fm = frontmatter.split(f"---\n{block}\n---\n# Body\n")
+        assert fm is not None and fm.data == yaml.safe_load(block) and not fm.errors, (block, fm)
+    assert frontmatter.split("# No front matter\n---\n") is None
+    assert frontmatter.split("---\npart: A\n") is None
+    assert frontmatter.split("---\nnested:\n  a: 1\n---\n").errors == ("  a: 1",)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        docs = Path(tmp) / "docs"
+        docs.mkdir()
+        (docs / "a.md").write_text("---\nblueprint: a\ntags: [x, y]\n---\n" + "body\n" * 100000, encoding="utf-8")
+        (docs / "b.md").write_text("# B\n", encoding="utf-8")
+        assert frontmatter.read_header(docs / "a.md") == b"---\nblueprint: a\ntags: [x, y]\n---\n"
+        index = frontmatter.FrontMatterIndex.in_dist(Path(tmp) / "dist")
+        assert index.get(docs / "a.md").data == {"blueprint": "a", "tags": ["x", "y"]}
+        assert index.get(docs / "b.md") is None
+        index.save()
+        (docs / "b.md").write_text("---\npart: A\n---\n# B\n", encoding="utf-8")
+        (docs / "a.md").unlink()
+        warm = frontmatter.FrontMatterIndex.in_dist(Path(tmp) / "dist")
+        assert warm.get(docs / "b.md").data == {"part": "A"}
+        assert (warm.hits, warm.misses) == (0, 1), (warm.hits, warm.misses)
+        assert isinstance(warm.map([docs / "a.md"])[0], FileNotFoundError)
+        warm.save()
+        saved = json.loads((Path(tmp) / "dist" / frontmatter.INDEX_NAME).read_text(encoding="utf-8"))
+    assert list(saved["entries"]) == [str((docs / "b.md").resolve())], saved
+    return {"cases": 300}
+
+def test_leakage_fingerprints():
+    """Test 7: Fingerprint leakage detection matches norm() substring search and reports source spans"""
+    import ci_consolidate
+    rng = random.Random(18)
+    words = ["Router", "matrix", "| Risk |", "**Control**", "`make ci`", "Devcontainer:", "> quoted", "_x_", "ΣΑΣ", "İstanbul", "\n"]
+    def text(n):
+        return " ".join(rng.choice(words) for _ in range(n))
+    blocks = {"Router": "## Router\n| Route | Ch. |\n" + text(20), "Risk": text(6), "Empty": "", "Env": text(60)}
+    index = FingerprintIndex(blocks)
+    for _ in range(300):
+        parts = [text(rng.randint(0, 30))]
+        for _ in range(rng.randint(0, 3)):
+            leak = blocks[rng.choice(["Router", "Risk", "Env"])]
+            parts += [leak.upper().replace(" ", "\n> ", 2) if rng.random() < 0.3 else leak, text(rng.randint(0, 10))]
+        doc = "\n".join(parts)
+        expected = [k for k, v in blocks.items() if v and norm(v) in norm(doc)]
+        matches = index.find(doc)
+        assert list(dict.fromkeys(m.key for m in matches)) == expected, (doc, expected, matches)
+        for m in matches:
+            assert norm(doc[m.start:m.end]) == norm(blocks[m.key]), m
+            assert (m.line, m.end_line) == (doc.count("\n", 0, m.start) + 1, doc.count("\n", 0, m.end - 1) + 1), m
+    assert FingerprintIndex({"A": ""}).find("anything") == [] and not FingerprintIndex({})
+
+    partA = "# Part A\n\n## 1. Standard Development Environment\nUse the **devcontainer** | always |\n\n## Next\n"
+    env = ci_consolidate.extract_global_blocks_from_partA(partA)
+    leaked = "# Tester\n\nIntro paragraph.\n\nCopied: > ## 1. standard development environment\nUse the devcontainer always\n\nOutro.\n"
+    cleaned, removed = ci_consolidate.strip_by_fingerprints(leaked, FingerprintIndex(env))
+    assert cleaned == "# Tester\n\nIntro paragraph.\n\nOutro.\n", cleaned
+    (key, sample, span), = removed
+    assert key == "Standard Development Environment" and sample[span[0]:span[1]].startswith("## 1. standard"), removed
+    return {"cases": 300, "k": index.k}
+
+def test_parallel_consolidate():
+    """Test 8: Consolidation is worker-count independent and re-cleans only changed blueprints"""
+    def consolidate(root, *flags):
+        log = subprocess.run([sys.executable, "scripts/ci_consolidate.py", *flags], cwd=root,
+                             capture_output=True, text=True, check=True).stdout
+        return log, {n: (root / "dist" / n).read_bytes() for n in ["PartB_Blueprints.md", "LEAKAGE_REPORT.json"]}
+
+    env = "## Standard Development Environment\nUse the devcontainer | always |\n"
+    blueprints = {f"bp-{i}.md": f"# Blueprint {i}\n\n" + f"Paragraph {i}.\n\n" * 40 + ("Copied from core: " + env if i % 3 == 0 else "")
+                  for i in range(9)}
+    blueprints["tiny.md"] = "# Tiny\n"
+    with tempfile.TemporaryDirectory() as tmp:
+        root = make_project(Path(tmp), blueprints)
+        (root / "dist").mkdir()
+        (root / "dist" / "PartA_Core.md").write_text("# Part A\n\n" + env.replace("devcontainer", "sandbox"), encoding="utf-8")
+        _, serial = consolidate(root, "--workers", "1", "--no-cache")
+        cold_log, parallel = consolidate(root, "--workers", "3")
+        warm_log, warm = consolidate(root, "--workers", "3")
+        (root / "blueprints" / "bp-4.md").write_text(blueprints["bp-4.md"] + "More.\n", encoding="utf-8")
+        edit_log, _ = consolidate(root)
+        (root / "dist" / "PartA_Core.md").write_text("# Part A\n\n" + env, encoding="utf-8")
+        blocks_log, leaked = consolidate(root)
+    assert parallel == serial == warm, "worker count or cache changed the output"
+    assert "0 cached, 10 cleaned with 3 workers" in cold_log and "10 cached, 0 cleaned" in warm_log, (cold_log, warm_log)
+    assert "9 cached, 1 cleaned" in edit_log and "0 cached, 10 cleaned" in blocks_log, (edit_log, blocks_log)
+    report = json.loads(leaked["LEAKAGE_REPORT.json"])
+    assert "tiny.md" not in report and sorted(n for n, e in report.items() if e["removed_blocks"]) == ["bp-0.md", "bp-3.md", "bp-6.md"], report
+    return {"warm": warm_log.strip()}
+
+def test_heading_index_validation():
+    """Test 9: ci_validate checks headings through HEADING_INDEX.json and reports leaked Part A blocks by line"""
+    env = "## 2. Standard Development Environment\nUse the devcontainer | always |\n"
+    partA = ("# Part A\n\n## 1. Router — Query-Pattern Matrix\n| Route | Ch. |\n\n> \\## Unified Risk & Control Model\n"
+             "Risks.\n\n" + env)
+    partB = "# Tester\n\n```\n# not a heading? still counted\n```\n" + "Tester text.\n" * 8000
+    with tempfile.TemporaryDirectory() as tmp:
+        root = make_project(Path(tmp), {"tester.md": "# Tester\n" + "x\n" * 600})
+        dist = root / "dist"
+        dist.mkdir()
+        def validate(part_b):
+            (dist / "PartA_Core.md").write_text(partA, encoding="utf-8")
+            (dist / "PartB_Blueprints.md").write_text(part_b, encoding="utf-8")
+            (dist / "DocSyn_Compiled.md").write_text(partA + "\n" + part_b, encoding="utf-8")
+            return subprocess.run([sys.executable, "scripts/ci_validate.py"], cwd=root, capture_output=True, text=True)
+        clean = validate(partB)
+        index = json.loads((dist / "HEADING_INDEX.json").read_text(encoding="utf-8"))
+        compiled = (dist / "DocSyn_Compiled.md").read_bytes()
+        leaked = validate(partB + "\nCopied: " + env)
+    assert clean.returncode == 0 and "All invariant checks passed" in clean.stdout, clean.stdout
+    assert sorted(index["documents"]) == ["dist/DocSyn_Compiled.md", "dist/PartA_Core.md", "dist/PartB_Blueprints.md"], index
+    headings = index["documents"]["dist/DocSyn_Compiled.md"]["headings"]
+    quoted = next(h for h in headings if h["norm"] == "unified risk & control model")
+    assert quoted["level"] == 2 and quoted["quote"] == 1 and quoted["escaped"], quoted
+    assert [h["fenced"] for h in headings if h["title"].startswith("not a heading")] == [True], headings
+    for h in headings:
+        line = compiled[h["start"]:h["end"]].decode("utf-8")
+        assert line.rstrip().endswith(h["title"]) and compiled[:h["start"]].count(b"\n") + 1 == h["line"], h
+    assert leaked.returncode == 1, leaked.stdout
+    leak_line = len((partB + "\n").splitlines()) + 1
+    assert f"[LEAK] 'Standard Development Environment' at dist/PartB_Blueprints.md lines {leak_line}-{leak_line + 1}" in leaked.stdout, leaked.stdout
+    return {"headings": len(headings)}
+
+def test_manifest_guard_encoding():
+    """Test 10: manifest_guard rejects a curated source whose body is not valid UTF-8"""
+    with tempfile.TemporaryDirectory() as tmp:
+        root = make_project(Path(tmp), {})
+        (root / "core").mkdir()
+        (root / "core" / "a.md").write_text("---\npart: A\n---\n# A\n", encoding="utf-8")
+        (root / "core" / "b.md").write_bytes(b"---\npart: A\n---\n# B\ncaf\xe9\n")
+        def guard(*curated):
+            (root / "build.manifest.json").write_text(json.dumps({"curated_sources": list(curated)}), encoding="utf-8")
+            return subprocess.run([sys.executable, "scripts/tools/manifest_guard.py"], cwd=root, capture_output=True, text=True)
+        ok = guard("core/a.md")
+        bad = guard("core/a.md", "core/b.md")
+    assert ok.returncode == 0, ok.stderr
+    assert bad.returncode == 5 and "not valid UTF-8: core/b.md (byte 23)" in bad.stderr, (bad.returncode, bad.stderr)
+    return {"rejected": "core/b.md"}
+
+def main():
+    """Run all tests"""
+    print("DocSyn QA Check Tests")
+    print("=" * 40)
+    failed = 0
+    for test in [test_term_scanner, test_forbidden_term_locations, test_single_traversal,
+                 test_concurrent_checks, test_verdict_cache, test_front_matter, test_leakage_fingerprints,
+                 test_parallel_consolidate, test_heading_index_validation, test_manifest_guard_encoding]:
+        try:
+            print(f"✅ {test.__doc__}: {test()}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__doc__}: {e}")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())